@@ -0,0 +1,243 @@
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import streamlit as st
+
+from code_sandbox import SANDBOX_WORKERS, failed_cases, result_cache_stats, run_code, run_stats
+from code_validator import compile_cache_stats
+
+
+# ==========================================
+# 0. 문제별 채점 표 (문제 ID -> profile, 확인할 경우들)
+# ==========================================
+#   {"name": 안내 이름, "expr": 학생 코드 실행 뒤 계산할 식, "expected": 기댓값}
+#   {"name": 안내 이름, "stdout": 출력 중 한 줄과 정확히 같아야 하는 문장}
+PROBLEMS = {
+    "diag_q1": {
+        "title": "진단 (1) Hello 출력",
+        "profile": "free",
+        "cases": (
+            {"name": "Hello 출력", "stdout": "Hello"},
+        ),
+    },
+    "diag_q2": {
+        "title": "진단 (2) 두 수의 합",
+        "profile": "free",
+        "cases": (
+            {"name": "a 에 5 저장", "expr": "a", "expected": 5},
+            {"name": "b 에 3 저장", "expr": "b", "expected": 3},
+            {"name": "합 8 출력", "stdout": "8"},
+        ),
+    },
+    "d1_ha": {
+        "title": "1DAY 도전 (하) 항등식 연산",
+        "profile": "sympy-whitelist",
+        "cases": (
+            {"name": "몫 Q = 3", "expr": "Q", "expected": 3},
+            {"name": "나머지 R = 2", "expr": "R", "expected": 2},
+            {"name": "항등식 확인 출력", "stdout": "항등식 확인: True"},
+        ),
+    },
+    "d1_jung": {
+        "title": "1DAY 도전 (중) 나머지 정리 함수",
+        "profile": "sympy-whitelist",
+        "cases": (
+            {"name": "f(0) = 3", "expr": "f(0)", "expected": 3},
+            {"name": "f(1) = 1", "expr": "f(1)", "expected": 1},
+            {"name": "f(-2) = 13", "expr": "f(-2)", "expected": 13},
+            {"name": "나머지 result = 13", "expr": "result", "expected": 13},
+        ),
+    },
+    "d1_sang": {
+        "title": "1DAY 도전 (상) 인수정리 종합",
+        "profile": "sympy-whitelist",
+        "cases": (
+            {"name": "인수분해 결과 출력", "stdout": "1. 인수분해 결과: (x - 2)*(x - 1)*(x + 3)"},
+            {"name": "고른 수가 인수에서 나온 값", "expr": "a in (1, 2, -3)", "expected": True},
+            {"name": "f(a) = 0", "expr": "f(a)", "expected": 0},
+        ),
+    },
+    "d2_ha": {
+        "title": "2DAY 도전 (하) 판별식 기초",
+        "profile": "graphing",
+        "cases": (
+            {"name": "판별식 D = 0", "expr": "D", "expected": 0},
+            {"name": "D = b² - 4ac", "expr": "D == b**2 - 4*a*c", "expected": True},
+        ),
+    },
+    "d2_jung": {
+        "title": "2DAY 도전 (중) 시뮬레이터 함수",
+        "profile": "graphing",
+        "cases": (
+            {"name": "D < 0 이면 안전", "expr": "check_drone(1, -2, 3)", "expected": "안전 비행"},
+            {"name": "D = 0 이면 스침", "expr": "check_drone(1, -2, 1)", "expected": "스침 (접함)"},
+            {"name": "D > 0 이면 추락", "expr": "check_drone(1, 0, -1)", "expected": "추락 (교점 2개)"},
+        ),
+    },
+    "d2_sang": {
+        "title": "2DAY 도전 (상) 근의 공식 결합",
+        "profile": "graphing",
+        "cases": (
+            {"name": "판별식 D = 16", "expr": "D", "expected": 16},
+            {"name": "두 근 1, 5", "expr": "sorted([root1, root2])", "expected": [1.0, 5.0]},
+        ),
+    },
+}
+
+# 교사용 일괄 채점에 올리는 파일의 열 이름 (한 줄에 학생 한 명의 한 문제)
+EXPORT_COLUMNS = ("학번", "문제", "코드")
+
+
+# ==========================================
+# 1. 채점 (제출물 하나 = 워커 실행 한 번)
+# ==========================================
+def grade_submission(code, problem_id, label=None):
+    problem = PROBLEMS[problem_id]
+    cases = problem["cases"]
+    reply = run_code(code, profile=problem["profile"], label=label or f"grade/{problem_id}", cases=cases)
+    results = reply.get("cases") or failed_cases(cases, reply["output"])
+    passed = sum(result["passed"] for result in results)
+    return {
+        "problem": problem_id,
+        "score": round(100 * passed / len(cases)),
+        "passed": passed,
+        "total": len(cases),
+        "cases": results,
+        "output": reply["output"],
+        "status": reply["status"],
+    }
+
+
+def grade_class(submissions):
+    # submissions: EXPORT_COLUMNS 열을 가진 DataFrame
+    # 워커 수만큼 동시에 채점하고, 학생(행) x 문제(열) 점수표를 돌려줍니다.
+    missing = [column for column in EXPORT_COLUMNS if column not in submissions.columns]
+    if missing:
+        raise ValueError(f"채점 파일에 {', '.join(missing)} 열이 없습니다.")
+    rows = submissions[list(EXPORT_COLUMNS)].dropna(subset=["문제"]).fillna("")
+    rows = rows[rows["문제"].isin(PROBLEMS)]
+
+    def grade_row(row):
+        student_id, problem_id, code = row
+        return str(student_id), problem_id, grade_submission(str(code), problem_id, label=f"bulk/{problem_id}")["score"]
+
+    with ThreadPoolExecutor(max_workers=max(SANDBOX_WORKERS, 1)) as executor:
+        scores = list(executor.map(grade_row, rows.itertuples(index=False, name=None)))
+
+    if not scores:
+        return pd.DataFrame()
+    matrix = pd.DataFrame(scores, columns=["학번", "문제", "점수"]).pivot_table(
+        index="학번", columns="문제", values="점수", aggfunc="max"
+    )
+    matrix["평균"] = matrix.mean(axis=1).round(1)
+    return matrix
+
+
+# ==========================================
+# 2. 화면 (학생 채점 결과 표시 + 교사용 일괄 채점)
+# ==========================================
+def grade_table(grade):
+    return pd.DataFrame(
+        [
+            {"확인 항목": result["name"], "결과": "✅ 통과" if result["passed"] else "❌ 실패", "내 코드의 값": result["actual"]}
+            for result in grade["cases"]
+        ]
+    )
+
+
+def grading_block(problem_id, key_prefix):
+    # 에디터에 있는 코드를 채점 표로 한 번에 채점하고 결과를 session_state 에 남깁니다.
+    if st.button("🧪 자동 채점하기", key=f"{key_prefix}_grade", use_container_width=True):
+        code_input = st.session_state.get(f"{key_prefix}_editor", "") or ""
+        st.session_state[f"{key_prefix}_grade_result"] = grade_submission(code_input, problem_id, label=f"grade/{key_prefix}")
+    grade = st.session_state.get(f"{key_prefix}_grade_result")
+    if grade is None or grade["problem"] != problem_id:
+        return
+    if grade["passed"] == grade["total"]:
+        st.success(f"🎉 모든 확인 항목을 통과했습니다! ({grade['passed']}/{grade['total']})")
+    else:
+        st.warning(f"확인 항목 {grade['total']}개 중 {grade['passed']}개를 통과했습니다. 실패한 항목을 다시 살펴보세요.")
+    st.dataframe(grade_table(grade), use_container_width=True, hide_index=True)
+
+
+def teacher_password():
+    # 교사용 기능을 여는 비밀번호: 환경 변수 TEACHER_PASSWORD 또는 .streamlit/secrets.toml 의 teacher_password
+    password = os.environ.get("TEACHER_PASSWORD", "")
+    if password:
+        return password
+    try:
+        return str(st.secrets.get("teacher_password", ""))
+    except FileNotFoundError:
+        return ""
+
+
+def teacher_unlocked(key):
+    # 비밀번호가 설정되지 않은 서버에서는 교사용 기능을 아예 보여 주지 않습니다.
+    password = teacher_password()
+    if not password:
+        return False
+    if st.session_state.get("teacher_unlocked"):
+        return True
+    entered = st.text_input("교사 비밀번호", type="password", key=f"{key}_teacher_password")
+    if entered and hmac.compare_digest(entered.encode("utf-8"), password.encode("utf-8")):
+        st.session_state["teacher_unlocked"] = True
+        return True
+    if entered:
+        st.error("비밀번호가 맞지 않습니다.")
+    return False
+
+
+def bulk_grading_panel(problem_ids, key):
+    if not teacher_password():
+        return
+    with st.expander("👩‍🏫 교사용: 학급 제출물 일괄 채점"):
+        if not teacher_unlocked(key):
+            return
+        st.caption(
+            f"`{'`, `'.join(EXPORT_COLUMNS)}` 열이 있는 CSV 파일을 올리면 모든 제출물을 동시에 채점합니다. "
+            f"문제 열에는 {', '.join(f'`{pid}`' for pid in problem_ids)} 중 하나를 적습니다."
+        )
+        uploaded = st.file_uploader("제출물 CSV", type=["csv"], key=f"{key}_bulk_upload")
+        if uploaded is None:
+            return
+        try:
+            submissions = pd.read_csv(uploaded, dtype=str)
+            matrix = grade_class(submissions[submissions["문제"].isin(problem_ids)] if "문제" in submissions else submissions)
+        except (ValueError, pd.errors.ParserError) as e:
+            st.error(f"채점 파일을 읽지 못했습니다: {e}")
+            return
+        if matrix.empty:
+            st.info("채점할 제출물이 없습니다.")
+            return
+        st.dataframe(matrix, use_container_width=True)
+        st.download_button(
+            "📥 점수표 CSV 다운로드",
+            data=matrix.to_csv().encode("utf-8-sig"),
+            file_name="score_matrix.csv",
+            mime="text/csv",
+            key=f"{key}_bulk_download",
+        )
+
+
+def run_stats_panel(key):
+    # 교사용: 문제별 실행 비용(오래 걸린 문제부터)과 결과·컴파일 캐시 적중 현황. 수업 중 서버 부담을 확인할 때 씁니다.
+    if not teacher_password():
+        return
+    with st.expander("👩‍🏫 교사용: 코드 실행 통계"):
+        if not teacher_unlocked(f"{key}_stats"):
+            return
+        rows = run_stats()
+        if rows:
+            table = pd.DataFrame(rows).rename(columns={
+                "label": "문제", "runs": "실행 수", "errors": "오류 수",
+                "wall_ms": "총 실행 시간(ms)", "max_wall_ms": "최대 실행 시간(ms)", "steps": "반복·호출 수",
+            })
+            st.dataframe(table.round(1), use_container_width=True, hide_index=True)
+        else:
+            st.info("아직 실행 기록이 없습니다.")
+        caches = pd.DataFrame(
+            [{"캐시": "실행 결과", **result_cache_stats()}, {"캐시": "컴파일", **compile_cache_stats()}]
+        ).rename(columns={"hits": "적중", "misses": "실패", "size": "보관 수"})
+        st.dataframe(caches, use_container_width=True, hide_index=True)
@@ -0,0 +1,138 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from code_sandbox import RUNNING_TEXT, SANDBOX_WORKERS, WORKER_CRASH_TEXT, OutputTail, run_code
+
+
+# ==========================================
+# 0. 백그라운드 실행 설정
+# ==========================================
+# 작업 스레드는 워커 프로세스의 응답만 기다리므로 워커 수보다 넉넉하게 둡니다.
+JOB_THREADS = max(SANDBOX_WORKERS, 2) * 2
+JOB_TTL = 600            # 끝난 작업 결과를 찾아가지 않으면 이 시간(초) 뒤에 지웁니다.
+POLL_INTERVAL = 0.5      # 실행 중인 작업 상태를 다시 확인하는 간격(초)
+
+_fragment = getattr(st, "fragment", None) or st.experimental_fragment
+
+
+# ==========================================
+# 1. 작업 목록 (작업 ID -> 진행 상황)
+# ==========================================
+_JOBS = {}
+_JOBS_LOCK = threading.Lock()
+_EXECUTOR = None
+
+
+def _executor():
+    global _EXECUTOR
+    with _JOBS_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=JOB_THREADS, thread_name_prefix="code-job")
+        return _EXECUTOR
+
+
+def _purge_expired(now):
+    expired = [
+        job_id for job_id, job in _JOBS.items()
+        if job["finished_at"] is not None and now - job["finished_at"] > JOB_TTL
+    ]
+    for job_id in expired:
+        del _JOBS[job_id]
+
+
+def submit_job(code, profile="free", label=None):
+    job = {"tail": OutputTail(), "cancel": threading.Event(), "future": None, "finished_at": None}
+
+    def work():
+        try:
+            return run_code(code, profile=profile, on_output=job["tail"], label=label, cancel=job["cancel"])
+        finally:
+            job["finished_at"] = time.monotonic()
+
+    job["future"] = _executor().submit(work)
+    job_id = uuid.uuid4().hex
+    with _JOBS_LOCK:
+        _purge_expired(time.monotonic())
+        _JOBS[job_id] = job
+    return job_id
+
+
+def job_status(job_id):
+    # 모르는 작업이면 None, 아니면 끝났는지와 지금까지의 출력(끝났으면 결과)을 돌려줍니다.
+    with _JOBS_LOCK:
+        job = _JOBS.get(job_id)
+    if job is None:
+        return None
+    future = job["future"]
+    if not future.done():
+        return {"done": False, "tail": job["tail"].text(), "reply": None}
+    try:
+        reply = future.result()
+    except Exception:
+        reply = {"output": WORKER_CRASH_TEXT, "status": "error", "figure": None, "metrics": None}
+    return {"done": True, "tail": job["tail"].text(), "reply": reply}
+
+
+def forget_job(job_id):
+    with _JOBS_LOCK:
+        _JOBS.pop(job_id, None)
+
+
+def cancel_job(job_id):
+    # 아직 시작하지 않은 작업은 대기열에서 빼고, 실행 중이면 워커를 멈추게 한 뒤 목록에서 지웁니다.
+    with _JOBS_LOCK:
+        job = _JOBS.pop(job_id, None)
+    if job is not None:
+        job["cancel"].set()
+        job["future"].cancel()
+
+
+# ==========================================
+# 2. 화면 연결 (session_state 에 작업 ID 저장 + fragment 로 확인)
+# ==========================================
+def submit_run(key, code, profile="free", label=None):
+    # 실행 버튼을 누르면 작업만 맡기고 바로 돌아옵니다. 그동안 학생은 코드를 계속 고칠 수 있습니다.
+    # 같은 자리에서 다시 누르면 이전 작업은 멈추고 새 작업으로 바꿉니다. (워커를 붙잡고 있지 않도록)
+    previous = st.session_state.get(f"{key}_job")
+    if previous is not None:
+        cancel_job(previous)
+    st.session_state[f"{key}_job"] = submit_job(code, profile=profile, label=label)
+
+
+def _finish(key, job_id, state, on_done):
+    st.session_state.pop(f"{key}_job", None)
+    if state is not None:
+        forget_job(job_id)
+        on_done(state["reply"])
+
+
+@_fragment(run_every=POLL_INTERVAL)
+def _poll_fragment(key, on_done):
+    # 이 부분만 주기적으로 다시 그려지며, 작업이 끝나면 결과를 저장하고 전체 화면을 한 번 새로 그립니다.
+    job_id = st.session_state.get(f"{key}_job")
+    state = job_status(job_id) if job_id else None
+    if state is None or state["done"]:
+        _finish(key, job_id, state, on_done)
+        st.rerun()
+    if state["tail"]:
+        st.code(state["tail"], language="bash")
+    else:
+        st.info(RUNNING_TEXT)
+
+
+def poll_run(key, on_done):
+    # 실행 중인 작업이 있으면 진행 상황을 보여 주고 True 를 돌려줍니다.
+    # 이미 끝났다면 on_done(reply) 로 결과를 넘긴 뒤 False 를 돌려주므로, 이어서 결과를 그리면 됩니다.
+    job_id = st.session_state.get(f"{key}_job")
+    if job_id is None:
+        return False
+    state = job_status(job_id)
+    if state is None or state["done"]:
+        _finish(key, job_id, state, on_done)
+        return False
+    _poll_fragment(key, on_done)
+    return True
@@ -0,0 +1,922 @@
+import builtins
+import contextlib
+import contextvars
+import functools
+import io
+import math
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+import types
+from collections import OrderedDict, deque
+
+try:
+    import resource
+except ImportError:  # Windows 등 rlimit을 지원하지 않는 환경
+    resource = None
+
+from code_validator import COMPILE_FILENAME, STEP_COUNTER_NAME, SYMPY_ALLOWED_MODULES, compile_submission, load_bytecode
+from process_utils import SharedPool, detached_main, get_logger, mp_context, stop_process
+
+
+# ==========================================
+# 0. 실행 환경 설정 (환경 변수로 조정)
+# ==========================================
+SANDBOX_WORKERS = int(os.environ.get("SANDBOX_WORKERS", min(os.cpu_count() or 2, 8)))
+SANDBOX_TIMEOUT = float(os.environ.get("SANDBOX_TIMEOUT", "5"))
+SANDBOX_QUEUE_TIMEOUT = float(os.environ.get("SANDBOX_QUEUE_TIMEOUT", "30"))
+SANDBOX_CPU_SECONDS = int(os.environ.get("SANDBOX_CPU_SECONDS", "5"))
+SANDBOX_MEMORY_MB = int(os.environ.get("SANDBOX_MEMORY_MB", "512"))
+SANDBOX_MAX_TASKS = int(os.environ.get("SANDBOX_MAX_TASKS", "50"))
+RESULT_CACHE_SIZE = int(os.environ.get("SANDBOX_RESULT_CACHE_SIZE", "512"))
+RESULT_CACHE_MAX_BYTES = 256 * 1024
+MAX_OUTPUT_LINES = int(os.environ.get("SANDBOX_MAX_OUTPUT_LINES", "2000"))
+MAX_LINE_CHARS = 2000
+STREAM_CHUNK_LINES = 200
+CANCEL_POLL_INTERVAL = 0.2      # 실행 중 취소 요청을 확인하는 간격(초)
+STREAM_INTERVAL = 0.2
+# 학생 코드의 실행량(반복 한 바퀴 + 함수 호출 + 컴프리헨션 원소 수) 상한 (0 이면 제한 없음)
+# 시계와 달리 항상 같은 지점에서 멈춥니다. 단순 반복 약 2초 분량이라 대부분 CPU 시간 제한보다 먼저 걸립니다.
+SANDBOX_STEP_BUDGET = int(os.environ.get("SANDBOX_STEP_BUDGET", "10000000"))
+# 실행한 줄 수와 바이트코드 수까지 세는 분석 모드 (줄마다 추적해 몇 배 느려지므로 필요할 때만 켭니다)
+SANDBOX_COUNT_OPCODES = os.environ.get("SANDBOX_COUNT_OPCODES", "0") == "1"
+# 같은 식을 반복해서 계산하는 SymPy 실습을 위해 결과를 기억해 둘 함수와 개수
+SYMPY_CACHED_FUNCTIONS = ("expand", "factor", "solve")
+SYMPY_CACHE_SIZE = int(os.environ.get("SANDBOX_SYMPY_CACHE_SIZE", "256"))
+
+NO_OUTPUT_TEXT = "출력된 내용이 없습니다."
+TIMEOUT_TEXT = "⏰ 실행 시간 초과: {seconds:g}초 안에 끝나지 않아 실행을 중단했습니다. 무한 반복(while True 등)이 없는지 확인해 보세요."
+CPU_LIMIT_TEXT = "⏰ 계산 시간 초과: CPU 사용 시간이 {seconds}초를 넘어 실행을 중단했습니다."
+MEMORY_LIMIT_TEXT = "💾 메모리 초과: 너무 큰 자료를 만들어 실행을 중단했습니다."
+BUSY_TEXT = "⌛ 지금 실행 요청이 많습니다. 잠시 후 다시 실행해 주세요."
+WORKER_CRASH_TEXT = "❌ 실행 환경이 비정상 종료되었습니다. 다시 실행해 주세요."
+STEP_BUDGET_TEXT = "🔁 실행량 초과: 반복과 함수 호출이 {budget:,}번을 넘어 중단했습니다. 반복 횟수를 줄이거나 끝나지 않는 반복이 없는지 확인해 보세요."
+TRUNCATED_TEXT = "... (출력이 너무 많아 앞부분 {count}줄을 생략했습니다)"
+RUNNING_TEXT = "⏳ 실행 중..."
+CANCELLED_TEXT = "⏹ 다시 실행해서 이전 실행을 멈췄습니다."
+
+logger = get_logger("code_sandbox", "SANDBOX_LOG_LEVEL")
+
+font_path = os.path.join(os.path.dirname(__file__), "font", "NanumGothic.ttf")
+
+
+class _CpuLimitExceeded(BaseException):
+    # 학생 코드의 except Exception 으로 잡히지 않도록 BaseException 을 상속합니다.
+    pass
+
+
+class _StepBudgetExceeded(BaseException):
+    pass
+
+
+# ==========================================
+# 1. 실행별 출력 캡처 (contextvar 로 경로를 나누는 stdout 프록시)
+# ==========================================
+_CAPTURE_TARGET = contextvars.ContextVar("code_sandbox_capture_target", default=None)
+_ROUTER_LOCK = threading.Lock()
+
+
+class _RoutedStdout(io.TextIOBase):
+    # sys.stdout 을 한 번만 이 프록시로 바꿔 두고, 실행마다 현재 컨텍스트의 버퍼로만 출력을 보냅니다.
+    # 캡처 중이 아닌 출력(서버 로그 등)은 원래 stdout 으로 그대로 나갑니다.
+    def __init__(self, fallback):
+        super().__init__()
+        self._fallback = fallback
+
+    def _target(self):
+        target = _CAPTURE_TARGET.get()
+        return self._fallback if target is None else target
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def writelines(self, lines):
+        self._target().writelines(lines)
+
+    def flush(self):
+        target = self._target()
+        if target is not None:
+            target.flush()
+
+    def writable(self):
+        return True
+
+    @property
+    def encoding(self):
+        return getattr(self._fallback, "encoding", "utf-8")
+
+    def isatty(self):
+        return _CAPTURE_TARGET.get() is None and bool(getattr(self._fallback, "isatty", lambda: False)())
+
+    def fileno(self):
+        return self._fallback.fileno()
+
+
+def install_stdout_router():
+    with _ROUTER_LOCK:
+        if not isinstance(sys.stdout, _RoutedStdout):
+            sys.stdout = _RoutedStdout(sys.stdout)
+    return sys.stdout
+
+
+@contextlib.contextmanager
+def capture_output(buffer):
+    install_stdout_router()
+    token = _CAPTURE_TARGET.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _CAPTURE_TARGET.reset(token)
+
+
+class _OutputRing(io.TextIOBase):
+    # 출력은 최근 max_lines 줄만 보관하고(한 줄도 max_line_chars 까지만), 넘친 줄 수를 셉니다.
+    # on_chunk 가 있으면 실행 도중에도 새로 찍힌 줄을 interval 초 간격으로 묶어서 내보냅니다.
+    def __init__(self, max_lines=MAX_OUTPUT_LINES, max_line_chars=MAX_LINE_CHARS,
+                 on_chunk=None, chunk_lines=STREAM_CHUNK_LINES, interval=STREAM_INTERVAL):
+        super().__init__()
+        self._lines = deque(maxlen=max_lines)
+        self._max_line_chars = max_line_chars
+        self._partial = []
+        self._partial_len = 0
+        self.dropped = 0
+        self._on_chunk = on_chunk
+        self._pending = deque(maxlen=chunk_lines)
+        self._skipped = 0
+        self._interval = interval
+        self._last_flush = 0.0
+
+    def write(self, text):
+        if not text:
+            return 0
+        pieces = text.split("\n")
+        for piece in pieces[:-1]:
+            self._extend_line(piece)
+            self._end_line()
+        self._extend_line(pieces[-1])
+        if self._on_chunk is not None and time.monotonic() - self._last_flush >= self._interval:
+            self.flush_chunk()
+        return len(text)
+
+    def writable(self):
+        return True
+
+    def _extend_line(self, piece):
+        room = self._max_line_chars - self._partial_len
+        if piece and room > 0:
+            piece = piece[:room]
+            self._partial.append(piece)
+            self._partial_len += len(piece)
+
+    def _end_line(self):
+        line = "".join(self._partial)
+        self._partial = []
+        self._partial_len = 0
+        if len(self._lines) == self._lines.maxlen:
+            self.dropped += 1
+        self._lines.append(line)
+        if self._on_chunk is not None:
+            # 화면으로 보낼 줄도 최근 chunk_lines 줄까지만 들고 있다가 한 번에 보냅니다.
+            if len(self._pending) == self._pending.maxlen:
+                self._skipped += 1
+            self._pending.append(line)
+
+    def flush_chunk(self, final=False):
+        self._last_flush = time.monotonic()
+        lines = list(self._pending)
+        if final and self._partial:
+            lines.append("".join(self._partial))
+        if not lines:
+            return
+        self._on_chunk("\n".join(lines) + "\n", self._skipped)
+        self._pending.clear()
+        self._skipped = 0
+
+    def getvalue(self):
+        text = "\n".join(self._lines)
+        if self._lines:
+            text += "\n"
+        text += "".join(self._partial)
+        if self.dropped and text:
+            text = TRUNCATED_TEXT.format(count=self.dropped) + "\n" + text
+        return text
+
+
+class OutputTail:
+    # 실행 도중 받은 출력 조각을 최근 max_lines 줄만 모아 둡니다. (실행 스레드와 화면 스레드가 함께 씁니다)
+    def __init__(self, max_lines=STREAM_CHUNK_LINES):
+        self._lines = deque(maxlen=max_lines)
+        self._hidden = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, text, skipped=0):
+        with self._lock:
+            self._hidden += skipped
+            for line in text.splitlines():
+                if len(self._lines) == self._lines.maxlen:
+                    self._hidden += 1
+                self._lines.append(line)
+
+    def text(self):
+        with self._lock:
+            body = "\n".join(self._lines)
+            if self._hidden:
+                body = TRUNCATED_TEXT.format(count=self._hidden) + "\n" + body
+        return body
+
+
+class _StepCounter:
+    # 컴파일할 때 넣어 둔 __step__() 가 부르는 계수기입니다. (code_validator.instrument_steps)
+    def __init__(self, budget=SANDBOX_STEP_BUDGET):
+        self.steps = 0
+        self.budget = budget
+
+    def tick(self):
+        self.steps += 1
+        if self.budget and self.steps > self.budget:
+            raise _StepBudgetExceeded()
+        return True
+
+
+class _RunTracer:
+    # 분석 모드(SANDBOX_COUNT_OPCODES)에서만 씁니다. 학생 코드(<string>) 프레임에서만 실행한 줄과 바이트코드를 세고,
+    # sympy/numpy 같은 라이브러리 내부 프레임은 추적하지 않아 부담을 줄입니다.
+    def __init__(self):
+        self.lines = 0
+        self.opcodes = 0
+
+    def __call__(self, frame, event, arg):
+        if frame.f_code.co_filename != COMPILE_FILENAME:
+            return None
+        frame.f_trace_opcodes = True
+        return self._trace_student
+
+    def _trace_student(self, frame, event, arg):
+        if event == "line":
+            self.lines += 1
+        elif event == "opcode":
+            self.opcodes += 1
+        return self._trace_student
+
+
+def _reset_peak_memory():
+    # 리눅스에서는 clear_refs 에 5를 쓰면 VmHWM(최대 상주 메모리)이 현재 값으로 초기화됩니다.
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_memory_kb():
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return None
+
+
+def format_metrics(metrics):
+    # 실행 결과 아래에 보여 줄 한 줄 요약을 만듭니다.
+    if not metrics:
+        return ""
+    parts = [f"⏱️ 실행 {metrics['wall_ms'] / 1000:.2f}초"]
+    if metrics.get("cpu_ms") is not None:
+        parts.append(f"CPU {metrics['cpu_ms'] / 1000:.2f}초")
+    if metrics.get("peak_kb"):
+        parts.append(f"최대 메모리 {metrics['peak_kb'] / 1024:.1f}MB")
+    if metrics.get("steps") is not None:
+        parts.append(f"반복·호출 {metrics['steps']:,}번")
+    if metrics.get("lines"):
+        parts.append(f"실행한 줄 {metrics['lines']:,}개")
+    if metrics.get("opcodes"):
+        parts.append(f"바이트코드 {metrics['opcodes']:,}개")
+    if metrics.get("cached"):
+        parts.append("저장된 결과")
+    return " · ".join(parts)
+
+
+# ==========================================
+# 2. 워커 프로세스: 수업별 실행 환경(profile) 틀과 실행
+# ==========================================
+_RUN_FIGURES = contextvars.ContextVar("code_sandbox_run_figures", default=None)
+
+
+_MISSING = object()
+_SYMPY_CACHE_LOCK = threading.Lock()
+
+
+def _fresh(result):
+    # solve 는 list/dict 를 돌려주므로 학생 코드가 고쳐도 캐시가 오염되지 않게 새로 감싸서 줍니다.
+    if isinstance(result, list):
+        return [dict(item) if isinstance(item, dict) else item for item in result]
+    if isinstance(result, dict):
+        return dict(result)
+    return result
+
+
+def _sympy_memo(func, srepr):
+    cache = OrderedDict()
+
+    @functools.wraps(func)
+    def cached(*args, **kwargs):
+        # srepr 은 Integer(2) 와 Float(2.0) 처럼 == 로는 같은 값도 구분하므로 캐시 키로 씁니다.
+        try:
+            key = srepr((args, sorted(kwargs.items())))
+        except Exception:
+            return func(*args, **kwargs)
+        with _SYMPY_CACHE_LOCK:
+            result = cache.get(key, _MISSING)
+            if result is not _MISSING:
+                cache.move_to_end(key)
+        if result is _MISSING:
+            result = func(*args, **kwargs)
+            with _SYMPY_CACHE_LOCK:
+                cache[key] = result
+                while len(cache) > SYMPY_CACHE_SIZE:
+                    cache.popitem(last=False)
+        return _fresh(result)
+
+    return cached
+
+
+class _CachedSympy(types.ModuleType):
+    # expand/factor/solve 만 식 캐시를 거치고, 나머지 이름은 진짜 sympy 모듈에서 그대로 가져옵니다.
+    def __init__(self, module):
+        super().__init__(module.__name__, module.__doc__)
+        self._module = module
+        for name in SYMPY_CACHED_FUNCTIONS:
+            setattr(self, name, _sympy_memo(getattr(module, name), module.srepr))
+
+    def __getattr__(self, name):
+        return getattr(self._module, name)
+
+
+_SYMPY_PROXY = None
+
+
+def _cached_sympy():
+    global _SYMPY_PROXY
+    if _SYMPY_PROXY is None:
+        import sympy
+        import sympy.abc  # noqa: F401  (from sympy.abc import x 가 바로 끝나도록 미리 읽어 둡니다)
+        _SYMPY_PROXY = _CachedSympy(sympy)
+    return _SYMPY_PROXY
+
+
+def _whitelist_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # AST 검사를 통과한 import 만 여기까지 오지만, 실행 중에도 한 번 더 막아 둡니다.
+    base_name = name.split('.')[0]
+    if base_name in SYMPY_ALLOWED_MODULES:
+        module = builtins.__import__(name, globals, locals, fromlist, level)
+        # import sympy / from sympy import factor 는 식 캐시가 붙은 sympy 를 돌려줍니다.
+        if base_name == "sympy" and (name == "sympy" or not fromlist):
+            return _cached_sympy()
+        return module
+    raise ImportError(f"🚨 보안 경고: '{name}' 모듈은 이 실습에서 임포트할 수 없습니다.")
+
+
+_FONT_READY = False
+
+
+def _configure_matplotlib_font():
+    global _FONT_READY
+    if _FONT_READY:
+        return
+    _FONT_READY = True
+    try:
+        import matplotlib as mpl
+        import matplotlib.font_manager as fm
+        fm.fontManager.addfont(font_path)
+        mpl.rc('font', family=fm.FontProperties(fname=font_path).get_name())
+        mpl.rc('axes', unicode_minus=False)
+    except Exception:
+        pass
+
+
+def draw_graph(a, b, c):
+    import numpy as np
+    from matplotlib.figure import Figure
+
+    # 💡 동시 접속 방어를 위해 plt 상태 머신 대신 객체(Figure)를 직접 생성합니다.
+    fig = Figure(figsize=(6, 4))
+    ax = fig.subplots()
+    x = np.linspace(-10, 10, 400)
+    y = a*x**2 + b*x + c
+    ax.plot(x, y, label=f'y = {a}x^2 + {b}x + {c}', color='#1976d2', linewidth=2)
+    ax.axhline(0, color='#d32f2f', linewidth=2, label='x-axis (y=0)')
+    ax.axvline(0, color='black', linewidth=1)
+    ax.grid(True, linestyle='--', alpha=0.6)
+    ax.legend()
+    ax.set_ylim(-15, 20)
+    figures = _RUN_FIGURES.get()
+    if figures is not None:
+        figures[:] = [fig]
+
+
+def _free_template():
+    return {}
+
+
+def _sympy_whitelist_template():
+    safe_builtins = {
+        'print': builtins.print,
+        '__import__': _whitelist_import,
+        'range': range, 'len': len, 'int': int, 'float': float, 'str': str,
+        'bool': bool, 'list': list, 'dict': dict, 'set': set, 'tuple': tuple,
+        'sum': sum, 'min': min, 'max': max, 'abs': abs, 'round': round,
+        'enumerate': enumerate, 'zip': zip, 'type': type,
+        'Exception': Exception, 'ValueError': ValueError, 'TypeError': TypeError,
+        '__build_class__': builtins.__build_class__,
+    }
+    try:
+        sp = _cached_sympy()
+    except ImportError:
+        sp = None
+    return {
+        '__builtins__': safe_builtins,
+        'sp': sp,
+        'sympy': sp,
+    }
+
+
+def _graphing_template():
+    _configure_matplotlib_font()
+    return {
+        '__builtins__': builtins.__dict__.copy(),
+        'draw_graph': draw_graph,
+    }
+
+
+PROFILE_BUILDERS = {
+    "free": _free_template,
+    "sympy-whitelist": _sympy_whitelist_template,
+    "graphing": _graphing_template,
+}
+
+_PROFILE_TEMPLATES = {}
+_TEMPLATE_LOCK = threading.Lock()
+
+
+def profile_template(profile):
+    # profile 별 전역 변수 틀은 프로세스마다 한 번만 만들고, 읽기 전용(MappingProxyType)으로 보관합니다.
+    template = _PROFILE_TEMPLATES.get(profile)
+    if template is None:
+        with _TEMPLATE_LOCK:
+            template = _PROFILE_TEMPLATES.get(profile)
+            if template is None:
+                built = PROFILE_BUILDERS[profile]()
+                if '__builtins__' in built:
+                    built['__builtins__'] = types.MappingProxyType(built['__builtins__'])
+                template = types.MappingProxyType(built)
+                _PROFILE_TEMPLATES[profile] = template
+    return template
+
+
+def new_globals(profile):
+    # 실행마다 틀을 얕게 복사합니다. 학생 코드가 전역 변수나 __builtins__ 를 바꿔도 다음 실행에는 남지 않습니다.
+    exec_globals = dict(profile_template(profile))
+    if '__builtins__' in exec_globals:
+        exec_globals['__builtins__'] = dict(exec_globals['__builtins__'])
+    return exec_globals
+
+
+def _figure_to_png(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=150, bbox_inches="tight")
+    return buffer.getvalue()
+
+
+def _set_cpu_budget(seconds):
+    if resource is None:
+        return
+    used = resource.getrusage(resource.RUSAGE_SELF)
+    spent = int(used.ru_utime + used.ru_stime)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = spent + int(seconds) if seconds else hard
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _on_cpu_limit(signum, frame):
+    raise _CpuLimitExceeded()
+
+
+def execute_job(job, enforce_limits=False, on_chunk=None):
+    profile = job.get("profile", "free")
+    output_buffer = _OutputRing(on_chunk=on_chunk)
+    figures = []
+    recycle = False
+    cacheable = False
+    cases = job.get("cases")
+    case_results = None
+    counter = _StepCounter(job.get("step_budget", SANDBOX_STEP_BUDGET))
+    tracer = _RunTracer() if SANDBOX_COUNT_OPCODES else None
+    # 공용 프로세스(워커 풀 없이 실행)에서는 최대 메모리를 실행 단위로 나눌 수 없어 재지 않습니다.
+    measure_memory = enforce_limits and _reset_peak_memory()
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        code = load_bytecode(job["bytecode"])
+        exec_globals = new_globals(profile)
+        exec_globals[STEP_COUNTER_NAME] = counter.tick
+        if enforce_limits:
+            _set_cpu_budget(job.get("cpu_seconds", SANDBOX_CPU_SECONDS))
+        figures_token = _RUN_FIGURES.set(figures)
+        try:
+            with capture_output(output_buffer):
+                if tracer is not None:
+                    sys.settrace(tracer)
+                try:
+                    exec(code, exec_globals)
+                    if cases is not None:
+                        case_results = check_cases(cases, exec_globals, output_buffer.getvalue())
+                finally:
+                    if tracer is not None:
+                        sys.settrace(None)
+        finally:
+            _RUN_FIGURES.reset(figures_token)
+        result = output_buffer.getvalue() or NO_OUTPUT_TEXT
+        status = "success"
+        cacheable = True
+    except _StepBudgetExceeded:
+        result = STEP_BUDGET_TEXT.format(budget=counter.budget)
+        status = "error"
+        cacheable = True
+    except _CpuLimitExceeded:
+        result = CPU_LIMIT_TEXT.format(seconds=job.get("cpu_seconds", SANDBOX_CPU_SECONDS))
+        status = "error"
+    except MemoryError:
+        result = MEMORY_LIMIT_TEXT
+        status = "error"
+        recycle = True
+    except Exception as e:
+        result = f"{e.__class__.__name__}: {e}"
+        status = "error"
+        cacheable = True
+    finally:
+        if enforce_limits:
+            _set_cpu_budget(None)
+        if on_chunk is not None:
+            try:
+                output_buffer.flush_chunk(final=True)
+            except Exception:
+                pass
+    if cases is not None and case_results is None:
+        case_results = failed_cases(cases, result)
+    metrics = {
+        "wall_ms": (time.perf_counter() - wall_start) * 1000,
+        "cpu_ms": (time.thread_time() - cpu_start) * 1000,
+        "peak_kb": _peak_memory_kb() if measure_memory else None,
+        "steps": counter.steps,
+        "lines": tracer.lines if tracer is not None else None,
+        "opcodes": tracer.opcodes if tracer is not None else None,
+    }
+
+    figure_png = None
+    if figures:
+        try:
+            figure_png = _figure_to_png(figures[-1])
+        except Exception:
+            figure_png = None
+    reply = {"output": result, "status": status, "figure": figure_png, "metrics": metrics,
+             "recycle": recycle, "cacheable": cacheable}
+    if cases is not None:
+        reply["cases"] = case_results
+    return reply
+
+
+def _same_value(actual, expected):
+    # 숫자는 부동소수점 오차를 허용하고, 문자열로 적은 기댓값은 공백을 무시하고 문자열로 비교합니다.
+    if isinstance(expected, (list, tuple)):
+        try:
+            actual = list(actual)
+        except TypeError:
+            return False
+        return len(actual) == len(expected) and all(_same_value(a, e) for a, e in zip(actual, expected))
+    if isinstance(expected, bool) or isinstance(actual, bool):
+        return actual == expected
+    if isinstance(expected, (int, float)):
+        try:
+            return math.isclose(float(actual), expected, rel_tol=1e-9, abs_tol=1e-9)
+        except (TypeError, ValueError):
+            return False
+    if isinstance(expected, str):
+        return " ".join(str(actual).split()) == " ".join(expected.split())
+    return actual == expected
+
+
+def _output_lines(output):
+    return {" ".join(line.split()) for line in output.splitlines()}
+
+
+def check_cases(cases, exec_globals, output):
+    # 한 번 실행한 결과(전역 변수, 출력)로 채점 표의 모든 경우를 차례로 확인합니다.
+    #   {"expr": "f(-2)", "expected": 13}  -> 식을 학생 코드의 전역 변수로 계산해 비교
+    #   {"stdout": "8"}                     -> 출력 중 한 줄이 정확히 같은지 확인
+    results = []
+    lines = _output_lines(output)
+    for case in cases:
+        try:
+            if "expr" in case:
+                actual = eval(compile(case["expr"], "<case>", "eval"), exec_globals)
+                passed = _same_value(actual, case["expected"])
+                actual = repr(actual)
+            else:
+                passed = " ".join(case["stdout"].split()) in lines
+                actual = output.strip()
+        except Exception as e:
+            passed = False
+            actual = f"{e.__class__.__name__}: {e}"
+        results.append({"name": case["name"], "passed": bool(passed), "actual": actual[:200]})
+    return results
+
+
+def failed_cases(cases, reason):
+    return [{"name": case["name"], "passed": False, "actual": reason[:200]} for case in cases]
+
+
+def _apply_worker_limits(limits):
+    # 워커 한 개가 쓸 수 있는 CPU/메모리 상한을 시작할 때 고정합니다.
+    if resource is None:
+        return
+    signal.signal(signal.SIGXCPU, _on_cpu_limit)
+    used = resource.getrusage(resource.RUSAGE_SELF)
+    spent = int(used.ru_utime + used.ru_stime)
+    cpu_hard = spent + (limits["cpu_seconds"] + 1) * (limits["max_tasks"] + 1)
+    try:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_hard, cpu_hard))
+    except (ValueError, OSError):
+        pass
+    if limits["memory_mb"] > 0:
+        try:
+            with open("/proc/self/statm") as statm:
+                current = int(statm.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            current = 0
+        memory_cap = current + limits["memory_mb"] * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (memory_cap, memory_cap))
+        except (ValueError, OSError):
+            pass
+
+
+def _worker_main(conn, limits):
+    _apply_worker_limits(limits)
+    install_stdout_router()
+    # 첫 실행이 느려지지 않도록 모든 profile 틀을 미리 만들어 둡니다.
+    for profile in PROFILE_BUILDERS:
+        try:
+            profile_template(profile)
+        except Exception:
+            pass
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+        on_chunk = None
+        if job.get("stream"):
+            def on_chunk(text, skipped):
+                conn.send(("chunk", text, skipped))
+        reply = execute_job(job, enforce_limits=True, on_chunk=on_chunk)
+        try:
+            conn.send(reply)
+        except (BrokenPipeError, OSError):
+            break
+        if reply.get("recycle"):
+            break
+    conn.close()
+
+
+# ==========================================
+# 3. 메인 프로세스: 미리 띄워 둔 워커 풀
+# ==========================================
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.tasks = 0
+
+    def stop(self, force=False):
+        stop_process(self.process, self.conn, force)
+
+
+class SandboxPool:
+    def __init__(
+        self,
+        workers=SANDBOX_WORKERS,
+        timeout=SANDBOX_TIMEOUT,
+        cpu_seconds=SANDBOX_CPU_SECONDS,
+        memory_mb=SANDBOX_MEMORY_MB,
+        max_tasks=SANDBOX_MAX_TASKS,
+        queue_timeout=SANDBOX_QUEUE_TIMEOUT,
+    ):
+        self.size = max(int(workers), 1)
+        self.timeout = float(timeout)
+        self.queue_timeout = float(queue_timeout)
+        self.limits = {
+            "cpu_seconds": int(cpu_seconds),
+            "memory_mb": int(memory_mb),
+            "max_tasks": int(max_tasks),
+        }
+        self._ctx = mp_context()
+        self._idle = queue.Queue()
+        self._workers = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(target=_worker_main, args=(child_conn, self.limits), daemon=True)
+        with detached_main():
+            process.start()
+        child_conn.close()
+        worker = _Worker(process, parent_conn)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _retire(self, worker, force=False):
+        with self._lock:
+            self._workers.discard(worker)
+        worker.stop(force=force)
+        if not self._closed:
+            self._idle.put(self._spawn())
+
+    def run(self, job, on_output=None, cancel=None):
+        try:
+            worker = self._idle.get(timeout=self.queue_timeout)
+        except queue.Empty:
+            return {"output": BUSY_TEXT, "status": "error", "figure": None, "metrics": None}
+        if cancel is not None and cancel.is_set():
+            self._idle.put(worker)
+            return {"output": CANCELLED_TEXT, "status": "error", "figure": None, "metrics": None}
+
+        job = {**job, "cpu_seconds": self.limits["cpu_seconds"], "stream": on_output is not None}
+        deadline = time.monotonic() + self.timeout
+        try:
+            worker.conn.send(job)
+            while True:
+                if cancel is not None and cancel.is_set():
+                    # 같은 자리에서 다시 실행하면 이전 실행은 결과를 볼 사람이 없으므로 워커째 멈추고 교체합니다.
+                    self._retire(worker, force=True)
+                    return {"output": CANCELLED_TEXT, "status": "error", "figure": None, "metrics": None}
+                remaining = deadline - time.monotonic()
+                if remaining > 0 and not worker.conn.poll(min(remaining, CANCEL_POLL_INTERVAL)):
+                    continue
+                if remaining <= 0:
+                    # 무한 반복 등으로 응답이 없으면 워커를 강제로 종료하고 새 워커로 교체합니다.
+                    self._retire(worker, force=True)
+                    return {
+                        "output": TIMEOUT_TEXT.format(seconds=self.timeout), "status": "error", "figure": None,
+                        "metrics": {"wall_ms": self.timeout * 1000, "cpu_ms": None, "peak_kb": None, "steps": None},
+                    }
+                message = worker.conn.recv()
+                if isinstance(message, tuple) and message[0] == "chunk":
+                    # 실행 도중 찍힌 출력 조각은 화면 갱신용으로만 넘기고 계속 기다립니다.
+                    if on_output is not None:
+                        on_output(message[1], message[2])
+                    continue
+                reply = message
+                break
+        except (EOFError, BrokenPipeError, OSError):
+            self._retire(worker, force=True)
+            return {"output": WORKER_CRASH_TEXT, "status": "error", "figure": None, "metrics": None}
+
+        worker.tasks += 1
+        if reply.pop("recycle", False) or worker.tasks >= self.limits["max_tasks"]:
+            self._retire(worker)
+        else:
+            self._idle.put(worker)
+        return reply
+
+    def shutdown(self):
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
+
+
+_POOL = SharedPool(SandboxPool, logger, "워커 풀을 시작하지 못해 현재 프로세스에서 실행합니다: %s")
+
+
+def get_pool():
+    if SANDBOX_WORKERS <= 0:
+        return None
+    return _POOL.get()
+
+
+# ==========================================
+# 4. 결과 캐시 (결정적인 코드만, 정규화 AST 해시 + profile 기준)
+# ==========================================
+_RESULT_CACHE = OrderedDict()
+_RESULT_LOCK = threading.Lock()
+_RESULT_STATS = {"hits": 0, "misses": 0}
+
+
+def _cached_result(key):
+    with _RESULT_LOCK:
+        entry = _RESULT_CACHE.get(key)
+        if entry is None:
+            _RESULT_STATS["misses"] += 1
+            return None
+        _RESULT_CACHE.move_to_end(key)
+        _RESULT_STATS["hits"] += 1
+        reply = dict(entry)
+    if reply.get("metrics"):
+        reply["metrics"] = {**reply["metrics"], "cached": True}
+    return reply
+
+
+def _store_result(key, reply):
+    size = len(reply["output"]) + len(reply["figure"] or b"")
+    if size > RESULT_CACHE_MAX_BYTES:
+        return
+    with _RESULT_LOCK:
+        _RESULT_CACHE[key] = dict(reply)
+        _RESULT_CACHE.move_to_end(key)
+        while len(_RESULT_CACHE) > RESULT_CACHE_SIZE:
+            _RESULT_CACHE.popitem(last=False)
+
+
+def result_cache_stats():
+    with _RESULT_LOCK:
+        return {**_RESULT_STATS, "size": len(_RESULT_CACHE)}
+
+
+# ==========================================
+# 5. 실행 기록 (문제별 실행 비용 집계 + 서버 로그)
+# ==========================================
+_RUN_STATS = {}
+_RUN_STATS_LOCK = threading.Lock()
+
+
+def _record_run(label, profile, reply):
+    metrics = reply.get("metrics") or {}
+    logger.info(
+        "run label=%s profile=%s status=%s wall_ms=%.1f cpu_ms=%s peak_kb=%s steps=%s lines=%s opcodes=%s cached=%s",
+        label or "-", profile, reply["status"], metrics.get("wall_ms") or 0.0, metrics.get("cpu_ms"),
+        metrics.get("peak_kb"), metrics.get("steps"), metrics.get("lines"), metrics.get("opcodes"), bool(metrics.get("cached")),
+    )
+    if not metrics or metrics.get("cached"):
+        return
+    with _RUN_STATS_LOCK:
+        entry = _RUN_STATS.setdefault(label or "-", {"runs": 0, "errors": 0, "wall_ms": 0.0, "max_wall_ms": 0.0, "steps": 0})
+        entry["runs"] += 1
+        entry["errors"] += reply["status"] != "success"
+        entry["wall_ms"] += metrics["wall_ms"]
+        entry["max_wall_ms"] = max(entry["max_wall_ms"], metrics["wall_ms"])
+        entry["steps"] += metrics.get("steps") or 0
+
+
+def run_stats():
+    # 총 실행 시간이 큰 문제부터 정렬해 돌려줍니다. (수업 중 부담이 큰 문제 찾기용)
+    with _RUN_STATS_LOCK:
+        rows = [{"label": label, **entry} for label, entry in _RUN_STATS.items()]
+    return sorted(rows, key=lambda row: row["wall_ms"], reverse=True)
+
+
+def run_code(code, profile="free", on_output=None, label=None, cases=None, cancel=None):
+    # 문법 오류와 보안 규칙 위반은 워커를 쓰지 않고 바로 돌려줍니다.
+    compiled = compile_submission(code, profile)
+    if "error" in compiled:
+        return {"output": compiled["error"], "status": "error", "figure": None, "metrics": None}
+
+    # 채점 표(cases)가 다르면 같은 코드라도 다른 결과이므로 캐시 키에 함께 넣습니다.
+    cases_key = repr(cases) if cases is not None else None
+    cache_key = (compiled["result_key"], profile, cases_key) if compiled["deterministic"] else None
+    if cache_key is not None:
+        cached = _cached_result(cache_key)
+        if cached is not None:
+            _record_run(label, profile, cached)
+            return cached
+
+    job = {"bytecode": compiled["bytecode"], "profile": profile, "cases": cases}
+    pool = get_pool()
+    if pool is None:
+        reply = execute_job(job, on_chunk=on_output)
+        reply.pop("recycle", None)
+    else:
+        reply = pool.run(job, on_output=on_output, cancel=cancel)
+    # 시간 초과, 자원 초과, 대기열 초과처럼 상황에 따라 달라지는 결과는 저장하지 않습니다.
+    if reply.pop("cacheable", False) and cache_key is not None:
+        _store_result(cache_key, reply)
+    _record_run(label, profile, reply)
+    return reply
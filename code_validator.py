@@ -0,0 +1,219 @@
+import ast
+import hashlib
+import marshal
+import threading
+from collections import OrderedDict
+
+
+# ==========================================
+# 0. 수업별 검사 규칙 (profile 이름 -> 규칙)
+# ==========================================
+SYMPY_ALLOWED_MODULES = ('sympy', 'math', 'random')
+
+# 화이트리스트 환경에서 이름으로 부를 수 없는 내장 함수들
+BLOCKED_NAMES = frozenset({
+    '__import__', 'eval', 'exec', 'compile', 'open', 'input', 'breakpoint',
+    'globals', 'locals', 'vars', 'getattr', 'setattr', 'delattr', 'memoryview',
+})
+
+# 학생 코드에서 허용하는 던더(__x__) 이름
+ALLOWED_DUNDERS = frozenset({'__init__', '__name__', '__doc__', '__str__', '__repr__'})
+
+POLICIES = {
+    "free": None,
+    "graphing": None,
+    "sympy-whitelist": {
+        "allowed_modules": SYMPY_ALLOWED_MODULES,
+        "blocked_names": BLOCKED_NAMES,
+    },
+}
+
+# 결과가 실행할 때마다 달라질 수 있는 모듈과 이름 (결과 캐시 제외 대상)
+# (numpy.random 처럼 점으로 이어진 이름은 어느 한 부분이라도 여기에 있으면 제외)
+NONDETERMINISTIC_MODULES = frozenset({
+    'random', 'time', 'datetime', 'secrets', 'uuid', 'os', 'sys', 'threading', 'calendar',
+    'importlib', 'builtins',
+})
+NONDETERMINISTIC_NAMES = frozenset({
+    'input', 'id', 'hash', 'open', 'globals', 'locals', 'vars',
+    '__import__', 'eval', 'exec', 'compile', 'getattr',
+})
+# pd.Timestamp.now(), date.today(), time.time_ns() 처럼 지금 시각을 읽는 속성 이름
+NONDETERMINISTIC_ATTRS = frozenset({
+    'now', 'today', 'utcnow', 'time_ns', 'perf_counter', 'perf_counter_ns',
+    'monotonic', 'monotonic_ns', 'process_time', 'process_time_ns', 'getpid',
+})
+# np.datetime64("now"), pd.Timestamp("today") 처럼 날짜 생성자에 넘기면 지금 시각이 되는 문자열
+NONDETERMINISTIC_TIME_STRINGS = frozenset({'now', 'today'})
+
+# 컴파일할 때 반복문 한 바퀴, 함수 호출, 컴프리헨션 원소마다 부르도록 넣어 두는 실행량 계수기 이름 (실행 환경이 채워 넣음)
+STEP_COUNTER_NAME = "__step__"
+
+COMPILE_FILENAME = "<string>"
+COMPILE_CACHE_SIZE = 256
+
+SECURITY_WARNING_TEXT = "❌ 시스템 보안 경고: 허용되지 않은 키워드나 명령어 호출이 포함되어 있습니다."
+IMPORT_WARNING_TEXT = "ImportError: 🚨 보안 경고: '{name}' 모듈은 이 실습에서 임포트할 수 없습니다."
+
+
+# ==========================================
+# 1. AST 검사
+# ==========================================
+def _is_blocked_dunder(name):
+    return name.startswith('__') and name.endswith('__') and name not in ALLOWED_DUNDERS
+
+
+def find_violation(tree, policy):
+    # 규칙을 어긴 첫 번째 지점의 안내 문구를 돌려주고, 문제가 없으면 None 을 돌려줍니다.
+    if not policy:
+        return None
+    allowed_modules = policy["allowed_modules"]
+    blocked_names = policy["blocked_names"]
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.name.split('.')[0] not in allowed_modules:
+                    return IMPORT_WARNING_TEXT.format(name=alias.name)
+        elif isinstance(node, ast.ImportFrom):
+            module = node.module or ""
+            if node.level or module.split('.')[0] not in allowed_modules:
+                return IMPORT_WARNING_TEXT.format(name="." * node.level + module)
+        elif isinstance(node, ast.Name):
+            if node.id in blocked_names or _is_blocked_dunder(node.id):
+                return SECURITY_WARNING_TEXT
+        elif isinstance(node, ast.Attribute):
+            if _is_blocked_dunder(node.attr) or node.attr.startswith(('f_', 'gi_', 'cr_', 'tb_')):
+                return SECURITY_WARNING_TEXT
+    return None
+
+
+def _is_nondeterministic_module(name):
+    # numpy.random, numpy.random.default_rng 처럼 점으로 이어진 이름의 모든 앞부분과 각 부분을 확인합니다.
+    parts = name.split('.')
+    prefixes = ('.'.join(parts[:end]) for end in range(1, len(parts) + 1))
+    return any(part in NONDETERMINISTIC_MODULES for part in parts) or any(prefix in NONDETERMINISTIC_MODULES for prefix in prefixes)
+
+
+def is_deterministic(tree):
+    # 같은 코드라면 항상 같은 출력이 나오는지 정적으로 판단합니다. (애매하면 False)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            if any(_is_nondeterministic_module(alias.name) for alias in node.names):
+                return False
+        elif isinstance(node, ast.ImportFrom):
+            # 상대 import 는 무엇을 불러오는지 알 수 없으므로 제외하고, "모듈.이름" 조합도 함께 확인합니다.
+            module = node.module or ""
+            if node.level or _is_nondeterministic_module(module):
+                return False
+            if any(alias.name == '*' or _is_nondeterministic_module(f"{module}.{alias.name}") for alias in node.names):
+                return False
+        elif isinstance(node, ast.Name):
+            if node.id in NONDETERMINISTIC_NAMES or node.id in NONDETERMINISTIC_MODULES:
+                return False
+        elif isinstance(node, ast.Attribute):
+            if 'rand' in node.attr.lower() or node.attr in NONDETERMINISTIC_MODULES or node.attr in NONDETERMINISTIC_ATTRS:
+                return False
+        elif isinstance(node, ast.Call):
+            # print("now") 처럼 그냥 출력하는 문자열은 제외하고, 함수에 넘긴 "now"/"today" 를 확인합니다.
+            if isinstance(node.func, ast.Name) and node.func.id == 'print':
+                continue
+            values = list(node.args) + [keyword.value for keyword in node.keywords]
+            if any(
+                isinstance(value, ast.Constant) and isinstance(value.value, str)
+                and value.value.strip().lower() in NONDETERMINISTIC_TIME_STRINGS
+                for value in values
+            ):
+                return False
+    return True
+
+
+class _StepCounterInserter(ast.NodeTransformer):
+    # 반복문·함수 본문 맨 앞과 컴프리헨션 조건 맨 앞에 __step__() 호출을 넣습니다.
+    # 줄마다 추적(sys.settrace)하는 것보다 훨씬 가볍고, 같은 코드면 늘 같은 지점에서 멈춥니다.
+    def _counter_call(self, node):
+        return ast.copy_location(ast.Call(ast.Name(STEP_COUNTER_NAME, ast.Load()), [], []), node)
+
+    def _prepend(self, node):
+        self.generic_visit(node)
+        first = node.body[0]
+        # 함수 설명 문자열(docstring)은 그대로 첫 줄에 남겨 둡니다.
+        has_docstring = isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant) and isinstance(first.value.value, str)
+        node.body.insert(int(has_docstring), ast.copy_location(ast.Expr(self._counter_call(first)), first))
+        return node
+
+    visit_For = visit_AsyncFor = visit_While = visit_FunctionDef = visit_AsyncFunctionDef = _prepend
+
+    def visit_comprehension(self, node):
+        self.generic_visit(node)
+        node.ifs.insert(0, self._counter_call(node.iter))
+        return node
+
+
+def instrument_steps(tree):
+    return ast.fix_missing_locations(_StepCounterInserter().visit(tree))
+
+
+def normalized_hash(tree):
+    # 주석, 공백, 줄바꿈 차이를 지운 AST 구조로 해시를 만듭니다.
+    return hashlib.sha256(ast.dump(tree).encode("utf-8", "surrogatepass")).hexdigest()
+
+
+# ==========================================
+# 2. 컴파일 결과 캐시 (소스 해시 -> 바이트코드)
+# ==========================================
+_COMPILE_CACHE = OrderedDict()
+_COMPILE_LOCK = threading.Lock()
+_COMPILE_STATS = {"hits": 0, "misses": 0}
+
+
+def source_hash(source):
+    return hashlib.sha256(source.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def _compile(source, profile):
+    try:
+        tree = ast.parse(source, COMPILE_FILENAME, "exec")
+    except SyntaxError as e:
+        return {"error": f"{e.__class__.__name__}: {e}"}
+    violation = find_violation(tree, POLICIES.get(profile))
+    if violation:
+        return {"error": violation}
+    result_key = normalized_hash(tree)
+    deterministic = is_deterministic(tree)
+    try:
+        code_obj = compile(instrument_steps(tree), COMPILE_FILENAME, "exec")
+    except (SyntaxError, ValueError) as e:
+        return {"error": f"{e.__class__.__name__}: {e}"}
+    # 워커 프로세스로 보낼 수 있도록 marshal 바이트로 보관합니다.
+    return {
+        "bytecode": marshal.dumps(code_obj),
+        "result_key": result_key,
+        "deterministic": deterministic,
+    }
+
+
+def compile_submission(source, profile="free"):
+    key = (source_hash(source), profile)
+    with _COMPILE_LOCK:
+        entry = _COMPILE_CACHE.get(key)
+        if entry is not None:
+            _COMPILE_CACHE.move_to_end(key)
+            _COMPILE_STATS["hits"] += 1
+            return entry
+        _COMPILE_STATS["misses"] += 1
+    entry = _compile(source, profile)
+    with _COMPILE_LOCK:
+        _COMPILE_CACHE[key] = entry
+        _COMPILE_CACHE.move_to_end(key)
+        while len(_COMPILE_CACHE) > COMPILE_CACHE_SIZE:
+            _COMPILE_CACHE.popitem(last=False)
+    return entry
+
+
+def load_bytecode(bytecode):
+    return marshal.loads(bytecode)
+
+
+def compile_cache_stats():
+    with _COMPILE_LOCK:
+        return {**_COMPILE_STATS, "size": len(_COMPILE_CACHE)}
@@ -1,25 +1,32 @@
 import streamlit as st
 from streamlit_ace import st_ace
 import pandas as pd
-import io
-import sys
+from code_sandbox import format_metrics
+from code_jobs import poll_run, submit_run
+from code_grader import bulk_grading_panel, grade_submission, run_stats_panel
 
-def code_runner(code_input):
-    output_buffer = io.StringIO()
-    result, status = "", "success"
-    try:
-        sys.stdout = output_buffer
-        exec_globals = {}
-        exec(code_input, exec_globals)
-        result = output_buffer.getvalue() or "출력된 내용이 없습니다."
-    except Exception as e:
-        result = f"{e.__class__.__name__}: {e}"
-        status = "error"
-    finally:
-        sys.stdout = sys.__stdout__
-    return result, status
+def code_runner(key_prefix, code_input):
+    # 실행은 백그라운드 작업으로 맡기고, 끝나면 결과를 f"{key_prefix}_result" 에 저장합니다.
+    submit_run(key_prefix, code_input, profile="free", label=f"data0/{key_prefix}")
 
-def display_output(result, status):
+def save_result(key_prefix):
+    def on_done(reply):
+        st.session_state[f"{key_prefix}_result"] = (reply["output"], reply["status"], reply["metrics"])
+    return on_done
+
+def has_run(key_prefix):
+    return f"{key_prefix}_job" in st.session_state or f"{key_prefix}_result" in st.session_state
+
+def show_run(key_prefix, code_input, run):
+    # 실행 중이면 진행 상황을, 끝났으면 결과를 보여 주고 결과를 그렸는지 돌려줍니다.
+    if run:
+        code_runner(key_prefix, code_input)
+    if poll_run(key_prefix, save_result(key_prefix)) or f"{key_prefix}_result" not in st.session_state:
+        return False
+    display_output(*st.session_state[f"{key_prefix}_result"])
+    return True
+
+def display_output(result, status, metrics=None):
     if status == "success":
         st.markdown(f"```bash\n{result}\n```")
     else:
@@ -28,6 +35,8 @@ def display_output(result, status):
             f"<pre style='color: red; background-color: #ffe6e6; padding: 10px; border-radius: 5px;'>{result}</pre>",
             unsafe_allow_html=True
         )
+    if metrics:
+        st.caption(format_metrics(metrics))
 
 def code_block(problem_number, title, starter_code, prefix=""):
     key_prefix = f"{prefix}{problem_number}"
@@ -45,9 +54,8 @@ def code_block(problem_number, title, starter_code, prefix=""):
 
     with c2:
         st.markdown("##### 📤 실행 결과")
-        if st.button("▶️ 코드 실행하기", key=f"{key_prefix}_run"):
-            result, status = code_runner(code_input)
-            display_output(result, status)
+        run = st.button("▶️ 코드 실행하기", key=f"{key_prefix}_run")
+        show_run(key_prefix, code_input, run)
 
 def diagnostic_evaluation():
     st.subheader("📝 진단 평가")
@@ -64,14 +72,14 @@ def diagnostic_evaluation():
         )
         submitted = st.form_submit_button("제출")
 
+    bulk_grading_panel(("diag_q1", "diag_q2"), "diag")
+    run_stats_panel("diag")
+
     if submitted:
-        correct1 = q1.strip().replace('"', "'") == "print('Hello')"
-        clean_q2 = q2.replace(" ", "")
-        correct2 = (
-            "a=5" in clean_q2 and
-            "b=3" in clean_q2 and
-            "print(a+b)" in clean_q2
-        )
+        # 글자 비교 대신 답안을 실제로 실행해 출력과 변수 값으로 채점합니다.
+        correct1 = grade_submission(q1, "diag_q1")["passed"] == 1
+        grade2 = grade_submission(q2, "diag_q2")
+        correct2 = grade2["passed"] == grade2["total"]
 
         if not correct1:
             st.info("👉 추천 학습 시작: Day 1")
@@ -98,9 +106,7 @@ def code_block_columns(problem_number, starter_code, prefix=""):
     with c2:
         st.markdown("##### 📤 실행 결과")
         run = st.button("▶️ 코드 실행하기", key=f"{key_prefix}_run")
-        if run:
-            result, status = code_runner(code_input)
-            display_output(result, status)
+        show_run(key_prefix, code_input, run)
 
 def code_block_rows(problem_number, starter_code, prefix=""):
     key_prefix = f"{prefix}{problem_number}"
@@ -113,10 +119,9 @@ def code_block_rows(problem_number, starter_code, prefix=""):
         key=f"{key_prefix}_editor"
     )
     run = st.button("▶️ 코드 실행하기", key=f"{key_prefix}_run")
-    if run:
+    if run or has_run(key_prefix):
         st.markdown("###### 📤 실행 결과")
-        result, status = code_runner(code_input)
-        display_output(result, status)
+        show_run(key_prefix, code_input, run)
 
 # ✅ 메인 화면
 def show():
@@ -352,12 +357,11 @@ def show():
             run = st.button("▶️ 코드 실행하기", key="alg_step2_run")
         n_val = st.number_input("n 값을 입력하세요", min_value=1, value=5, step=1)
 
-        if run:
-            result, status = code_runner(code_input)
+        if run or has_run("alg_step2"):
             st.markdown("#### 📤 실행 결과")
-            display_output(result, status)
-            correct = sum(range(1, n_val+1))
-            st.success(f"✅ 정답 확인: 1부터 {n_val}까지의 합 = {correct}")
+            if show_run("alg_step2", code_input, run):
+                correct = sum(range(1, n_val+1))
+                st.success(f"✅ 정답 확인: 1부터 {n_val}까지의 합 = {correct}")
         st.write("👉 실행 결과와 정답을 비교해보며 코드를 점검해보세요.")
         st.markdown("<hr style='border: 2px solid #2196F3;'>", unsafe_allow_html=True)
 
@@ -1,12 +1,12 @@
 import streamlit as st
 from streamlit_ace import st_ace
 import pandas as pd
-import io
-import sys
 import datetime
 import os
-import builtins
 from fpdf import FPDF
+from code_sandbox import format_metrics
+from code_jobs import poll_run, submit_run
+from code_grader import bulk_grading_panel, grading_block, run_stats_panel
 
 # ==========================================
 # 1. 고품질 PDF 생성 클래스 (ThemedPDF)
@@ -267,74 +267,26 @@ def render_value_cards(items, columns=1):
             with col:
                 st.empty()
 # ==========================================
-# 2. 파이썬 코드 실행 엔진 (동시성 및 보안 완벽 방어 버전)
+# 2. 파이썬 코드 실행 엔진 (워커 프로세스 격리 + 시간/자원 제한)
 # ==========================================
-def code_runner(code_input):
-    output_buffer = io.StringIO()
-    
-    # 1. builtins 전역 공간을 오염시키지 않는 독립적인 커스텀 print 함수
-    def custom_print(*args, sep=' ', end='\n', file=None, flush=False):
-        if file is None:
-            output_buffer.write(sep.join(map(str, args)) + end)
-        else:
-            builtins.print(*args, sep=sep, end=end, file=file, flush=flush)
-
-    # 💡 [추가/수정됨] 안전한 임포트(import) 함수 정의
-    original_import = builtins.__import__
-    def safe_import(name, globals=None, locals=None, fromlist=(), level=0):
-        # 학생이 import 할 수 있도록 허용할 모듈 목록 (해킹 방지)
-        allowed_modules = ['sympy', 'math', 'random']
-        base_name = name.split('.')[0] # 서브 모듈(sympy.abc 등) 허용 처리
-        
-        if base_name in allowed_modules:
-            return original_import(name, globals, locals, fromlist, level)
-        raise ImportError(f"🚨 보안 경고: '{name}' 모듈은 이 실습에서 임포트할 수 없습니다.")
-
-    # 2. 보안: 학생이 사용할 수 있는 안전한 기본 함수들만 화이트리스트로 허용
-    safe_builtins = {
-        'print': custom_print,
-        '__import__': safe_import,  # 👈 핵심! import 구문 실행을 위해 필수 추가
-        'range': range, 'len': len, 'int': int, 'float': float, 'str': str,
-        'bool': bool, 'list': list, 'dict': dict, 'set': set, 'tuple': tuple,
-        'sum': sum, 'min': min, 'max': max, 'abs': abs, 'round': round,
-        'enumerate': enumerate, 'zip': zip, 'type': type, # 자주 쓰는 기본 함수 추가
-        'Exception': Exception, 'ValueError': ValueError, 'TypeError': TypeError,
-        '__build_class__': __build_class__, # 클래스나 함수(def) 정의를 위해 필수
-    }
-    
-    try:
-        import sympy as sp
-    except ImportError:
-        sp = None
-
-    # exec 실행 환경 격리
-    exec_globals = {
-        '__builtins__': safe_builtins,
-        'sp': sp,
-        'sympy': sp
-    }
-    
-    # 3. 보안: 위험한 코드 문자열 1차 필터링
-    forbidden_keywords = ["import os", "import sys", "import subprocess", "open(", "eval(", "exec("]
-    if any(keyword in code_input for keyword in forbidden_keywords):
-        return "❌ 시스템 보안 경고: 허용되지 않은 키워드나 명령어 호출이 포함되어 있습니다.", "error"
-
-    try:
-        exec(code_input, exec_globals)
-        result = output_buffer.getvalue() or "출력된 내용이 없습니다."
-        status = "success"
-    except Exception as e:
-        result = f"{e.__class__.__name__}: {e}"
-        status = "error"
-        
-    return result, status
+def code_runner(key_prefix, code_input):
+    # 학생 코드는 미리 띄워 둔 워커 프로세스에서 SymPy 화이트리스트 환경으로 실행됩니다.
+    # 실행은 백그라운드 작업으로 맡기고, 끝나면 결과를 f"{key_prefix}_result" 에 저장합니다.
+    submit_run(key_prefix, code_input, profile="sympy-whitelist", label=f"data1/{key_prefix}")
+
+def save_result(key_prefix):
+    def on_done(reply):
+        st.session_state[f"{key_prefix}_result"] = (reply["output"], reply["status"], reply["metrics"])
+    return on_done
 
-def display_output(result, status):
+def display_output(result, status, metrics=None):
     if status == "success":
         st.markdown(f"```bash\n{result}\n```")
     else:
         st.markdown("##### ❌ 실행 중 오류 발생")
         st.markdown(f"<pre style='color: red; background-color: #ffe6e6; padding: 10px; border-radius: 5px;'>{result}</pre>", unsafe_allow_html=True)
+    if metrics:
+        st.caption(format_metrics(metrics))
 
 def code_block(problem_number, title, starter_code, prefix="", height=280):
     # 키 값이 꼬이지 않도록 prefix와 숫자를 결합
@@ -343,13 +295,16 @@ def code_block(problem_number, title, starter_code, prefix="", height=280):
     with c1:
         st.markdown(pretty_title(f"📥 {title} (코드 입력)", "#e3f2fd", "#bbdefb"), unsafe_allow_html=True)
         code_input = st_ace(value=starter_code, language='python', theme='github', height=height, key=f"{key_prefix}_editor")
-        if st.button("▶️ 실행", key=f"{key_prefix}_run", use_container_width=True):
-            st.session_state[f"{key_prefix}_result"] = code_runner(code_input)
+        run = st.button("▶️ 실행", key=f"{key_prefix}_run", use_container_width=True)
     with c2:
         st.markdown(pretty_title("🖥️ 실행 결과", "#f1f8e9", "#dcedc8"), unsafe_allow_html=True)
-        if f"{key_prefix}_result" in st.session_state:
-            res, stat = st.session_state[f"{key_prefix}_result"]
-            display_output(res, stat)
+        if run:
+            code_runner(key_prefix, code_input)
+        if poll_run(key_prefix, save_result(key_prefix)):
+            pass
+        elif f"{key_prefix}_result" in st.session_state:
+            res, stat, metrics = st.session_state[f"{key_prefix}_result"]
+            display_output(res, stat, metrics)
         else:
             st.info("실행 버튼을 누르면 결과가 표시됩니다.")
 
@@ -674,7 +629,7 @@ print(f"2. 교차 검증: f({a})의 결과는?", f(a))"""
                 
             # 실행 결과 초기화
             if "d1_q6_result" in st.session_state:
-                st.session_state["d1_q6_result"] = ("", "")
+                st.session_state["d1_q6_result"] = ("", "", None)
 
         if "하" in level:
             level_key = "ha"
@@ -683,6 +638,9 @@ print(f"2. 교차 검증: f({a})의 결과는?", f(a))"""
         else:
             level_key = "sang"
         code_block(6, f"도전 코드 ({level[:2]})", st_code, prefix=f"d1_q_{level_key}_", height=300)
+        grading_block(f"d1_{level_key}", f"d1_q_{level_key}_6")
+        bulk_grading_panel(("d1_ha", "d1_jung", "d1_sang"), "d1")
+        run_stats_panel("d1")
 
     # ------------------------------------------
     # 탭 5: 세상과 연결 및 실천 [응용적 수학화 2]
@@ -764,7 +722,7 @@ print(f"2. 교차 검증: f({a})의 결과는?", f(a))"""
                     code_data = []
                     for title, prefix in code_sections:
                         code_text = st.session_state.get(f"{prefix}_editor", "")
-                        res_tuple = st.session_state.get(f"{prefix}_result", ("", ""))
+                        res_tuple = st.session_state.get(f"{prefix}_result", ("", "", None))
                         result_text = res_tuple[0] if res_tuple else ""
                         code_data.append((title, code_text, result_text))
                     
@@ -1,16 +1,16 @@
 import streamlit as st
 from streamlit_ace import st_ace
 import pandas as pd
-import io
-import sys
 import datetime
 import os
-import builtins
 import numpy as np
 import matplotlib as mpl
 import matplotlib.font_manager as fm
 from matplotlib.figure import Figure # 다중 접속 시 그래프 충돌을 막기 위해 Figure 사용
 from fpdf import FPDF
+from code_sandbox import format_metrics
+from code_jobs import poll_run, submit_run
+from code_grader import bulk_grading_panel, grading_block, run_stats_panel
 
 # ==========================================
 # 0. Matplotlib 한글 폰트 설정
@@ -282,58 +282,28 @@ def render_value_cards(items, columns=1):
                 st.empty()
 
 # ==========================================
-# 2. 파이썬 코드 실행 엔진 (다중 접속 동시성 + 시각화 지원 완벽 방어)
+# 2. 파이썬 코드 실행 엔진 (워커 프로세스 격리 + 시각화 지원)
 # ==========================================
-def code_runner(code_input):
-    output_buffer = io.StringIO()
-    result, status = "", "success"
-    fig = None 
-    
-    def custom_print(*args, sep=' ', end='\n', file=None, flush=False):
-        if file is None:
-            output_buffer.write(sep.join(map(str, args)) + end)
-        else:
-            builtins.print(*args, sep=sep, end=end, file=file, flush=flush)
-
-    # 💡 동시 접속 방어를 위해 plt 상태 머신 대신 객체(Figure)를 직접 생성합니다.
-    def draw_graph(a, b, c):
-        nonlocal fig
-        fig = Figure(figsize=(6, 4))
-        ax = fig.subplots()
-        x = np.linspace(-10, 10, 400)
-        y = a*x**2 + b*x + c
-        ax.plot(x, y, label=f'y = {a}x^2 + {b}x + {c}', color='#1976d2', linewidth=2)
-        ax.axhline(0, color='#d32f2f', linewidth=2, label='x-axis (y=0)') 
-        ax.axvline(0, color='black', linewidth=1) 
-        ax.grid(True, linestyle='--', alpha=0.6)
-        ax.legend()
-        ax.set_ylim(-15, 20)
-
-    safe_builtins = builtins.__dict__.copy()
-    safe_builtins['print'] = custom_print
-    
-    exec_globals = {
-        '__builtins__': safe_builtins,
-        'draw_graph': draw_graph 
-    }
-    
-    try:
-        exec(code_input, exec_globals)
-        result = output_buffer.getvalue() or "출력된 내용이 없습니다."
-    except Exception as e:
-        result = f"{e.__class__.__name__}: {e}"
-        status = "error"
-        
-    return result, status, fig
+def code_runner(key_prefix, code_input):
+    # draw_graph 그래프는 워커 프로세스에서 PNG 이미지로 만들어 돌려받습니다.
+    # 실행은 백그라운드 작업으로 맡기고, 끝나면 결과를 f"{key_prefix}_result" 에 저장합니다.
+    submit_run(key_prefix, code_input, profile="graphing", label=f"data2/{key_prefix}")
+
+def save_result(key_prefix):
+    def on_done(reply):
+        st.session_state[f"{key_prefix}_result"] = (reply["output"], reply["status"], reply["figure"], reply["metrics"])
+    return on_done
 
-def display_output(result, status, fig):
+def display_output(result, status, fig, metrics=None):
     if status == "success":
         st.markdown(f"```bash\n{result}\n```")
         if fig is not None:
-            st.pyplot(fig) 
+            st.image(fig, use_container_width=True)
     else:
         st.markdown("##### ❌ 실행 중 오류 발생")
         st.markdown(f"<pre style='color: red; background-color: #ffe6e6; padding: 10px; border-radius: 5px;'>{result}</pre>", unsafe_allow_html=True)
+    if metrics:
+        st.caption(format_metrics(metrics))
 
 def code_block(problem_number, title, starter_code, prefix="", height=280):
     key_prefix = f"{prefix}{problem_number}"
@@ -341,13 +311,16 @@ def code_block(problem_number, title, starter_code, prefix="", height=280):
     with c1:
         st.markdown(pretty_title(f"📥 {title} (코드 입력)", "#e3f2fd", "#bbdefb"), unsafe_allow_html=True)
         code_input = st_ace(value=starter_code, language='python', theme='github', height=height, key=f"{key_prefix}_editor")
-        if st.button("▶️ 실행", key=f"{key_prefix}_run", use_container_width=True):
-            st.session_state[f"{key_prefix}_result"] = code_runner(code_input)
+        run = st.button("▶️ 실행", key=f"{key_prefix}_run", use_container_width=True)
     with c2:
         st.markdown(pretty_title("🖥️ 실행 결과", "#f1f8e9", "#dcedc8"), unsafe_allow_html=True)
-        if f"{key_prefix}_result" in st.session_state:
-            res, stat, fig = st.session_state[f"{key_prefix}_result"]
-            display_output(res, stat, fig)
+        if run:
+            code_runner(key_prefix, code_input)
+        if poll_run(key_prefix, save_result(key_prefix)):
+            pass
+        elif f"{key_prefix}_result" in st.session_state:
+            res, stat, fig, metrics = st.session_state[f"{key_prefix}_result"]
+            display_output(res, stat, fig, metrics)
         else:
             st.info("실행 버튼을 누르면 결과가 표시됩니다.")
 
@@ -723,6 +696,9 @@ draw_graph(a, b, c)
             level_key = "sang"
             
         code_block("q4", f"도전 코드 ({level[:2]})", st_code, prefix=f"d2_{level_key}_", height=320)
+        grading_block(f"d2_{level_key}", f"d2_{level_key}_q4")
+        bulk_grading_panel(("d2_ha", "d2_jung", "d2_sang"), "d2")
+        run_stats_panel("d2")
 
     # ------------------------------------------
     # 탭 5: 세상 연결 [응용적 수학화 2]
@@ -803,7 +779,7 @@ draw_graph(a, b, c)
                     code_data = []
                     for title, prefix in code_sections:
                         code_text = st.session_state.get(f"{prefix}_editor", "")
-                        res_tuple = st.session_state.get(f"{prefix}_result", ("", "", None))
+                        res_tuple = st.session_state.get(f"{prefix}_result", ("", "", None, None))
                         result_text = res_tuple[0] if res_tuple else ""
                         code_data.append((title, code_text, result_text))
                     
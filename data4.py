@@ -10,6 +10,8 @@ import streamlit as st
 from fpdf import FPDF
 from matplotlib.figure import Figure
 
+from poly_fit import polynomial_coeffs
+
 
 font_path = os.path.join(os.path.dirname(__file__), "font", "NanumGothic.ttf")
 
@@ -571,8 +573,7 @@ def cached_loss_curve(intercept):
 
 @st.cache_data(show_spinner=False)
 def cached_polyfit(x_values, y_values, degree):
-    coeffs = np.polyfit(np.asarray(x_values, dtype=float), np.asarray(y_values, dtype=float), degree)
-    return coeffs.tolist()
+    return polynomial_coeffs(x_values, y_values, degree).tolist()
 
 
 def fit_degree(x_values, y_values, degree):
@@ -1,7 +1,12 @@
 import csv
 import datetime
+import functools
+import gc
 import os
+import queue
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
 os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
@@ -13,15 +18,16 @@ import pandas as pd
 import streamlit as st
 from fpdf import FPDF
 from matplotlib.figure import Figure
-from sklearn.linear_model import LinearRegression
 from sklearn.metrics import r2_score
-from sklearn.preprocessing import MinMaxScaler, PolynomialFeatures
-import tensorflow as tf
-from tensorflow.keras import Input
-from tensorflow.keras.layers import Dense
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.optimizers import Adam
-
+from sklearn.preprocessing import MinMaxScaler
+
+from code_grader import teacher_password, teacher_unlocked
+from dataset_stats import column_summary, get_stats_index
+from model_cache import ModelCache, SingleFlight
+from model_store import ModelStore
+from numpy_mlp import EarlyStopper, NumpyMLP, infer, train_mlp, train_mlp_folds, train_mlp_sweep
+from poly_fit import polynomial_fit, polynomial_latex
+from training_pool import TRAINING_SLOTS, get_training_pool
 from future_extra_datasets import (
     EXTRA_DATASETS,
     FIELD_DATASETS,
@@ -32,12 +38,66 @@ from future_extra_datasets import (
 )
 
 
-try:
-    tf.config.threading.set_intra_op_parallelism_threads(1)
-    tf.config.threading.set_inter_op_parallelism_threads(1)
-except Exception:
-    pass
+# 딥러닝 학습 방식: "numpy"(기본, 넘파이로 직접 학습) 또는 "keras"(TensorFlow)
+DL_BACKEND = os.environ.get("DATA5_DL_BACKEND", "numpy").strip().lower()
+# 학습 칸(training_pool.py)은 오래 걸리는 Keras 학습에만 씁니다. (넘파이 학습은 이 프로세스에서 수십 ms)
+USE_TRAINING_POOL = DL_BACKEND == "keras" and TRAINING_SLOTS > 0
+DL_LEARNING_RATE = 0.01
+DL_SEED = 42
+# 손실이 더 줄지 않으면 정한 학습 횟수보다 일찍 멈출지 ("0" 이면 항상 끝까지 학습)
+DL_EARLY_STOPPING = os.environ.get("DATA5_EARLY_STOPPING", "1").strip() != "0"
+DL_PATIENCE = int(os.environ.get("DATA5_PATIENCE", "5"))             # 이만큼 연속으로 손실이 줄지 않으면 멈춤
+DL_TOLERANCE = float(os.environ.get("DATA5_TOLERANCE", "0.01"))      # 최저 손실보다 이 비율 이상 줄어야 줄었다고 봄
+DL_MIN_EPOCHS = 10                                                   # 손실 그래프가 의미 있도록 최소한 학습할 횟수
+DL_TIME_BUDGET = float(os.environ.get("DATA5_TIME_BUDGET", "8"))     # 모델 하나의 학습에 쓸 최대 시간(초)
+# 서버 시작 때 TensorFlow 를 미리 데울지: "auto"(keras 방식일 때만), "1"(항상), "0"(하지 않음)
+TF_WARMUP = os.environ.get("DATA5_TF_WARMUP", "auto").strip().lower()
+
+# 학습된 모델 캐시의 바이트 예산(MB)과 Keras 모델 하나의 대략적인 고정 크기(그래프, 레이어 객체 등)
+MODEL_CACHE_MB = float(os.environ.get("DATA5_MODEL_CACHE_MB", "64"))
+KERAS_MODEL_OVERHEAD = 2 * 1024 * 1024
+# 학습 결과를 저장해 두는 폴더 (빈 값이면 디스크 저장을 쓰지 않음)
+MODEL_STORE_DIR = os.environ.get("DATA5_MODEL_STORE", os.path.join(os.path.dirname(__file__), "model_store"))
+
+# 구조 비교에서 고를 수 있는 값 (모델 구성 슬라이더와 같은 범위)과 기본 선택
+SWEEP_HIDDEN1_OPTIONS = list(range(4, 13))
+SWEEP_HIDDEN2_OPTIONS = list(range(2, 9))
+SWEEP_EPOCH_OPTIONS = [10, 15, 20, 25, 30]
+SWEEP_DEFAULT_HIDDEN1 = [4, 8, 12]
+SWEEP_DEFAULT_HIDDEN2 = [2, 4, 8]
+SWEEP_DEFAULT_EPOCHS = [15, 30]
+SWEEP_SEED_COUNT = 3
+
+# 일반화 성능 표에서 쓰는 k겹 검증의 폴드 수 (자료가 적으면 자료 수만큼)
+VALIDATION_FOLDS = 5
+
+# 처음 보는 조건의 Keras 학습을 백그라운드에서 돌리며 학습 횟수마다 손실을 화면에 보여 줄지 ("0" 이면 끝날 때까지 기다림)
+# (넘파이 학습은 수십 ms 안에 끝나므로 늘 그 자리에서 바로 학습합니다.)
+DL_LIVE_TRAINING = os.environ.get("DATA5_LIVE_TRAINING", "1").strip() != "0"
+LIVE_TRAINING_THREADS = 2
+LIVE_POLL_INTERVAL = 0.3     # 학습 진행 그래프를 다시 그리는 간격(초)
+DL_TRAINING_WAIT_TEXT = "⏳ 딥러닝이 학습하는 중입니다. '머신러닝 vs 딥러닝' 탭에서 진행 상황을 볼 수 있고, 학습이 끝나면 결과가 여기에 나타납니다."
+# 학습하는 동안 그리지 않는 부분의 입력 칸들 (그리지 않은 입력 칸의 값은 streamlit 이 지우므로 따로 지켜 둡니다)
+MODEL_WIDGET_KEYS = (
+    "d5_sweep_hidden1",
+    "d5_sweep_hidden2",
+    "d5_sweep_epochs",
+    "d5_show_prediction_ml",
+    "d5_show_prediction_dl",
+    "d5_prediction_x",
+    "d5_analysis_report",
+    "d5_interpretation_report",
+)
 
+_fragment = getattr(st, "fragment", None) or st.experimental_fragment
+
+_TF = None
+_TF_LOCK = threading.Lock()
+_WARMUP_THREAD = None
+_TRAINING_JOBS = {}
+_EPOCH_STATS = {"models": 0, "requested": 0, "trained": 0}
+_TRAINING_LOCK = threading.Lock()
+_TRAINING_EXECUTOR = None
 
 font_path = os.path.join(os.path.dirname(__file__), "font", "NanumGothic.ttf")
 
@@ -681,18 +741,29 @@ def apply_direct_excel_paste():
     st.session_state["d5_direct_paste_error"] = ""
 
 
+def read_only(values):
+    values = np.array(values, dtype=float)
+    values.setflags(write=False)
+    return values
+
+
 def make_dataset(name, info, x_column, y_column):
-    table = info["table"].copy()
+    # 준비된 자료는 여러 세션이 함께 쓰므로 배열은 읽기 전용으로 두고 표는 복사하지 않습니다.
+    # (표를 고쳐 써야 하는 곳에서 .copy() 한 뒤 사용)
+    table = info["table"]
     x_label, x_unit = split_label_unit(x_column)
     y_label, y_unit = split_label_unit(y_column)
+    x_all = read_only(table[x_column].to_numpy(dtype=float))
+    y_all = read_only(table[y_column].to_numpy(dtype=float))
     return {
         "name": name,
         "table": table,
-        "selected_table": table[[x_column, y_column]].copy(),
+        "selected_table": table[[x_column, y_column]],
         "x_column": x_column,
         "y_column": y_column,
-        "x": table[x_column].to_numpy(dtype=float),
-        "y": table[y_column].to_numpy(dtype=float),
+        "x": x_all,
+        "y": y_all,
+        "split": build_split(x_all, y_all),
         "x_label": x_label,
         "x_unit": x_unit,
         "y_label": y_label,
@@ -703,10 +774,28 @@ def make_dataset(name, info, x_column, y_column):
     }
 
 
+@functools.lru_cache(maxsize=256)
 def current_dataset(name, x_column, y_column):
+    # (데이터, x 열, y 열) 마다 한 번만 준비해 모든 세션이 나눠 씁니다. 위젯만 바뀐 재실행은 여기서 바로 돌아옵니다.
     return make_dataset(name, DATASETS[name], x_column, y_column)
 
 
+def selection_stats(dataset):
+    # 내장 데이터는 서버가 켜질 때 만든 통계 색인에서 바로 꺼내고, 직접 입력한 자료만 여기서 계산합니다.
+    index = get_stats_index()
+    x_stats = index.column(dataset["name"], dataset["x_column"], "data5")
+    y_stats = index.column(dataset["name"], dataset["y_column"], "data5")
+    pair = index.pair(dataset["name"], dataset["x_column"], dataset["y_column"], "data5")
+    if x_stats is None or y_stats is None or pair is None:
+        return column_summary(dataset["x"]), column_summary(dataset["y"]), float(np.corrcoef(dataset["x"], dataset["y"])[0, 1])
+    return x_stats, y_stats, pair["corr"]
+
+
+def apply_recommended_pair(x_column, y_column):
+    st.session_state["d5_x_col"] = x_column
+    st.session_state["d5_y_col"] = y_column
+
+
 def direct_dataset_from_session():
     x_values = parse_direct_values(st.session_state.get("d5_direct_x_values", ""), "x")
     y_values = parse_direct_values(st.session_state.get("d5_direct_y_values", ""), "y")
@@ -714,6 +803,11 @@ def direct_dataset_from_session():
         raise ValueError("입력 오류: x의 자료 개수와 y의 자료 개수가 다릅니다. 쉼표(,)로 구분한 값의 개수를 맞춰 주세요.")
     if len(x_values) < 4:
         raise ValueError("입력 오류: 분석하려면 x와 y 자료를 각각 4개 이상 입력해 주세요.")
+    return direct_dataset(tuple(x_values), tuple(y_values))
+
+
+@functools.lru_cache(maxsize=64)
+def direct_dataset(x_values, y_values):
     table = pd.DataFrame({DIRECT_X_COLUMN: x_values, DIRECT_Y_COLUMN: y_values})
     info = {
         "table": table,
@@ -734,29 +828,47 @@ def active_dataset_from_session():
     )
 
 
-def dataset_split(dataset):
-    x_all = dataset["x"]
-    y_all = dataset["y"]
+def build_split(x_all, y_all):
+    # 마지막 점은 숨겨 두고 나머지로 학습합니다. 이상치 표시와 정규화 기준도 여기서 한 번만 구해 둡니다.
+    x_obs = x_all[:-1]
+    y_obs = y_all[:-1]
+    inlier_mask = iqr_inlier_mask(x_obs, y_obs)
+    dl_mask = deep_learning_mask(x_obs, y_obs)
+    inlier_mask.setflags(write=False)
+    dl_mask.setflags(write=False)
+    x_dl = read_only(x_obs[dl_mask])
+    y_dl = read_only(y_obs[dl_mask])
     return {
-        "x_obs": x_all[:-1],
-        "y_obs": y_all[:-1],
+        "x_obs": x_obs,
+        "y_obs": y_obs,
         "x_hidden": float(x_all[-1]),
         "y_hidden": float(y_all[-1]),
         "x_all": x_all,
         "y_all": y_all,
+        "inlier_mask": inlier_mask,
+        "dl_mask": dl_mask,
+        "x_dl": x_dl,
+        "y_dl": y_dl,
+        "scaling": {use_scale: preprocess_values(x_dl, y_dl, use_scale)[2] for use_scale in (True, False)},
     }
 
 
-def preprocess_values(x_values, y_values, use_scale):
+def dataset_split(dataset):
+    return dataset["split"]
+
+
+def preprocess_values(x_values, y_values, use_scale, meta=None):
+    # 준비된 자료(dataset_split)의 scaling 을 meta 로 넘기면 최솟값·최댓값을 다시 구하지 않습니다.
     x = np.asarray(x_values, dtype=float)
     y = np.asarray(y_values, dtype=float)
-    meta = {
-        "use_scale": bool(use_scale),
-        "x_min": float(x.min()),
-        "x_max": float(x.max()),
-        "y_min": float(y.min()),
-        "y_max": float(y.max()),
-    }
+    if meta is None:
+        meta = {
+            "use_scale": bool(use_scale),
+            "x_min": float(x.min()),
+            "x_max": float(x.max()),
+            "y_min": float(y.min()),
+            "y_max": float(y.max()),
+        }
     if not use_scale:
         return x.copy(), y.copy(), meta
     x_span = meta["x_max"] - meta["x_min"] or 1.0
@@ -792,18 +904,13 @@ def mae(y_true, y_pred):
 
 @st.cache_data(show_spinner=False)
 def run_poly_regression(x_values, y_values, degree):
-    x = np.asarray(x_values, dtype=float).reshape(-1, 1)
-    y = np.asarray(y_values, dtype=float)
-    poly = PolynomialFeatures(degree=int(degree), include_bias=False)
-    x_train = poly.fit_transform(x)
-    model = LinearRegression().fit(x_train, y)
-    y_pred = model.predict(x_train)
-    coeffs = polynomial_coeff_array(model, poly)
-    latex = get_polynomial_equation_latex(model, poly)
+    # 직선/2차 모델은 같은 자료의 QR 분해 하나를 함께 씁니다. (poly_fit.py)
+    fit = polynomial_fit(x_values, y_values, degree)
+    coeffs = fit.coeffs(degree)
     return {
         "coeffs": coeffs,
-        "y_pred": np.asarray(y_pred, dtype=float),
-        "latex": latex,
+        "y_pred": fit.predict(degree),
+        "latex": polynomial_latex(coeffs),
         "degree": int(degree),
     }
 
@@ -812,48 +919,421 @@ def poly_predict(coeffs, x_values):
     return np.polyval(np.asarray(coeffs, dtype=float), np.asarray(x_values, dtype=float))
 
 
-def polynomial_coeff_array(model, poly):
-    terms = poly.get_feature_names_out(["x"])
-    coeff_map = {0: float(model.intercept_)}
-    for term, coef in zip(terms, model.coef_):
-        if "^" in term:
-            degree = int(term.split("^")[1])
-        else:
-            degree = 1
-        coeff_map[degree] = float(coef)
-    max_degree = max(coeff_map.keys())
-    return np.array([coeff_map.get(degree, 0.0) for degree in range(max_degree, -1, -1)], dtype=float)
-
-
-def get_polynomial_equation_latex(model, poly):
-    terms = poly.get_feature_names_out(["x"])
-    coefs = model.coef_
-    intercept = float(model.intercept_)
-    parsed_terms = []
-    for term, coef in zip(terms, coefs):
-        if abs(coef) > 1e-9:
-            degree = int(term.split("^")[1]) if "^" in term else 1
-            parsed_terms.append((degree, float(coef)))
-    parsed_terms.sort(reverse=True, key=lambda item: item[0])
-
-    latex_terms = []
-    for degree, coef in parsed_terms:
-        if abs(coef) == 1.0:
-            sign = "-" if coef < 0 else ""
-            body = f"{sign}x^{{{degree}}}" if degree > 1 else f"{sign}x"
-        else:
-            body = f"{coef:.2f}x^{{{degree}}}" if degree > 1 else f"{coef:.2f}x"
-        latex_terms.append(body)
-    if abs(intercept) > 1e-9:
-        sign = "-" if intercept < 0 else "+"
-        latex_terms.append(f"{sign}{abs(intercept):.2f}")
-    expr = " + ".join(latex_terms).replace("+ -", "- ")
-    expr = expr[2:] if expr.startswith("+ ") else expr
-    return f"y = {expr}" if expr else "y = 0"
-
-
-@st.cache_resource(show_spinner=False)
-def run_deep_learning(x_values, y_values, use_scale, hidden1=8, hidden2=4, epochs=30):
+def load_tensorflow():
+    # TensorFlow 는 처음으로 필요할 때 한 번만 불러옵니다. (페이지를 여는 것만으로는 불러오지 않음)
+    # 계산 스레드 수는 학습 칸마다 정한 값(DATA5_TF_THREADS, training_pool.py)을 따릅니다.
+    global _TF
+    with _TF_LOCK:
+        if _TF is None:
+            import tensorflow as tf
+
+            threads = int(os.environ.get("DATA5_TF_THREADS", "1"))
+            try:
+                tf.config.threading.set_intra_op_parallelism_threads(threads)
+                tf.config.threading.set_inter_op_parallelism_threads(1)
+            except Exception:
+                pass
+            _TF = tf
+    return _TF
+
+
+def build_keras_model(hidden1, hidden2):
+    tf = load_tensorflow()
+    model = tf.keras.models.Sequential(
+        [
+            tf.keras.Input(shape=(1,)),
+            tf.keras.layers.Dense(hidden1, activation="relu"),
+            tf.keras.layers.Dense(hidden2, activation="relu"),
+            tf.keras.layers.Dense(1, activation="linear"),
+        ]
+    )
+    model.compile(optimizer=tf.keras.optimizers.Adam(DL_LEARNING_RATE), loss="mse")
+    return model
+
+
+def warmup_tensorflow():
+    # 버리는 작은 모델을 한 번 만들고 학습/예측해서 그래프 준비 비용을 미리 치러 둡니다.
+    model = build_keras_model(4, 2)
+    x = np.linspace(0.0, 1.0, 4).reshape(-1, 1)
+    model.fit(x, x, epochs=1, batch_size=4, verbose=0)
+    model.predict(x, verbose=0)
+
+
+def start_tensorflow_warmup():
+    # main.py 가 서버 시작 때 한 번 부릅니다. 학생 요청을 막지 않도록 백그라운드 스레드에서 데웁니다.
+    global _WARMUP_THREAD
+    if not tensorflow_warmup_wanted() or USE_TRAINING_POOL:
+        # 학습 칸(training_pool.py)을 쓰면 학습은 그 프로세스들에서 하므로 칸이 시작할 때 스스로 데웁니다.
+        return None
+    if _WARMUP_THREAD is None:
+        _WARMUP_THREAD = threading.Thread(target=_run_warmup, name="data5-tf-warmup", daemon=True)
+        _WARMUP_THREAD.start()
+    return _WARMUP_THREAD
+
+
+def tensorflow_warmup_wanted():
+    return TF_WARMUP == "1" or (TF_WARMUP == "auto" and DL_BACKEND == "keras")
+
+
+def warm_training_slot():
+    # 학습 칸 프로세스가 뜰 때 training_pool 이 부릅니다.
+    if tensorflow_warmup_wanted():
+        warmup_tensorflow()
+
+
+def _run_warmup():
+    try:
+        warmup_tensorflow()
+    except Exception:
+        pass
+
+
+def train_keras_model(x_train, y_train, hidden1, hidden2, epochs, batch_size, on_epoch=None, stopper=None):
+    # 데우는 중인 모델과 Keras 전역 상태가 섞이지 않도록 데우기가 끝날 때까지 기다립니다.
+    if _WARMUP_THREAD is not None:
+        _WARMUP_THREAD.join()
+    tf = load_tensorflow()
+    tf.keras.backend.clear_session()
+    tf.keras.utils.set_random_seed(DL_SEED)
+    model = build_keras_model(hidden1, hidden2)
+    callbacks = []
+    if on_epoch is not None:
+        callbacks.append(tf.keras.callbacks.LambdaCallback(on_epoch_end=lambda epoch, logs: on_epoch(epoch, float(logs["loss"]))))
+    if stopper is not None:
+        # 넘파이 방식과 같은 기준으로 멈추도록 Keras EarlyStopping 대신 EarlyStopper 를 그대로 씁니다.
+        def stop_if_needed(epoch, logs):
+            if stopper.should_stop(epoch, float(logs["loss"])):
+                model.stop_training = True
+
+        callbacks.append(tf.keras.callbacks.LambdaCallback(on_epoch_end=stop_if_needed))
+    history = model.fit(
+        x_train,
+        y_train,
+        epochs=int(epochs),
+        batch_size=batch_size,
+        verbose=0,
+        callbacks=callbacks,
+    )
+    return model, history.history["loss"]
+
+
+def model_bundle_nbytes(bundle):
+    # 가중치와 학습 기록이 실제로 차지하는 바이트 수로 모델 크기를 잽니다.
+    model = bundle["model"]
+    size = sum(np.asarray(w).nbytes for w in model.get_weights())
+    if not isinstance(model, NumpyMLP):
+        # Keras 는 Adam 의 m, v 변수와 예측용으로 꺼낸 가중치 사본이 가중치만큼씩 더 있고,
+        # 모델 객체 자체의 고정 크기가 붙습니다.
+        size = size * 4 + KERAS_MODEL_OVERHEAD
+    return size + bundle["losses"].nbytes + bundle["train_pred"].nbytes
+
+
+def release_model_bundle(key, bundle):
+    # Keras 모델은 레이어끼리 순환 참조가 있어 참조가 끊겨도 바로 사라지지 않으므로,
+    # 캐시에서 밀려날 때 순환 참조 수거를 돌려 TensorFlow 변수 메모리를 곧바로 돌려줍니다.
+    # (다른 요청이 아직 쓰고 있을 수 있어 bundle 자체는 건드리지 않습니다)
+    if isinstance(bundle.get("model"), NumpyMLP):
+        return
+    gc.collect()
+
+
+MODEL_CACHE = ModelCache(MODEL_CACHE_MB * 1024 * 1024, model_bundle_nbytes, release_model_bundle)
+# 여러 학생이 같은 조건으로 동시에 학습을 요청하면 한 번만 학습하고 결과를 함께 씁니다.
+TRAINING_FLIGHTS = SingleFlight()
+
+
+MODEL_STORE = ModelStore(MODEL_STORE_DIR) if MODEL_STORE_DIR else None
+
+
+def model_cache_stats():
+    return {**MODEL_CACHE.stats(), "flights": TRAINING_FLIGHTS.stats()}
+
+
+def fitted_minmax_scaler(data_min, data_max):
+    # 저장해 둔 최솟값/최댓값만으로 학습 때와 똑같이 변환하는 MinMaxScaler 를 되살립니다.
+    return MinMaxScaler().fit(np.array([[data_min], [data_max]], dtype=float))
+
+
+def minmax_params(scaler):
+    # MinMaxScaler 와 같은 변환을 (최솟값, 폭) 두 수로 직접 계산할 수 있게 꺼내 둡니다.
+    if scaler is None:
+        return None
+    data_min = float(scaler.data_min_[0])
+    return data_min, float(scaler.data_max_[0]) - data_min or 1.0
+
+
+def with_inference_params(bundle):
+    # 예측 때는 Keras/sklearn 을 거치지 않도록 가중치 행렬과 정규화 값을 꺼내 bundle 에 함께 둡니다.
+    model = bundle["model"]
+    weights = model.weights if isinstance(model, NumpyMLP) else [np.asarray(w, dtype=float) for w in model.get_weights()]
+    return {
+        **bundle,
+        "weights": weights,
+        "x_minmax": minmax_params(bundle["scaler_x"]),
+        "y_minmax": minmax_params(bundle["scaler_y"]),
+    }
+
+
+def bundle_to_arrays(bundle):
+    arrays = {f"w{index}": np.asarray(weight, dtype=float) for index, weight in enumerate(bundle["model"].get_weights())}
+    arrays["losses"] = np.asarray(bundle["losses"], dtype=float)
+    arrays["train_pred"] = np.asarray(bundle["train_pred"], dtype=float)
+    arrays["architecture"] = np.array(bundle["architecture"])
+    arrays["requested_epochs"] = np.array(bundle["requested_epochs"])
+    arrays["stop_reason"] = np.array(bundle["stop_reason"])
+    for name in ("scaler_x", "scaler_y"):
+        scaler = bundle[name]
+        if scaler is not None:
+            arrays[name] = np.array([scaler.data_min_[0], scaler.data_max_[0]], dtype=float)
+    return arrays
+
+
+def bundle_from_arrays(arrays):
+    # 저장된 가중치는 어떤 방식으로 학습했든 넘파이 신경망으로 불러옵니다. (TensorFlow 불필요)
+    weights = [arrays[f"w{index}"] for index in range(6)]
+    return with_inference_params({
+        "model": NumpyMLP(weights),
+        "scaler_x": fitted_minmax_scaler(*arrays["scaler_x"]) if "scaler_x" in arrays else None,
+        "scaler_y": fitted_minmax_scaler(*arrays["scaler_y"]) if "scaler_y" in arrays else None,
+        "losses": np.asarray(arrays["losses"], dtype=float),
+        "train_pred": np.asarray(arrays["train_pred"], dtype=float),
+        "architecture": str(arrays["architecture"]),
+        "requested_epochs": int(arrays["requested_epochs"]) if "requested_epochs" in arrays else len(arrays["losses"]),
+        "stop_reason": str(arrays["stop_reason"]) if "stop_reason" in arrays else "",
+    })
+
+
+def model_store_key(x_values, y_values, use_scale, hidden1, hidden2, epochs):
+    return ModelStore.key_for(
+        x=[float(v) for v in x_values],
+        y=[float(v) for v in y_values],
+        use_scale=bool(use_scale),
+        hidden1=int(hidden1),
+        hidden2=int(hidden2),
+        epochs=int(epochs),
+        backend=DL_BACKEND,
+        learning_rate=DL_LEARNING_RATE,
+        seed=DL_SEED,
+        early_stopping=[DL_PATIENCE, DL_TOLERANCE, DL_MIN_EPOCHS] if DL_EARLY_STOPPING else None,
+    )
+
+
+def load_or_train_deep_learning(x_values, y_values, use_scale, hidden1=8, hidden2=4, epochs=30, on_epoch=None):
+    # 디스크에 같은 조건으로 학습한 결과가 있으면 파일만 읽고, 없으면 학습한 뒤 저장합니다.
+    if MODEL_STORE is None:
+        return train_deep_learning(x_values, y_values, use_scale, hidden1, hidden2, epochs, on_epoch)
+    store_key = model_store_key(x_values, y_values, use_scale, hidden1, hidden2, epochs)
+    arrays = MODEL_STORE.load(store_key)
+    if arrays is not None:
+        try:
+            return bundle_from_arrays(arrays)
+        except (KeyError, ValueError):
+            pass
+    bundle = train_deep_learning(x_values, y_values, use_scale, hidden1, hidden2, epochs, on_epoch)
+    # 시간 제한으로 멈춘 결과는 그때 서버가 얼마나 바빴는지에 따라 달라지므로 디스크에 남기지 않습니다.
+    if bundle["stop_reason"] != "time":
+        MODEL_STORE.save(store_key, bundle_to_arrays(bundle))
+    return bundle
+
+
+def deep_learning_key(x_values, y_values, use_scale, hidden1=8, hidden2=4, epochs=30):
+    return (tuple(x_values), tuple(y_values), bool(use_scale), int(hidden1), int(hidden2), int(epochs), DL_BACKEND)
+
+
+def run_deep_learning(x_values, y_values, use_scale, hidden1=8, hidden2=4, epochs=30, on_epoch=None):
+    key = deep_learning_key(x_values, y_values, use_scale, hidden1, hidden2, epochs)
+    bundle = MODEL_CACHE.get(key)
+    if bundle is None:
+        bundle = TRAINING_FLIGHTS.do(key, lambda: cached_or_train(key, x_values, y_values, use_scale, hidden1, hidden2, epochs, on_epoch))
+    return bundle
+
+
+def cached_or_train(key, x_values, y_values, use_scale, hidden1, hidden2, epochs, on_epoch=None):
+    # 앞선 학습이 캐시 확인과 이 호출 사이에 끝났을 수 있으므로 캐시를 한 번 더 봅니다.
+    bundle = MODEL_CACHE.get(key)
+    if bundle is None:
+        bundle = MODEL_CACHE.put(key, load_or_train_deep_learning(x_values, y_values, use_scale, hidden1, hidden2, epochs, on_epoch))
+    return bundle
+
+
+# ==========================================
+# 실시간 학습 (백그라운드 학습 + 학습 횟수별 손실 큐)
+# ==========================================
+def _training_executor():
+    global _TRAINING_EXECUTOR
+    with _TRAINING_LOCK:
+        if _TRAINING_EXECUTOR is None:
+            _TRAINING_EXECUTOR = ThreadPoolExecutor(max_workers=LIVE_TRAINING_THREADS, thread_name_prefix="data5-train")
+        return _TRAINING_EXECUTOR
+
+
+def deep_learning_ready(key, x_values, y_values, use_scale, hidden1, hidden2, epochs):
+    # 메모리 캐시나 디스크 저장소에 이미 있어 기다리지 않고 바로 쓸 수 있는지 확인합니다.
+    if MODEL_CACHE.contains(key):
+        return True
+    return MODEL_STORE is not None and MODEL_STORE.contains(model_store_key(x_values, y_values, use_scale, hidden1, hidden2, epochs))
+
+
+def start_training_job(x_values, y_values, use_scale, hidden1=8, hidden2=4, epochs=30):
+    # 같은 조건의 학습이 이미 돌고 있으면 새로 시작하지 않고 그 작업을 함께 봅니다.
+    key = deep_learning_key(x_values, y_values, use_scale, hidden1, hidden2, epochs)
+    executor = _training_executor()
+    with _TRAINING_LOCK:
+        if key in _TRAINING_JOBS:
+            return key
+        job = {"queue": queue.Queue(), "losses": [], "epochs": int(epochs), "future": None}
+        _TRAINING_JOBS[key] = job
+
+    def work():
+        try:
+            return run_deep_learning(
+                x_values, y_values, use_scale, hidden1, hidden2, epochs,
+                on_epoch=lambda epoch, loss: job["queue"].put(loss),
+            )
+        finally:
+            with _TRAINING_LOCK:
+                _TRAINING_JOBS.pop(key, None)
+
+    job["future"] = executor.submit(work)
+    return key
+
+
+def training_progress(key):
+    # 끝난(또는 모르는) 작업이면 None, 아니면 큐에 쌓인 손실을 옮겨 담은 뒤 (지금까지의 손실, 전체 학습 횟수)를 돌려줍니다.
+    with _TRAINING_LOCK:
+        job = _TRAINING_JOBS.get(key)
+        if job is None:
+            return None
+        while True:
+            try:
+                job["losses"].append(job["queue"].get_nowait())
+            except queue.Empty:
+                break
+        return list(job["losses"]), job["epochs"]
+
+
+def start_live_training(x_obs, y_obs, use_scale, hidden1=8, hidden2=4, epochs=30, dl_mask=None):
+    # 오래 걸리는 Keras 학습이 필요할 때만 백그라운드 학습을 시작해 작업 key 를 돌려줍니다.
+    # 넘파이 학습(수십 ms)이나 캐시·저장소에 있는 결과는 None 을 돌려주어 그 자리에서 바로 씁니다.
+    if not DL_LIVE_TRAINING or DL_BACKEND != "keras":
+        return None
+    x_dl, y_dl = deep_learning_inputs(x_obs, y_obs, dl_mask)
+    params = (tuple(x_dl), tuple(y_dl), bool(use_scale), int(hidden1), int(hidden2), int(epochs))
+    if deep_learning_ready(deep_learning_key(*params), *params):
+        return None
+    return start_training_job(*params)
+
+
+@_fragment(run_every=LIVE_POLL_INTERVAL)
+def live_training_fragment(key):
+    # 이 부분만 주기적으로 다시 그려 진행 막대와 손실 그래프를 보여 주고 바로 돌아갑니다.
+    # 학습이 끝나면 화면 전체를 한 번 다시 그려, 캐시에 올라간 결과로 딥러닝 내용을 채웁니다.
+    progress = training_progress(key)
+    if progress is None:
+        st.rerun()
+    losses, epochs = progress
+    st.markdown(pretty_title("딥러닝 학습 진행 상황", "#ede7f6", "#d1c4e9"), unsafe_allow_html=True)
+    st.progress(min(len(losses) / epochs, 1.0), text=f"딥러닝이 학습하는 중입니다... ({len(losses)}/{epochs}회)")
+    if losses:
+        st.line_chart(pd.DataFrame({"손실": losses}, index=pd.RangeIndex(1, len(losses) + 1, name="학습 횟수")), height=220)
+
+
+def keep_widget_values(keys):
+    # 이번 실행에서 그리지 않는 입력 칸의 값을 session_state 에 다시 넣어, 다음 실행까지 남아 있게 합니다.
+    for key in keys:
+        if key in st.session_state:
+            st.session_state[key] = st.session_state[key]
+
+
+def preload_precomputed_models():
+    # 서버 시작 때 각 내장 데이터의 기본 설정(기본 x/y, 정규화, 8-4 뉴런, 15회) 결과를
+    # 미리 계산해 둔 저장소에서 메모리 캐시로 올려 둡니다. 저장소에 없는 조합은 건너뜁니다.
+    if MODEL_STORE is None:
+        return 0
+    loaded = 0
+    for name, info in DATASETS.items():
+        split = dataset_split(current_dataset(name, info["default_x"], info["default_y"]))
+        params = (tuple(split["x_dl"]), tuple(split["y_dl"]), True, 8, 4, 15)
+        if not MODEL_STORE.contains(model_store_key(*params)):
+            continue
+        run_deep_learning(*params)
+        loaded += 1
+    return loaded
+
+
+def new_early_stopper():
+    if not DL_EARLY_STOPPING:
+        return None
+    return EarlyStopper(DL_PATIENCE, DL_TOLERANCE, DL_TIME_BUDGET, DL_MIN_EPOCHS)
+
+
+def record_training_budget(requested, trained):
+    with _TRAINING_LOCK:
+        _EPOCH_STATS["models"] += 1
+        _EPOCH_STATS["requested"] += int(requested)
+        _EPOCH_STATS["trained"] += int(trained)
+
+
+def training_budget_stats():
+    # 지금까지 학습한 모델들이 정한 학습 횟수 중 실제로 몇 번을 학습했는지 (조기 종료로 아낀 계산량)
+    with _TRAINING_LOCK:
+        stats = dict(_EPOCH_STATS)
+    stats["saved_ratio"] = 1.0 - stats["trained"] / stats["requested"] if stats["requested"] else 0.0
+    return stats
+
+
+def training_pool():
+    return get_training_pool() if USE_TRAINING_POOL else None
+
+
+def train_deep_learning(x_values, y_values, use_scale, hidden1=8, hidden2=4, epochs=30, on_epoch=None):
+    # 학습 실행기가 있으면 빈 학습 칸(프로세스)에서, 없으면 이 프로세스에서 학습합니다.
+    pool = training_pool()
+    if pool is None:
+        bundle = train_deep_learning_here(x_values, y_values, use_scale, hidden1, hidden2, epochs, on_epoch)
+    else:
+        args = (tuple(x_values), tuple(y_values), bool(use_scale), int(hidden1), int(hidden2), int(epochs))
+        bundle = bundle_from_arrays(pool.run(train_deep_learning_arrays, args, on_epoch))
+    record_training_budget(epochs, len(bundle["losses"]))
+    return bundle
+
+
+def train_deep_learning_arrays(x_values, y_values, use_scale, hidden1=8, hidden2=4, epochs=30, on_epoch=None):
+    # 학습 칸 프로세스에서 실행됩니다. Keras 모델은 프로세스 밖으로 옮길 수 없어 저장소와 같은 배열로 돌려줍니다.
+    return bundle_to_arrays(train_deep_learning_here(x_values, y_values, use_scale, hidden1, hidden2, epochs, on_epoch))
+
+
+def training_pool_stats():
+    pool = training_pool()
+    return pool.stats() if pool is not None else None
+
+
+def model_server_stats_panel():
+    # 교사용: 모델 캐시 적중·내보냄, 동시 요청 공유, 조기 종료로 아낀 학습 횟수, 학습 칸 대기 현황
+    if not teacher_password():
+        return
+    with st.expander("👩‍🏫 교사용: 딥러닝 학습 통계"):
+        if not teacher_unlocked("d5_stats"):
+            return
+        cache = model_cache_stats()
+        flights = cache.pop("flights")
+        budget = training_budget_stats()
+        rows = [
+            ("모델 캐시", "적중 / 실패", f"{cache['hits']} / {cache['misses']}"),
+            ("모델 캐시", "내보낸 모델 수", str(cache["evictions"])),
+            ("모델 캐시", "보관 모델 수", str(cache["entries"])),
+            ("모델 캐시", "사용량", f"{cache['bytes'] / 1024 / 1024:.1f} / {cache['max_bytes'] / 1024 / 1024:.0f} MB"),
+            ("동시 요청", "학습 / 함께 기다림", f"{flights['runs']} / {flights['shared']}"),
+            ("조기 종료", "정한 학습 횟수 / 실제 학습 횟수", f"{budget['requested']} / {budget['trained']}"),
+            ("조기 종료", "아낀 비율", f"{budget['saved_ratio']:.0%}"),
+        ]
+        pool = training_pool_stats()
+        if pool is not None:
+            rows += [("학습 칸", name, str(value)) for name, value in pool.items()]
+        st.dataframe(pd.DataFrame(rows, columns=["구분", "항목", "값"]), use_container_width=True, hide_index=True)
+
+
+def train_deep_learning_here(x_values, y_values, use_scale, hidden1=8, hidden2=4, epochs=30, on_epoch=None):
     x = np.asarray(x_values, dtype=float).reshape(-1, 1)
     y = np.asarray(y_values, dtype=float).reshape(-1, 1)
 
@@ -867,55 +1347,73 @@ def run_deep_learning(x_values, y_values, use_scale, hidden1=8, hidden2=4, epoch
         x_train = scaler_x.fit_transform(x)
         y_train = scaler_y.fit_transform(y)
 
-    tf.keras.backend.clear_session()
-    tf.keras.utils.set_random_seed(42)
-    model = Sequential(
-        [
-            Input(shape=(1,)),
-            Dense(hidden1, activation="relu"),
-            Dense(hidden2, activation="relu"),
-            Dense(1, activation="linear"),
-        ]
-    )
-    model.compile(optimizer=Adam(0.01), loss="mse")
-    history = model.fit(
-        x_train,
-        y_train,
-        epochs=int(epochs),
-        batch_size=min(len(x_train), 8),
-        verbose=0,
-    )
+    batch_size = min(len(x_train), 8)
+    stopper = new_early_stopper()
+    if DL_BACKEND == "keras":
+        model, losses = train_keras_model(x_train, y_train, hidden1, hidden2, epochs, batch_size, on_epoch, stopper)
+    else:
+        model, losses = train_mlp(
+            x_train,
+            y_train,
+            hidden1=int(hidden1),
+            hidden2=int(hidden2),
+            epochs=int(epochs),
+            learning_rate=DL_LEARNING_RATE,
+            batch_size=batch_size,
+            seed=DL_SEED,
+            on_epoch=on_epoch,
+            stopper=stopper,
+        )
     y_pred_train = model.predict(x_train, verbose=0)
     y_pred = scaler_y.inverse_transform(y_pred_train).reshape(-1) if use_scale else y_pred_train.reshape(-1)
-    return {
+    return with_inference_params({
         "model": model,
         "scaler_x": scaler_x,
         "scaler_y": scaler_y,
-        "losses": np.asarray(history.history["loss"], dtype=float),
+        "losses": np.asarray(losses, dtype=float),
         "train_pred": np.asarray(y_pred, dtype=float),
         "architecture": f"1-{hidden1}-{hidden2}-1",
-    }
+        "requested_epochs": int(epochs),
+        "stop_reason": stopper.reason if stopper is not None and stopper.reason else "",
+    })
 
 
 def nn_predict(bundle, x_values):
-    x = np.asarray(x_values, dtype=float).reshape(-1, 1)
-    x_input = bundle["scaler_x"].transform(x) if bundle["scaler_x"] is not None else x
-    y_hat = bundle["model"].predict(x_input, verbose=0)
-    if bundle["scaler_y"] is not None:
-        return bundle["scaler_y"].inverse_transform(y_hat).reshape(-1)
-    return y_hat.reshape(-1)
+    # 넘파이 행렬 곱 몇 번으로 끝나는 예측입니다. (Keras predict 를 부르지 않음)
+    x = np.asarray(x_values, dtype=float).reshape(-1)
+    if bundle["x_minmax"] is not None:
+        x_min, x_span = bundle["x_minmax"]
+        x = (x - x_min) / x_span
+    y_hat = infer(bundle["weights"], x)
+    if bundle["y_minmax"] is not None:
+        y_min, y_span = bundle["y_minmax"]
+        y_hat = y_hat * y_span + y_min
+    return y_hat
+
+
+def deep_learning_mask(x_obs, y_obs):
+    # 딥러닝은 IQR 이상치를 뺀 자료로 학습합니다. (남는 자료가 4개 미만이면 모두 사용)
+    dl_mask = iqr_inlier_mask(x_obs, y_obs)
+    if int(np.sum(dl_mask)) < 4:
+        dl_mask = np.ones_like(dl_mask, dtype=bool)
+    return dl_mask
+
+
+def deep_learning_inputs(x_obs, y_obs, dl_mask=None):
+    # 준비된 자료(dataset_split)의 dl_mask 를 넘기면 이상치를 다시 찾지 않습니다.
+    x_obs = np.asarray(x_obs, dtype=float)
+    y_obs = np.asarray(y_obs, dtype=float)
+    if dl_mask is None:
+        dl_mask = deep_learning_mask(x_obs, y_obs)
+    return x_obs[dl_mask], y_obs[dl_mask]
 
 
-def get_model_results(x_obs, y_obs, use_scale, hidden1=8, hidden2=4, epochs=30):
+def get_model_results(x_obs, y_obs, use_scale, hidden1=8, hidden2=4, epochs=30, dl_mask=None):
     x_obs = np.asarray(x_obs, dtype=float)
     y_obs = np.asarray(y_obs, dtype=float)
     line_result = run_poly_regression(tuple(x_obs), tuple(y_obs), 1)
     quad_result = run_poly_regression(tuple(x_obs), tuple(y_obs), 2)
-    dl_mask = iqr_inlier_mask(x_obs, y_obs)
-    if int(np.sum(dl_mask)) < 4:
-        dl_mask = np.ones_like(x_obs, dtype=bool)
-    x_dl = x_obs[dl_mask]
-    y_dl = y_obs[dl_mask]
+    x_dl, y_dl = deep_learning_inputs(x_obs, y_obs, dl_mask)
     dl_result_raw = run_deep_learning(tuple(x_dl), tuple(y_dl), bool(use_scale), int(hidden1), int(hidden2), int(epochs))
     dl_result = {
         **dl_result_raw,
@@ -952,6 +1450,135 @@ def get_model_results(x_obs, y_obs, use_scale, hidden1=8, hidden2=4, epochs=30):
     }
 
 
+@st.cache_data(show_spinner=False)
+def run_structure_sweep(
+    x_obs,
+    y_obs,
+    use_scale,
+    hidden1_options,
+    hidden2_options,
+    epoch_options,
+    seed_count=SWEEP_SEED_COUNT,
+    dl_mask=None,
+    scaling=None,
+):
+    # 고른 (1층, 2층) 구조 x seed 신경망을 한꺼번에 학습하고, 학습 횟수별로 떼어 둔 결과를
+    # 본 학습과 같은 기준(관찰 데이터 전체의 손실, 평균 오차, R²)으로 평가해 seed 평균 표로 돌려줍니다.
+    x_obs = np.asarray(x_obs, dtype=float)
+    y_obs = np.asarray(y_obs, dtype=float)
+    x_dl, y_dl = deep_learning_inputs(x_obs, y_obs, None if dl_mask is None else np.asarray(dl_mask, dtype=bool))
+    x_train, y_train, meta = preprocess_values(x_dl, y_dl, use_scale, scaling)
+    results = train_mlp_sweep(
+        x_train,
+        y_train,
+        [(hidden1, hidden2) for hidden1 in hidden1_options for hidden2 in hidden2_options],
+        learning_rate=DL_LEARNING_RATE,
+        batch_size=min(len(x_train), 8),
+        seeds=tuple(DL_SEED + index for index in range(int(seed_count))),
+        checkpoints=epoch_options,
+        new_stopper=new_early_stopper,
+    )
+    x_input = transform_x(x_obs, meta)
+    rows = []
+    for item in results:
+        preds = inverse_y(infer(item["model"].weights, x_input), meta)
+        rows.append(
+            {
+                "구조": f"1-{item['hidden1']}-{item['hidden2']}-1",
+                "학습 횟수": item["epochs"],
+                "손실": sse(y_obs, preds),
+                "평균 오차": mae(y_obs, preds),
+                "설명력(R²)": float(r2_score(y_obs, preds)),
+            }
+        )
+    table = pd.DataFrame(rows).groupby(["구조", "학습 횟수"], as_index=False, sort=False).agg(
+        손실=("손실", "mean"),
+        평균_오차=("평균 오차", "mean"),
+        설명력=("설명력(R²)", "mean"),
+        흔들림=("설명력(R²)", "std"),
+    )
+    table.columns = ["구조", "학습 횟수", "손실", "평균 오차", "설명력(R²)", "R² 흔들림(seed)"]
+    return table.fillna(0.0).round(3).sort_values("설명력(R²)", ascending=False, ignore_index=True)
+
+
+def validation_folds(count, folds=VALIDATION_FOLDS):
+    # 자료 순서와 상관없이 섞어서 폴드 번호를 나눕니다. (같은 자료면 늘 같은 나눔)
+    order = np.random.default_rng(DL_SEED).permutation(count)
+    fold_ids = np.empty(count, dtype=int)
+    fold_ids[order] = np.arange(count) % max(1, min(int(folds), count))
+    return fold_ids
+
+
+def nn_heldout_residuals(x_obs, y_obs, use_scale, hidden1, hidden2, epochs, fold_sets, dl_mask=None):
+    # fold_sets 의 폴드 하나마다 신경망 하나: 그 폴드를 뺀 (이상치 제외) 점으로 정규화·학습하고 뺀 점을 예측합니다.
+    # 모든 폴드의 신경망을 train_mlp_folds 로 한 번에 학습하며, 폴드마다 본 학습과 같은 미니배치 크기·조기 종료 기준을 씁니다.
+    inlier = deep_learning_mask(x_obs, y_obs) if dl_mask is None else dl_mask
+    heldout_rows = [fold_ids == fold for fold_ids in fold_sets for fold in np.unique(fold_ids)]
+    x_sets, y_sets, train_masks, metas = [], [], [], []
+    for rows in heldout_rows:
+        train_rows = inlier & ~rows
+        if train_rows.sum() < 2:
+            train_rows = ~rows
+        _, _, meta = preprocess_values(x_obs[train_rows], y_obs[train_rows], use_scale)
+        x_sets.append(transform_x(x_obs, meta))
+        y_span = (meta["y_max"] - meta["y_min"] or 1.0) if use_scale else 1.0
+        y_sets.append((y_obs - meta["y_min"]) / y_span if use_scale else y_obs)
+        train_masks.append(train_rows)
+        metas.append(meta)
+    models = train_mlp_folds(
+        x_sets,
+        y_sets,
+        train_masks,
+        int(hidden1),
+        int(hidden2),
+        int(epochs),
+        learning_rate=DL_LEARNING_RATE,
+        batch_size=8,
+        seed=DL_SEED,
+        new_stopper=new_early_stopper,
+    )
+    residuals = []
+    for fold_ids in fold_sets:
+        result = np.empty_like(y_obs)
+        for fold in np.unique(fold_ids):
+            rows = heldout_rows.pop(0)
+            model = models.pop(0)
+            meta = metas.pop(0)
+            result[rows] = y_obs[rows] - inverse_y(infer(model.weights, transform_x(x_obs[rows], meta)), meta)
+        residuals.append(result)
+    return residuals
+
+
+@st.cache_data(show_spinner=False)
+def run_validation(x_obs, y_obs, use_scale, hidden1=8, hidden2=4, epochs=30, dl_mask=None):
+    # 한 점씩 뺀 검증(LOO)과 k겹 검증으로, 학습에 쓰지 않은 점을 얼마나 잘 맞히는지 잽니다.
+    # 직선/2차 회귀는 다시 맞추지 않고 영향 행렬 공식으로, 딥러닝은 모든 폴드를 한 번에 학습해 구합니다.
+    x_obs = np.asarray(x_obs, dtype=float)
+    y_obs = np.asarray(y_obs, dtype=float)
+    dl_mask = None if dl_mask is None else np.asarray(dl_mask, dtype=bool)
+    loo_ids = np.arange(len(x_obs))
+    kfold_ids = validation_folds(len(x_obs))
+    fit = polynomial_fit(x_obs, y_obs, 2)
+    residual_map = {
+        "직선 회귀": (fit.loo_residuals(1), fit.kfold_residuals(1, kfold_ids)),
+        "2차 회귀": (fit.loo_residuals(2), fit.kfold_residuals(2, kfold_ids)),
+        "딥러닝": tuple(nn_heldout_residuals(x_obs, y_obs, use_scale, hidden1, hidden2, epochs, (loo_ids, kfold_ids), dl_mask)),
+    }
+    total = float(np.sum((y_obs - y_obs.mean()) ** 2)) or 1.0
+    fold_count = int(kfold_ids.max()) + 1
+    rows = []
+    for name, (loo, kfold) in residual_map.items():
+        rows.append(
+            {
+                "모델": name,
+                "LOO 평균 오차": round(float(np.mean(np.abs(loo))), 3),
+                f"{fold_count}겹 평균 오차": round(float(np.mean(np.abs(kfold))), 3),
+                "LOO 설명력(R²)": round(1.0 - float(np.sum(loo ** 2)) / total, 3),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
 def predict_models(model_results, x_values):
     x_values = np.asarray(x_values, dtype=float)
     return {
@@ -1002,7 +1629,7 @@ def iqr_inlier_mask(x_values, y_values):
 def make_preprocess_figure(dataset, split, use_scale):
     fig = Figure(figsize=(8.2, 3.7))
     axes = fig.subplots(1, 2)
-    mask = iqr_inlier_mask(split["x_obs"], split["y_obs"])
+    mask = split["inlier_mask"]
     removed_count = int(np.size(mask) - np.sum(mask))
 
     axes[0].scatter(split["x_obs"][mask], split["y_obs"][mask], s=60, color="#1976d2", label="일반 데이터")
@@ -1051,7 +1678,13 @@ def make_training_loss_figure(model_results):
     fig = Figure(figsize=(7.0, 3.6))
     ax = fig.subplots()
     losses = model_results["nn_model"]["losses"]
+    requested = model_results["nn_model"].get("requested_epochs", len(losses))
     ax.plot(np.arange(1, len(losses) + 1), losses, color="#d81b60", linewidth=2.2)
+    if len(losses) < requested:
+        # 일찍 멈춘 경우에도 정한 학습 횟수까지 축을 그려서 얼마나 아꼈는지 보이게 합니다.
+        ax.axvline(len(losses), color="#90a4ae", linestyle="--", linewidth=1.2, label=f"{len(losses)}회에서 멈춤")
+        ax.set_xlim(0.5, requested + 0.5)
+        ax.legend(loc="upper right")
     ax.set_title("딥러닝 학습 손실 변화")
     ax.set_xlabel("학습 횟수")
     ax.set_ylabel("손실(MSE)")
@@ -1192,7 +1825,7 @@ def build_mission_rows(dataset, split, use_scale, model_results, student_guess,
     line_pred = float(hidden_preds["직선 회귀"][0])
     quad_pred = float(hidden_preds["2차 회귀"][0])
     dl_pred = float(hidden_preds["딥러닝"][0])
-    outlier_removed = int(len(split["x_obs"]) - np.sum(iqr_inlier_mask(split["x_obs"], split["y_obs"])))
+    outlier_removed = int(len(split["x_obs"]) - np.sum(split["inlier_mask"]))
     final_text = "실제값을 아직 확인하지 않았습니다."
     if reveal:
         final_text = (
@@ -1485,6 +2118,25 @@ def run():
                     )
                     st.selectbox("종속 변수 선택(y)", valid_y_options, key="d5_y_col", label_visibility="collapsed")
                 st.caption("각 분야마다 실제 데이터셋 2개 중 하나를 고르고, 학생이 이해하기 쉬운 4~5개 안팎의 변수 중에서 독립 변수와 종속 변수를 직접 선택할 수 있습니다. 시간 변수가 있는 자료는 시간 흐름 자체도 함께 탐구할 수 있습니다.")
+                recommended = get_stats_index().recommended_pairs(st.session_state["d5_dataset"], catalog="data5")
+                if recommended:
+                    with st.expander("🔎 추천 변수 쌍 (관계가 뚜렷한 순서)"):
+                        st.caption("직선 회귀와 2차 회귀 중 더 잘 맞는 쪽의 설명력(R²)이 높은 순서입니다. 버튼을 누르면 x, y 변수가 바로 바뀝니다.")
+                        for rank, pair in enumerate(recommended, start=1):
+                            pair_text, pair_button = st.columns([3, 1])
+                            with pair_text:
+                                st.markdown(
+                                    f"**{rank}. {pair['x']} → {pair['y']}**  \n"
+                                    f"상관계수 {pair['corr']:.2f} · 직선 R² {pair['line_r2']:.2f} · 2차 R² {pair['quad_r2']:.2f}"
+                                )
+                            with pair_button:
+                                st.button(
+                                    "이 쌍 선택",
+                                    key=f"d5_recommended_pair_{rank}",
+                                    on_click=apply_recommended_pair,
+                                    args=(pair["x"], pair["y"]),
+                                    disabled=(pair["x"], pair["y"]) == (st.session_state["d5_x_col"], st.session_state["d5_y_col"]),
+                                )
         with st.container(border=True):
             st.markdown(
                 "<div style='font-size:1.05rem; font-weight:800; color:#4a148c; "
@@ -1563,13 +2215,14 @@ def run():
         index=[f"행{i}" for i in range(1, len(selected_matrix) + 1)],
         columns=[f"열1: {dataset['x_label']}", f"열2: {dataset['y_label']}"],
     )
-    first_mean = round(float(np.mean(dataset["x"])), 3)
-    second_mean = round(float(np.mean(dataset["y"])), 3)
-    corr_value = round(float(np.corrcoef(dataset["x"], dataset["y"])[0, 1]), 3)
-    first_min = round(float(np.min(dataset["x"])), 3)
-    second_min = round(float(np.min(dataset["y"])), 3)
-    first_max = round(float(np.max(dataset["x"])), 3)
-    second_max = round(float(np.max(dataset["y"])), 3)
+    x_stats, y_stats, pair_corr = selection_stats(dataset)
+    first_mean = round(x_stats["mean"], 3)
+    second_mean = round(y_stats["mean"], 3)
+    corr_value = round(pair_corr, 3)
+    first_min = round(x_stats["min"], 3)
+    second_min = round(y_stats["min"], 3)
+    first_max = round(x_stats["max"], 3)
+    second_max = round(y_stats["max"], 3)
     corr_abs = abs(corr_value)
     if corr_abs >= 0.7:
         corr_strength = "강한 관계"
@@ -1717,121 +2370,205 @@ def run():
                 with inner3:
                     st.slider("학습 횟수", 10, 30, step=5, key="d5_epochs")
 
-        model_results = get_model_results(
+        live_key = start_live_training(
             split["x_obs"],
             split["y_obs"],
             st.session_state["d5_use_scale"],
             st.session_state["d5_hidden1"],
             st.session_state["d5_hidden2"],
             st.session_state["d5_epochs"],
+            split["dl_mask"],
         )
-        st.markdown(pretty_title("딥러닝 구조와 학습 변화 보기", "#ede7f6", "#d1c4e9"), unsafe_allow_html=True)
-        st.caption(
-            f"뉴런 수를 바꾸면 구조 그림의 동그라미 수가 바로 바뀌고, 학습 횟수에 따라 손실 변화 그래프도 함께 달라집니다. "
-            f"현재는 관찰 데이터 {len(split['x_obs'])}개 중 이상치 후보 {model_results['nn_model']['removed_count']}개를 제외한 "
-            f"{model_results['nn_model']['fit_count']}개로 딥러닝을 학습합니다."
-        )
-        dl_viz1, dl_viz2 = st.columns(2)
-        with dl_viz1:
-            st.pyplot(
-                make_dynamic_network_figure(
-                    st.session_state["d5_hidden1"],
-                    st.session_state["d5_hidden2"],
-                ),
-                use_container_width=True,
+        if live_key is not None:
+            # 학습하는 동안에는 진행 상황만 fragment 로 보여 주고, 끝나면 fragment 가 화면 전체를 한 번 다시 그립니다.
+            live_training_fragment(live_key)
+            keep_widget_values(MODEL_WIDGET_KEYS)
+        else:
+            model_results = get_model_results(
+                split["x_obs"],
+                split["y_obs"],
+                st.session_state["d5_use_scale"],
+                st.session_state["d5_hidden1"],
+                st.session_state["d5_hidden2"],
+                st.session_state["d5_epochs"],
+                split["dl_mask"],
             )
-        with dl_viz2:
-            st.pyplot(make_training_loss_figure(model_results), use_container_width=True)
-        active_ml_name = selected_ml_name(st.session_state["d5_ml_degree"])
-        active_ml_display_name = selected_ml_display_name(st.session_state["d5_ml_degree"])
-        metrics_df = model_results["metrics_df"]
-        ml_loss = float(metrics_df.loc[metrics_df["모델"] == active_ml_name, "손실"].iloc[0])
-        dl_loss = float(metrics_df.loc[metrics_df["모델"] == "딥러닝", "손실"].iloc[0])
-        ml_formula_text = selected_ml_latex(model_results, st.session_state["d5_ml_degree"]).replace("{", "").replace("}", "")
-        dl_architecture = model_results["nn_model"]["architecture"]
-
-        st.markdown(pretty_title("모델 비교 결과 보기", "#fff8e1", "#ffecb3"), unsafe_allow_html=True)
-        formula_col, structure_col = st.columns(2)
-        with formula_col:
-            st.markdown(
-                f"""
-                <div style='
-                    min-height:238px;
-                    display:flex;
-                    flex-direction:column;
-                    justify-content:space-between;
-                    background:#f4f9ff;
-                    border:1px solid #90caf9;
-                    border-left:6px solid #1976d2;
-                    border-radius:12px;
-                    padding:16px 18px;
-                '>
-                    <div>
-                        <div style='font-size:0.92rem; color:#1565c0; font-weight:800; margin-bottom:8px;'>머신러닝</div>
-                        <div style='font-size:1.25rem; color:#263238; font-weight:900; line-height:1.35;'>{ml_formula_text}</div>
-                        <div style='font-size:0.84rem; color:#546e7a; margin-top:8px;'>현재 선택한 모델: {active_ml_display_name}</div>
-                    </div>
-                    <div style='background:#ffffff; border:1px solid #bbdefb; border-radius:10px; padding:10px 12px; margin-top:14px;'>
-                        <div style='font-size:0.86rem; color:#1565c0; font-weight:800; margin-bottom:4px;'>손실</div>
-                        <div style='font-size:1.45rem; color:#263238; font-weight:900;'>{ml_loss:.3f}</div>
-                        <div style='font-size:0.82rem; color:#546e7a; margin-top:4px;'>작을수록 실제 자료에 더 가깝습니다.</div>
-                    </div>
-                </div>
-                """,
-                unsafe_allow_html=True,
+            st.markdown(pretty_title("딥러닝 구조와 학습 변화 보기", "#ede7f6", "#d1c4e9"), unsafe_allow_html=True)
+            st.caption(
+                f"뉴런 수를 바꾸면 구조 그림의 동그라미 수가 바로 바뀌고, 학습 횟수에 따라 손실 변화 그래프도 함께 달라집니다. "
+                f"현재는 관찰 데이터 {len(split['x_obs'])}개 중 이상치 후보 {model_results['nn_model']['removed_count']}개를 제외한 "
+                f"{model_results['nn_model']['fit_count']}개로 딥러닝을 학습합니다."
             )
-        with structure_col:
-            st.markdown(
-                f"""
-                <div style='
-                    min-height:238px;
-                    display:flex;
-                    flex-direction:column;
-                    justify-content:space-between;
-                    background:#fff8e1;
-                    border:1px solid #ffcc80;
-                    border-left:6px solid #fb8c00;
-                    border-radius:12px;
-                    padding:16px 18px;
-                '>
-                    <div>
-                        <div style='font-size:0.92rem; color:#ef6c00; font-weight:800; margin-bottom:8px;'>딥러닝</div>
-                        <div style='font-size:1.85rem; color:#263238; font-weight:900; line-height:1.2;'>{dl_architecture}</div>
-                        <div style='font-size:0.84rem; color:#546e7a; margin-top:8px;'>입력-1층-2층-출력 순서입니다.</div>
+            dl_viz1, dl_viz2 = st.columns(2)
+            with dl_viz1:
+                st.pyplot(
+                    make_dynamic_network_figure(
+                        st.session_state["d5_hidden1"],
+                        st.session_state["d5_hidden2"],
+                    ),
+                    use_container_width=True,
+                )
+            with dl_viz2:
+                st.pyplot(make_training_loss_figure(model_results), use_container_width=True)
+            stopped_epochs = len(model_results["nn_model"]["losses"])
+            requested_epochs = model_results["nn_model"].get("requested_epochs", stopped_epochs)
+            if stopped_epochs < requested_epochs:
+                stop_text = "손실이 더 이상 크게 줄지 않아" if model_results["nn_model"].get("stop_reason") == "plateau" else "정해진 학습 시간이 지나"
+                st.caption(
+                    f"⏱️ {stop_text} 학습 횟수 {requested_epochs}회 중 {stopped_epochs}회에서 학습을 멈췄습니다. "
+                    f"(계산량 {100 * (1 - stopped_epochs / requested_epochs):.0f}% 절약)"
+                )
+            with st.expander("🔬 구조 비교: 여러 딥러닝 구조를 한꺼번에 학습해 비교하기"):
+                st.caption(
+                    f"고른 1층·2층 뉴런 수의 모든 조합을 서로 다른 seed(시작 가중치와 자료를 섞는 순서) {SWEEP_SEED_COUNT}개로 동시에 학습합니다. "
+                    "표의 값은 seed 평균이고, 'R² 흔들림'이 클수록 시작 가중치와 학습 순서에 따라 결과가 많이 달라지는 구조입니다. "
+                    "본 학습과 같이 손실이 더 줄지 않으면 정한 학습 횟수보다 일찍 멈춥니다."
+                )
+                sweep_col1, sweep_col2, sweep_col3 = st.columns(3)
+                with sweep_col1:
+                    sweep_hidden1 = st.multiselect("1층 뉴런 수", SWEEP_HIDDEN1_OPTIONS, default=SWEEP_DEFAULT_HIDDEN1, key="d5_sweep_hidden1")
+                with sweep_col2:
+                    sweep_hidden2 = st.multiselect("2층 뉴런 수", SWEEP_HIDDEN2_OPTIONS, default=SWEEP_DEFAULT_HIDDEN2, key="d5_sweep_hidden2")
+                with sweep_col3:
+                    sweep_epochs = st.multiselect("학습 횟수", SWEEP_EPOCH_OPTIONS, default=SWEEP_DEFAULT_EPOCHS, key="d5_sweep_epochs")
+                # 결과 표는 만든 자료·변수·정규화 조건과 함께 저장하고, 조건이 바뀌면 보여 주지 않습니다.
+                sweep_signature = (
+                    dataset["name"],
+                    dataset["x_column"],
+                    dataset["y_column"],
+                    tuple(split["x_obs"]),
+                    tuple(split["y_obs"]),
+                    bool(st.session_state["d5_use_scale"]),
+                )
+                if st.session_state.get("d5_sweep_result", {}).get("signature") != sweep_signature:
+                    st.session_state.pop("d5_sweep_result", None)
+                if not (sweep_hidden1 and sweep_hidden2 and sweep_epochs):
+                    st.info("뉴런 수와 학습 횟수를 하나 이상씩 골라 주세요.")
+                elif st.button("구조 비교 학습하기", key="d5_sweep_run", use_container_width=True):
+                    st.session_state["d5_sweep_result"] = {
+                        "signature": sweep_signature,
+                        "table": run_structure_sweep(
+                            tuple(split["x_obs"]),
+                            tuple(split["y_obs"]),
+                            bool(st.session_state["d5_use_scale"]),
+                            tuple(sorted(sweep_hidden1)),
+                            tuple(sorted(sweep_hidden2)),
+                            tuple(sorted(sweep_epochs)),
+                            dl_mask=tuple(split["dl_mask"]),
+                            scaling=split["scaling"][bool(st.session_state["d5_use_scale"])],
+                        ),
+                    }
+                sweep_result = st.session_state.get("d5_sweep_result")
+                if sweep_result is not None:
+                    show_pretty_table(sweep_result["table"], height=280)
+            active_ml_name = selected_ml_name(st.session_state["d5_ml_degree"])
+            active_ml_display_name = selected_ml_display_name(st.session_state["d5_ml_degree"])
+            metrics_df = model_results["metrics_df"]
+            ml_loss = float(metrics_df.loc[metrics_df["모델"] == active_ml_name, "손실"].iloc[0])
+            dl_loss = float(metrics_df.loc[metrics_df["모델"] == "딥러닝", "손실"].iloc[0])
+            ml_formula_text = selected_ml_latex(model_results, st.session_state["d5_ml_degree"]).replace("{", "").replace("}", "")
+            dl_architecture = model_results["nn_model"]["architecture"]
+
+            st.markdown(pretty_title("모델 비교 결과 보기", "#fff8e1", "#ffecb3"), unsafe_allow_html=True)
+            formula_col, structure_col = st.columns(2)
+            with formula_col:
+                st.markdown(
+                    f"""
+                    <div style='
+                        min-height:238px;
+                        display:flex;
+                        flex-direction:column;
+                        justify-content:space-between;
+                        background:#f4f9ff;
+                        border:1px solid #90caf9;
+                        border-left:6px solid #1976d2;
+                        border-radius:12px;
+                        padding:16px 18px;
+                    '>
+                        <div>
+                            <div style='font-size:0.92rem; color:#1565c0; font-weight:800; margin-bottom:8px;'>머신러닝</div>
+                            <div style='font-size:1.25rem; color:#263238; font-weight:900; line-height:1.35;'>{ml_formula_text}</div>
+                            <div style='font-size:0.84rem; color:#546e7a; margin-top:8px;'>현재 선택한 모델: {active_ml_display_name}</div>
+                        </div>
+                        <div style='background:#ffffff; border:1px solid #bbdefb; border-radius:10px; padding:10px 12px; margin-top:14px;'>
+                            <div style='font-size:0.86rem; color:#1565c0; font-weight:800; margin-bottom:4px;'>손실</div>
+                            <div style='font-size:1.45rem; color:#263238; font-weight:900;'>{ml_loss:.3f}</div>
+                            <div style='font-size:0.82rem; color:#546e7a; margin-top:4px;'>작을수록 실제 자료에 더 가깝습니다.</div>
+                        </div>
                     </div>
-                    <div style='background:#ffffff; border:1px solid #ffcc80; border-radius:10px; padding:10px 12px; margin-top:14px;'>
-                        <div style='font-size:0.86rem; color:#ef6c00; font-weight:800; margin-bottom:4px;'>손실</div>
-                        <div style='font-size:1.45rem; color:#263238; font-weight:900;'>{dl_loss:.3f}</div>
-                        <div style='font-size:0.82rem; color:#546e7a; margin-top:4px;'>작을수록 실제 자료에 더 가깝습니다.</div>
+                    """,
+                    unsafe_allow_html=True,
+                )
+            with structure_col:
+                st.markdown(
+                    f"""
+                    <div style='
+                        min-height:238px;
+                        display:flex;
+                        flex-direction:column;
+                        justify-content:space-between;
+                        background:#fff8e1;
+                        border:1px solid #ffcc80;
+                        border-left:6px solid #fb8c00;
+                        border-radius:12px;
+                        padding:16px 18px;
+                    '>
+                        <div>
+                            <div style='font-size:0.92rem; color:#ef6c00; font-weight:800; margin-bottom:8px;'>딥러닝</div>
+                            <div style='font-size:1.85rem; color:#263238; font-weight:900; line-height:1.2;'>{dl_architecture}</div>
+                            <div style='font-size:0.84rem; color:#546e7a; margin-top:8px;'>입력-1층-2층-출력 순서입니다.</div>
+                        </div>
+                        <div style='background:#ffffff; border:1px solid #ffcc80; border-radius:10px; padding:10px 12px; margin-top:14px;'>
+                            <div style='font-size:0.86rem; color:#ef6c00; font-weight:800; margin-bottom:4px;'>손실</div>
+                            <div style='font-size:1.45rem; color:#263238; font-weight:900;'>{dl_loss:.3f}</div>
+                            <div style='font-size:0.82rem; color:#546e7a; margin-top:4px;'>작을수록 실제 자료에 더 가깝습니다.</div>
+                        </div>
                     </div>
-                </div>
-                """,
-                unsafe_allow_html=True,
+                    """,
+                    unsafe_allow_html=True,
+                )
+            st.markdown(pretty_title("일반화 성능", "#e0f7fa", "#b2ebf2"), unsafe_allow_html=True)
+            validation_df = run_validation(
+                tuple(split["x_obs"]),
+                tuple(split["y_obs"]),
+                bool(st.session_state["d5_use_scale"]),
+                int(st.session_state["d5_hidden1"]),
+                int(st.session_state["d5_hidden2"]),
+                int(st.session_state["d5_epochs"]),
+                tuple(split["dl_mask"]),
             )
-        st.markdown(pretty_title("실제값과 예측값 오차 비교", "#ede7f6", "#d1c4e9"), unsafe_allow_html=True)
-        actual_label = f"{dataset['y_label']} 실제값"
-        ml_error_col = "머신러닝 오차"
-        dl_error_col = "딥러닝 오차"
-        error_df = pd.DataFrame(
-            {
-                dataset["x_label"]: np.round(split["x_obs"], 3),
-                actual_label: np.round(split["y_obs"], 3),
-                "머신러닝 예측값": np.round(model_results["train_preds"][active_ml_name], 3),
-                "딥러닝 예측값": np.round(model_results["train_preds"]["딥러닝"], 3),
+            generalization_df = metrics_df[["모델", "평균 오차"]].rename(columns={"평균 오차": "학습 평균 오차"}).merge(validation_df, on="모델")
+            generalization_df["모델"] = generalization_df["모델"].map(display_model_name)
+            st.caption(
+                "학습에 쓴 점에서의 오차만 보면 모델이 자료를 외웠는지 알 수 없습니다. "
+                "LOO는 점을 하나씩 빼고 학습한 뒤 뺀 점을, k겹 검증은 자료를 몇 묶음으로 나눠 한 묶음씩 빼고 학습한 뒤 뺀 묶음을 예측한 오차입니다. "
+                "학습 평균 오차보다 검증 오차가 훨씬 크면 처음 보는 자료에는 약한 모델입니다."
+            )
+            show_pretty_table(generalization_df, height=150)
+            st.markdown(pretty_title("실제값과 예측값 오차 비교", "#ede7f6", "#d1c4e9"), unsafe_allow_html=True)
+            actual_label = f"{dataset['y_label']} 실제값"
+            ml_error_col = "머신러닝 오차"
+            dl_error_col = "딥러닝 오차"
+            error_df = pd.DataFrame(
+                {
+                    dataset["x_label"]: np.round(split["x_obs"], 3),
+                    actual_label: np.round(split["y_obs"], 3),
+                    "머신러닝 예측값": np.round(model_results["train_preds"][active_ml_name], 3),
+                    "딥러닝 예측값": np.round(model_results["train_preds"]["딥러닝"], 3),
+                }
+            )
+            error_df[ml_error_col] = np.round(np.abs(split["y_obs"] - model_results["train_preds"][active_ml_name]), 3)
+            error_df[dl_error_col] = np.round(np.abs(split["y_obs"] - model_results["train_preds"]["딥러닝"]), 3)
+            st.caption("파란색은 1차/2차 머신러닝 모델의 오차, 분홍색은 딥러닝 오차입니다. 색이 진할수록 오차가 더 큽니다.")
+            equal_width_columns = {
+                column: st.column_config.NumberColumn(width="small")
+                for column in error_df.columns
             }
-        )
-        error_df[ml_error_col] = np.round(np.abs(split["y_obs"] - model_results["train_preds"][active_ml_name]), 3)
-        error_df[dl_error_col] = np.round(np.abs(split["y_obs"] - model_results["train_preds"]["딥러닝"]), 3)
-        st.caption("파란색은 1차/2차 머신러닝 모델의 오차, 분홍색은 딥러닝 오차입니다. 색이 진할수록 오차가 더 큽니다.")
-        equal_width_columns = {
-            column: st.column_config.NumberColumn(width="small")
-            for column in error_df.columns
-        }
-        show_styled_table(
-            build_error_styler(error_df, ml_error_col, dl_error_col),
-            height=250,
-            column_config=equal_width_columns,
-        )
+            show_styled_table(
+                build_error_styler(error_df, ml_error_col, dl_error_col),
+                height=250,
+                column_config=equal_width_columns,
+            )
 
     with tabs[3]:
         stage_intro(
@@ -1843,114 +2580,118 @@ def run():
         )        
         st.markdown(pretty_title("예측 그래프 확인", "#f3e5f5", "#e1bee7"), unsafe_allow_html=True)
 
-        model_results = get_model_results(
-            split["x_obs"],
-            split["y_obs"],
-            st.session_state["d5_use_scale"],
-            st.session_state["d5_hidden1"],
-            st.session_state["d5_hidden2"],
-            st.session_state["d5_epochs"],
-        )
-        active_ml_name = selected_ml_name(st.session_state["d5_ml_degree"])
-        active_ml_display_name = selected_ml_display_name(st.session_state["d5_ml_degree"])
-        visibility_col1, visibility_col2 = st.columns(2)
-        with visibility_col1:
-            st.checkbox(selected_ml_view_label(st.session_state["d5_ml_degree"]), key="d5_show_prediction_ml")
-        with visibility_col2:
-            st.checkbox("딥러닝 보기", key="d5_show_prediction_dl")
-        prediction_min_x, prediction_max_x = prediction_input_bounds(dataset["x"])
-        prediction_x = float(st.session_state.get("d5_prediction_x", default_prediction_x))
-        prediction_x = min(max(prediction_x, prediction_min_x), prediction_max_x)
-        st.session_state["d5_prediction_x"] = prediction_x
-        prediction_fig = make_selected_prediction_figure(
-            dataset,
-            split,
-            model_results,
-            st.session_state["d5_ml_degree"],
-            student_guess=None,
-            reveal=False,
-            show_ml=bool(st.session_state.get("d5_show_prediction_ml", True)),
-            show_dl=bool(st.session_state.get("d5_show_prediction_dl", True)),
-            prediction_x=prediction_x,
-        )
-        hidden_preds = predict_models(model_results, np.array([prediction_x], dtype=float))
-        ml_pred = float(hidden_preds[active_ml_name][0])
-        dl_pred = float(hidden_preds["딥러닝"][0])
+        if live_key is not None:
+            st.info(DL_TRAINING_WAIT_TEXT)
+        else:
+            model_results = get_model_results(
+                split["x_obs"],
+                split["y_obs"],
+                st.session_state["d5_use_scale"],
+                st.session_state["d5_hidden1"],
+                st.session_state["d5_hidden2"],
+                st.session_state["d5_epochs"],
+                split["dl_mask"],
+            )
+            active_ml_name = selected_ml_name(st.session_state["d5_ml_degree"])
+            active_ml_display_name = selected_ml_display_name(st.session_state["d5_ml_degree"])
+            visibility_col1, visibility_col2 = st.columns(2)
+            with visibility_col1:
+                st.checkbox(selected_ml_view_label(st.session_state["d5_ml_degree"]), key="d5_show_prediction_ml")
+            with visibility_col2:
+                st.checkbox("딥러닝 보기", key="d5_show_prediction_dl")
+            prediction_min_x, prediction_max_x = prediction_input_bounds(dataset["x"])
+            prediction_x = float(st.session_state.get("d5_prediction_x", default_prediction_x))
+            prediction_x = min(max(prediction_x, prediction_min_x), prediction_max_x)
+            st.session_state["d5_prediction_x"] = prediction_x
+            prediction_fig = make_selected_prediction_figure(
+                dataset,
+                split,
+                model_results,
+                st.session_state["d5_ml_degree"],
+                student_guess=None,
+                reveal=False,
+                show_ml=bool(st.session_state.get("d5_show_prediction_ml", True)),
+                show_dl=bool(st.session_state.get("d5_show_prediction_dl", True)),
+                prediction_x=prediction_x,
+            )
+            hidden_preds = predict_models(model_results, np.array([prediction_x], dtype=float))
+            ml_pred = float(hidden_preds[active_ml_name][0])
+            dl_pred = float(hidden_preds["딥러닝"][0])
 
-        st.pyplot(prediction_fig, use_container_width=True)
+            st.pyplot(prediction_fig, use_container_width=True)
 
-        with st.container(border=True):
-            st.markdown(
-                "<div style='font-size:1.05rem; font-weight:800; color:#6a1b9a; "
-                "margin-bottom:6px;'>6️⃣ AI 예측</div>",
-                unsafe_allow_html=True,
-            )
-            action_col, result_col = st.columns(2)
-            with action_col:
-                st.markdown(pretty_title("예측 입력값", "#fce4ec", "#f8bbd0"), unsafe_allow_html=True)
+            with st.container(border=True):
                 st.markdown(
-                    """
-                    <style>
-                    div[data-testid="stNumberInput"] {
-                        border: 3px solid #d81b60;
-                        border-radius: 14px;
-                        background: #fff5f8;
-                        padding: 12px 14px 14px 14px;
-                        box-shadow: 0 8px 18px rgba(216, 27, 96, 0.14);
-                    }
-                    div[data-testid="stNumberInput"] label p {
-                        color: #ad1457;
-                        font-size: 1.05rem;
-                        font-weight: 800;
-                    }
-                    div[data-testid="stNumberInput"] input {
-                        background: #ffffff;
-                        color: #263238;
-                        font-size: 1.18rem;
-                        font-weight: 800;
-                    }
-                    </style>
-                    """,
+                    "<div style='font-size:1.05rem; font-weight:800; color:#6a1b9a; "
+                    "margin-bottom:6px;'>6️⃣ AI 예측</div>",
                     unsafe_allow_html=True,
                 )
-                st.info(
-                    f"{dataset['x_label']} 값을 직접 입력하면, 모델이 {dataset['y_label']} 값을 예측합니다."
-                )
-                prediction_x = st.number_input(
-                    f"예측할 {dataset['x_label']} 입력",
-                    key="d5_prediction_x",
-                    min_value=prediction_min_x,
-                    max_value=prediction_max_x,
-                    format="%.3f",
-                )
-                st.caption(
-                    f"기본값은 선택한 데이터의 중간값(중앙값)이며, 입력 범위는 "
-                    f"{prediction_min_x:.3f} ~ {prediction_max_x:.3f}입니다."
-                )
-            with result_col:
-                st.markdown(pretty_title("머신러닝·딥러닝 예측값", "#e8f5e9", "#c8e6c9"), unsafe_allow_html=True)
-                render_value_cards(
-                    [
-                        {
-                            "title": "머신러닝",
-                            "value": f"{ml_pred:.3f}",
-                            "detail": f"{active_ml_display_name} 모델이 입력값으로 계산한 예측 결과입니다.",
-                            "bg": "#f4f9ff",
-                            "border": "#90caf9",
-                            "min_height": "128px",
-                        },
-                        {
-                            "title": "딥러닝",
-                            "value": f"{dl_pred:.3f}",
-                            "detail": "딥러닝 모델이 입력값으로 계산한 예측 결과입니다.",
-                            "bg": "#f1f8e9",
-                            "border": "#aed581",
-                            "min_height": "128px",
-                        },
-                    ],
-                    columns=2,
-                )
-                st.info("이 영역은 입력값에 따른 모델의 예측값만 보여 줍니다.")
+                action_col, result_col = st.columns(2)
+                with action_col:
+                    st.markdown(pretty_title("예측 입력값", "#fce4ec", "#f8bbd0"), unsafe_allow_html=True)
+                    st.markdown(
+                        """
+                        <style>
+                        div[data-testid="stNumberInput"] {
+                            border: 3px solid #d81b60;
+                            border-radius: 14px;
+                            background: #fff5f8;
+                            padding: 12px 14px 14px 14px;
+                            box-shadow: 0 8px 18px rgba(216, 27, 96, 0.14);
+                        }
+                        div[data-testid="stNumberInput"] label p {
+                            color: #ad1457;
+                            font-size: 1.05rem;
+                            font-weight: 800;
+                        }
+                        div[data-testid="stNumberInput"] input {
+                            background: #ffffff;
+                            color: #263238;
+                            font-size: 1.18rem;
+                            font-weight: 800;
+                        }
+                        </style>
+                        """,
+                        unsafe_allow_html=True,
+                    )
+                    st.info(
+                        f"{dataset['x_label']} 값을 직접 입력하면, 모델이 {dataset['y_label']} 값을 예측합니다."
+                    )
+                    prediction_x = st.number_input(
+                        f"예측할 {dataset['x_label']} 입력",
+                        key="d5_prediction_x",
+                        min_value=prediction_min_x,
+                        max_value=prediction_max_x,
+                        format="%.3f",
+                    )
+                    st.caption(
+                        f"기본값은 선택한 데이터의 중간값(중앙값)이며, 입력 범위는 "
+                        f"{prediction_min_x:.3f} ~ {prediction_max_x:.3f}입니다."
+                    )
+                with result_col:
+                    st.markdown(pretty_title("머신러닝·딥러닝 예측값", "#e8f5e9", "#c8e6c9"), unsafe_allow_html=True)
+                    render_value_cards(
+                        [
+                            {
+                                "title": "머신러닝",
+                                "value": f"{ml_pred:.3f}",
+                                "detail": f"{active_ml_display_name} 모델이 입력값으로 계산한 예측 결과입니다.",
+                                "bg": "#f4f9ff",
+                                "border": "#90caf9",
+                                "min_height": "128px",
+                            },
+                            {
+                                "title": "딥러닝",
+                                "value": f"{dl_pred:.3f}",
+                                "detail": "딥러닝 모델이 입력값으로 계산한 예측 결과입니다.",
+                                "bg": "#f1f8e9",
+                                "border": "#aed581",
+                                "min_height": "128px",
+                            },
+                        ],
+                        columns=2,
+                    )
+                    st.info("이 영역은 입력값에 따른 모델의 예측값만 보여 줍니다.")
 
     with tabs[4]:
         stage_intro(
@@ -1960,179 +2701,184 @@ def run():
             "#fff3e0",
             "#ffe0b2",
         )
-        model_results = get_model_results(
-            split["x_obs"],
-            split["y_obs"],
-            st.session_state["d5_use_scale"],
-            st.session_state["d5_hidden1"],
-            st.session_state["d5_hidden2"],
-            st.session_state["d5_epochs"],
-        )
-        active_ml_name = selected_ml_name(st.session_state["d5_ml_degree"])
-        active_ml_display_name = selected_ml_display_name(st.session_state["d5_ml_degree"])
-        report_prediction_x = float(st.session_state.get("d5_prediction_x", default_prediction_x))
-        hidden_preds = predict_models(model_results, np.array([report_prediction_x], dtype=float))
-        ml_pred = float(hidden_preds[active_ml_name][0])
-        dl_pred = float(hidden_preds["딥러닝"][0])
-        summary_metric_df = build_selected_comparison_df(model_results, st.session_state["d5_ml_degree"])
-        best_model = summary_metric_df.loc[summary_metric_df["손실"].idxmin(), "모델"]
-        best_loss = float(summary_metric_df.loc[summary_metric_df["손실"].idxmin(), "손실"])
-        scale_text = "정규화 적용" if st.session_state["d5_use_scale"] else "정규화 미적용"
-        deep_question = clean_text(st.session_state.get("d5_deep_question", ""), "아직 작성하지 않았습니다.")
-        research_motivation = clean_text(st.session_state.get("d5_research_motivation", ""), "아직 작성하지 않았습니다.")
-
-        st.markdown(pretty_title("모둠 정보 확인", "#f1f8e9", "#dcedc8"), unsafe_allow_html=True)
-        group_name = st.session_state.get("d5_group", "")
-        info_col, guide_col = st.columns([1.15, 1.0])
-        with info_col:
-            group_display = group_name if group_name else "데이터 선택 탭에서 입력해 주세요."
-            st.markdown(
-                f"""
-                <div style='
-                    background:#f4f9ff;
-                    border:1px solid #90caf9;
-                    border-left:6px solid #1976d2;
-                    border-radius:12px;
-                    padding:14px 16px;
-                    min-height:88px;
-                    display:flex;
-                    flex-direction:column;
-                    justify-content:center;
-                '>
-                    <div style='font-size:0.9rem; color:#1565c0; font-weight:800; margin-bottom:6px;'>모둠명</div>
-                    <div style='font-size:1.35rem; color:#263238; font-weight:900;'>{group_display}</div>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
-        with guide_col:
-            st.info("이 차시는 모둠당 하나의 앱으로 활동합니다. 모둠명을 확인한 뒤 아래 보고서를 작성하고 PDF를 저장하세요.")
-
-        st.markdown(pretty_title("분석 결과 요약", "#e3f2fd", "#bbdefb"), unsafe_allow_html=True)
-        render_summary_table(
-            [
-                {
-                    "label": "탐구 설정",
-                    "value": dataset["name"],
-                    "note": f"{dataset['x_label']} → {dataset['y_label']} 관계를 분석합니다.",
-                },
-                {
-                    "label": "깊은 질문",
-                    "value": deep_question,
-                    "note": "이번 분석으로 답해 보고 싶은 핵심 질문입니다.",
-                },
-                {
-                    "label": "탐구 동기",
-                    "value": research_motivation,
-                    "note": "이 데이터를 분석하려는 이유를 정리한 내용입니다.",
-                },
-                {
-                    "label": "입력값",
-                    "value": f"{dataset['x_label']} = {report_prediction_x:.3f}",
-                    "note": "예측 및 시각화 탭에서 직접 입력한 값입니다.",
-                },
-                {
-                    "label": "머신러닝 예측값",
-                    "value": f"{ml_pred:.3f}",
-                    "note": f"{active_ml_display_name} 모델이 입력값 {report_prediction_x:.3f}으로 계산한 예측 결과입니다.",
-                },
-                {
-                    "label": "딥러닝 예측값",
-                    "value": f"{dl_pred:.3f}",
-                    "note": f"딥러닝 모델이 입력값 {report_prediction_x:.3f}으로 계산한 예측 결과입니다. 구조: {model_results['nn_model']['architecture']} / {scale_text}",
-                },
-                {
-                    "label": "모델 선택 기준",
-                    "value": best_model,
-                    "note": f"학습 데이터 손실이 가장 작았습니다. 손실: {best_loss:.3f}",
-                },
-            ]
-        )
-
-        auto_analysis, _ = build_auto_report_texts(
-            dataset,
-            model_results,
-            active_ml_display_name,
-            report_prediction_x,
-            ml_pred,
-            dl_pred,
-            best_model,
-            st.session_state.get("d5_deep_question", ""),
-            st.session_state.get("d5_research_motivation", ""),
-        )
-        previous_auto_analysis = st.session_state.get("d5_auto_analysis_report", "")
-        if not st.session_state.get("d5_analysis_report") or st.session_state.get("d5_analysis_report") == previous_auto_analysis:
-            st.session_state["d5_analysis_report"] = auto_analysis
-        st.session_state["d5_auto_analysis_report"] = auto_analysis
-
-        with st.container(border=True):
-            st.markdown(
-                "<div style='font-size:1.05rem; font-weight:800; color:#ef6c00; "
-                "margin-bottom:6px;'>7️⃣ 연구 결과 및 분석</div>",
-                unsafe_allow_html=True,
+        if live_key is not None:
+            st.info(DL_TRAINING_WAIT_TEXT)
+        else:
+            model_results = get_model_results(
+                split["x_obs"],
+                split["y_obs"],
+                st.session_state["d5_use_scale"],
+                st.session_state["d5_hidden1"],
+                st.session_state["d5_hidden2"],
+                st.session_state["d5_epochs"],
+                split["dl_mask"],
             )
-            st.caption("데이터 분석 및 예측 결과는 자동으로 들어갑니다. 연구 결과 및 해석은 모둠이 직접 작성하세요.")
-            report_col1, report_col2 = st.columns(2)
-            with report_col1:
-                st.text_area(
-                    "데이터 분석 및 예측 결과",
-                    key="d5_analysis_report",
-                    height=260,
-                    placeholder=auto_analysis,
-                )
-            with report_col2:
-                st.text_area(
-                    "연구 결과 및 해석",
-                    key="d5_interpretation_report",
-                    height=260,
-                    placeholder="예측 결과를 보고 알게 된 점, 어떤 모델이 더 적절하다고 생각하는지, 이 결과를 어떻게 해석할 수 있는지 모둠의 말로 작성하세요.",
+            active_ml_name = selected_ml_name(st.session_state["d5_ml_degree"])
+            active_ml_display_name = selected_ml_display_name(st.session_state["d5_ml_degree"])
+            report_prediction_x = float(st.session_state.get("d5_prediction_x", default_prediction_x))
+            hidden_preds = predict_models(model_results, np.array([report_prediction_x], dtype=float))
+            ml_pred = float(hidden_preds[active_ml_name][0])
+            dl_pred = float(hidden_preds["딥러닝"][0])
+            summary_metric_df = build_selected_comparison_df(model_results, st.session_state["d5_ml_degree"])
+            best_model = summary_metric_df.loc[summary_metric_df["손실"].idxmin(), "모델"]
+            best_loss = float(summary_metric_df.loc[summary_metric_df["손실"].idxmin(), "손실"])
+            scale_text = "정규화 적용" if st.session_state["d5_use_scale"] else "정규화 미적용"
+            deep_question = clean_text(st.session_state.get("d5_deep_question", ""), "아직 작성하지 않았습니다.")
+            research_motivation = clean_text(st.session_state.get("d5_research_motivation", ""), "아직 작성하지 않았습니다.")
+
+            st.markdown(pretty_title("모둠 정보 확인", "#f1f8e9", "#dcedc8"), unsafe_allow_html=True)
+            group_name = st.session_state.get("d5_group", "")
+            info_col, guide_col = st.columns([1.15, 1.0])
+            with info_col:
+                group_display = group_name if group_name else "데이터 선택 탭에서 입력해 주세요."
+                st.markdown(
+                    f"""
+                    <div style='
+                        background:#f4f9ff;
+                        border:1px solid #90caf9;
+                        border-left:6px solid #1976d2;
+                        border-radius:12px;
+                        padding:14px 16px;
+                        min-height:88px;
+                        display:flex;
+                        flex-direction:column;
+                        justify-content:center;
+                    '>
+                        <div style='font-size:0.9rem; color:#1565c0; font-weight:800; margin-bottom:6px;'>모둠명</div>
+                        <div style='font-size:1.35rem; color:#263238; font-weight:900;'>{group_display}</div>
+                    </div>
+                    """,
+                    unsafe_allow_html=True,
                 )
+            with guide_col:
+                st.info("이 차시는 모둠당 하나의 앱으로 활동합니다. 모둠명을 확인한 뒤 아래 보고서를 작성하고 PDF를 저장하세요.")
+
+            st.markdown(pretty_title("분석 결과 요약", "#e3f2fd", "#bbdefb"), unsafe_allow_html=True)
+            render_summary_table(
+                [
+                    {
+                        "label": "탐구 설정",
+                        "value": dataset["name"],
+                        "note": f"{dataset['x_label']} → {dataset['y_label']} 관계를 분석합니다.",
+                    },
+                    {
+                        "label": "깊은 질문",
+                        "value": deep_question,
+                        "note": "이번 분석으로 답해 보고 싶은 핵심 질문입니다.",
+                    },
+                    {
+                        "label": "탐구 동기",
+                        "value": research_motivation,
+                        "note": "이 데이터를 분석하려는 이유를 정리한 내용입니다.",
+                    },
+                    {
+                        "label": "입력값",
+                        "value": f"{dataset['x_label']} = {report_prediction_x:.3f}",
+                        "note": "예측 및 시각화 탭에서 직접 입력한 값입니다.",
+                    },
+                    {
+                        "label": "머신러닝 예측값",
+                        "value": f"{ml_pred:.3f}",
+                        "note": f"{active_ml_display_name} 모델이 입력값 {report_prediction_x:.3f}으로 계산한 예측 결과입니다.",
+                    },
+                    {
+                        "label": "딥러닝 예측값",
+                        "value": f"{dl_pred:.3f}",
+                        "note": f"딥러닝 모델이 입력값 {report_prediction_x:.3f}으로 계산한 예측 결과입니다. 구조: {model_results['nn_model']['architecture']} / {scale_text}",
+                    },
+                    {
+                        "label": "모델 선택 기준",
+                        "value": best_model,
+                        "note": f"학습 데이터 손실이 가장 작았습니다. 손실: {best_loss:.3f}",
+                    },
+                ]
+            )
 
-        st.markdown(pretty_title("PDF 저장", "#ede7f6", "#d1c4e9"), unsafe_allow_html=True)
-        if group_name:
-            student_info = {"group": group_name}
-            pdf_prediction_fig = make_selected_prediction_figure(
+            auto_analysis, _ = build_auto_report_texts(
                 dataset,
-                split,
                 model_results,
-                st.session_state["d5_ml_degree"],
-                student_guess=None,
-                reveal=False,
-                show_ml=True,
-                show_dl=True,
-                prediction_x=float(st.session_state.get("d5_prediction_x", default_prediction_x)),
-            )
-            figure_items = [
-                ("예측 결과 그래프", pdf_prediction_fig),
-            ]
-            pdf_bytes = create_portfolio_pdf(
-                student_info,
-                dataset,
-                split,
-                model_results,
-                st.session_state["d5_ml_degree"],
-                st.session_state["d5_use_scale"],
-                float(st.session_state.get("d5_prediction_x", default_prediction_x)),
-                float(st.session_state["d5_student_guess"]),
-                False,
+                active_ml_display_name,
+                report_prediction_x,
+                ml_pred,
+                dl_pred,
+                best_model,
                 st.session_state.get("d5_deep_question", ""),
                 st.session_state.get("d5_research_motivation", ""),
-                st.session_state.get("d5_analysis_report", ""),
-                st.session_state.get("d5_interpretation_report", ""),
-                figure_items,
             )
-            st.download_button(
-                "보고서 PDF 저장하기",
-                data=pdf_bytes,
-                file_name=f"{group_name}_5차시_AI데이터예측보고서.pdf",
-                mime="application/pdf",
-                use_container_width=True,
-            )
-            st.warning("⚠️ 모둠원들이 동시에 PDF 다운로드 버튼을 누르면 오류가 날 수 있습니다. 한 명씩 차례대로 눌러 주세요.")
-            render_portfolio_link(st.session_state.get("d5_class", CLASS_OPTIONS[0]))
-        else:
-            st.info("데이터 선택 탭에서 모둠명을 입력하면 보고서 PDF를 저장할 수 있습니다.")
+            previous_auto_analysis = st.session_state.get("d5_auto_analysis_report", "")
+            if not st.session_state.get("d5_analysis_report") or st.session_state.get("d5_analysis_report") == previous_auto_analysis:
+                st.session_state["d5_analysis_report"] = auto_analysis
+            st.session_state["d5_auto_analysis_report"] = auto_analysis
+
+            with st.container(border=True):
+                st.markdown(
+                    "<div style='font-size:1.05rem; font-weight:800; color:#ef6c00; "
+                    "margin-bottom:6px;'>7️⃣ 연구 결과 및 분석</div>",
+                    unsafe_allow_html=True,
+                )
+                st.caption("데이터 분석 및 예측 결과는 자동으로 들어갑니다. 연구 결과 및 해석은 모둠이 직접 작성하세요.")
+                report_col1, report_col2 = st.columns(2)
+                with report_col1:
+                    st.text_area(
+                        "데이터 분석 및 예측 결과",
+                        key="d5_analysis_report",
+                        height=260,
+                        placeholder=auto_analysis,
+                    )
+                with report_col2:
+                    st.text_area(
+                        "연구 결과 및 해석",
+                        key="d5_interpretation_report",
+                        height=260,
+                        placeholder="예측 결과를 보고 알게 된 점, 어떤 모델이 더 적절하다고 생각하는지, 이 결과를 어떻게 해석할 수 있는지 모둠의 말로 작성하세요.",
+                    )
+
+            st.markdown(pretty_title("PDF 저장", "#ede7f6", "#d1c4e9"), unsafe_allow_html=True)
+            if group_name:
+                student_info = {"group": group_name}
+                pdf_prediction_fig = make_selected_prediction_figure(
+                    dataset,
+                    split,
+                    model_results,
+                    st.session_state["d5_ml_degree"],
+                    student_guess=None,
+                    reveal=False,
+                    show_ml=True,
+                    show_dl=True,
+                    prediction_x=float(st.session_state.get("d5_prediction_x", default_prediction_x)),
+                )
+                figure_items = [
+                    ("예측 결과 그래프", pdf_prediction_fig),
+                ]
+                pdf_bytes = create_portfolio_pdf(
+                    student_info,
+                    dataset,
+                    split,
+                    model_results,
+                    st.session_state["d5_ml_degree"],
+                    st.session_state["d5_use_scale"],
+                    float(st.session_state.get("d5_prediction_x", default_prediction_x)),
+                    float(st.session_state["d5_student_guess"]),
+                    False,
+                    st.session_state.get("d5_deep_question", ""),
+                    st.session_state.get("d5_research_motivation", ""),
+                    st.session_state.get("d5_analysis_report", ""),
+                    st.session_state.get("d5_interpretation_report", ""),
+                    figure_items,
+                )
+                st.download_button(
+                    "보고서 PDF 저장하기",
+                    data=pdf_bytes,
+                    file_name=f"{group_name}_5차시_AI데이터예측보고서.pdf",
+                    mime="application/pdf",
+                    use_container_width=True,
+                )
+                st.warning("⚠️ 모둠원들이 동시에 PDF 다운로드 버튼을 누르면 오류가 날 수 있습니다. 한 명씩 차례대로 눌러 주세요.")
+                render_portfolio_link(st.session_state.get("d5_class", CLASS_OPTIONS[0]))
+            else:
+                st.info("데이터 선택 탭에서 모둠명을 입력하면 보고서 PDF를 저장할 수 있습니다.")
 
+    model_server_stats_panel()
     st.markdown("<hr style='border: 2px solid #2196F3;'>", unsafe_allow_html=True)
 
 
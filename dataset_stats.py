@@ -0,0 +1,189 @@
+import importlib
+import itertools
+import threading
+
+import numpy as np
+import pandas as pd
+
+from poly_fit import PolynomialFit
+
+
+# ==========================================
+# 0. 설정
+# ==========================================
+# 색인에 넣을 데이터 목록: (모듈 이름, 데이터 사전 이름). 같은 표가 여러 목록에 있으면 한 번만 계산합니다.
+STATS_CATALOGS = (
+    ("data5", "DATASETS"),
+    ("data7", "DATASETS"),
+    ("future_extra_datasets", "EXTRA_DATASETS"),
+)
+IQR_MARGIN = 1.5            # 사분위 범위(IQR)의 이 배수만큼 벗어나면 이상치 후보
+RECOMMEND_LIMIT = 3         # 추천 변수 쌍 기본 개수
+
+
+# ==========================================
+# 1. 열 하나, 변수 쌍 하나의 통계
+# ==========================================
+def numeric_columns(table):
+    return [col for col in table.columns if pd.api.types.is_numeric_dtype(table[col])]
+
+
+def read_only(values):
+    values = np.array(values)
+    values.setflags(write=False)
+    return values
+
+
+def r_squared(y_true, y_pred):
+    # sklearn r2_score 와 같은 값 (y 가 모두 같으면 완벽히 맞을 때 1, 아니면 0)
+    ss_res = float(np.sum((y_true - y_pred) ** 2))
+    ss_tot = float(np.sum((y_true - np.mean(y_true)) ** 2))
+    if ss_tot == 0.0:
+        return 1.0 if ss_res == 0.0 else 0.0
+    return 1.0 - ss_res / ss_tot
+
+
+def column_summary(values):
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    margin = (q3 - q1) * IQR_MARGIN
+    lower, upper = float(q1 - margin), float(q3 + margin)
+    return {
+        "count": int(len(values)),
+        "mean": float(np.mean(values)),
+        "std": float(np.std(values, ddof=1)) if len(values) > 1 else 0.0,
+        "min": float(np.min(values)),
+        "q1": float(q1),
+        "median": float(median),
+        "q3": float(q3),
+        "max": float(np.max(values)),
+        "lower": lower,
+        "upper": upper,
+        "outlier_count": int(np.sum((values < lower) | (values > upper))),
+    }
+
+
+def outlier_rows(values, summary):
+    # 표의 행 순서 그대로 이상치 후보 여부 (값이 비어 있는 행은 False)
+    with np.errstate(invalid="ignore"):
+        return read_only((values < summary["lower"]) | (values > summary["upper"]))
+
+
+def pair_summary(x_values, y_values, x_outliers, y_outliers):
+    # 직선(1차)과 2차 회귀를 같은 QR 분해 하나로 맞추고, 두 열 중 하나라도 이상치 후보인 행을 표시합니다.
+    fit = PolynomialFit(x_values, y_values, 2)
+    line_r2 = r_squared(fit.y, fit.predict(1))
+    quad_r2 = r_squared(fit.y, fit.predict(2))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = float(np.corrcoef(fit.x, fit.y)[0, 1]) if len(fit.x) > 1 else 0.0
+    return {
+        "count": int(len(fit.x)),
+        "corr": corr if np.isfinite(corr) else 0.0,
+        "line_coeffs": read_only(fit.coeffs(1)),
+        "quad_coeffs": read_only(fit.coeffs(2)),
+        "line_r2": line_r2,
+        "quad_r2": quad_r2,
+        "strength": max(line_r2, quad_r2),
+        "outliers": read_only(x_outliers | y_outliers),
+    }
+
+
+def build_table_stats(table):
+    columns = numeric_columns(table)
+    frame = table[columns].astype(float)
+    summaries = {col: column_summary(frame[col]) for col in columns}
+    flags = {col: outlier_rows(frame[col].to_numpy(), summaries[col]) for col in columns}
+    pairs = {}
+    for x_col, y_col in itertools.permutations(columns, 2):
+        rows = np.isfinite(frame[x_col].to_numpy()) & np.isfinite(frame[y_col].to_numpy())
+        if rows.sum() < 2:
+            continue
+        pairs[(x_col, y_col)] = pair_summary(
+            frame[x_col].to_numpy()[rows],
+            frame[y_col].to_numpy()[rows],
+            flags[x_col][rows],
+            flags[y_col][rows],
+        )
+    return {
+        "columns": columns,
+        "summary": summaries,
+        "outlier_rows": flags,
+        "corr": frame.corr(),
+        "pairs": pairs,
+    }
+
+
+# ==========================================
+# 2. 모든 데이터를 담는 색인과 조회
+# ==========================================
+class StatsIndex:
+    def __init__(self):
+        self._entries = {}
+        self._by_name = {}
+        self._by_table = {}
+
+    def add_catalog(self, catalog, datasets):
+        for name, info in datasets.items():
+            table = info["table"]
+            stats = self._by_table.get(id(table))
+            if stats is None:
+                stats = build_table_stats(table)
+                self._by_table[id(table)] = stats
+            self._entries[(catalog, name)] = stats
+            self._by_name.setdefault(name, stats)
+
+    def names(self, catalog=None):
+        return [name for entry_catalog, name in self._entries if catalog is None or entry_catalog == catalog]
+
+    def dataset(self, name, catalog=None):
+        # 색인에 없는 데이터(직접 입력 자료 등)는 None 을 돌려줍니다.
+        if catalog is None:
+            return self._by_name.get(name)
+        return self._entries.get((catalog, name))
+
+    def column(self, name, column, catalog=None):
+        stats = self.dataset(name, catalog)
+        return None if stats is None else stats["summary"].get(column)
+
+    def pair(self, name, x_column, y_column, catalog=None):
+        stats = self.dataset(name, catalog)
+        return None if stats is None else stats["pairs"].get((x_column, y_column))
+
+    def correlation(self, name, catalog=None):
+        stats = self.dataset(name, catalog)
+        return None if stats is None else stats["corr"]
+
+    def recommended_pairs(self, name, limit=RECOMMEND_LIMIT, catalog=None, exclude=()):
+        # 관계가 강한(직선·2차 중 더 높은 R²) 변수 쌍 순서. x/y 를 바꾼 쌍은 더 잘 맞는 방향 하나만 남깁니다.
+        stats = self.dataset(name, catalog)
+        if stats is None:
+            return []
+        best = {}
+        for (x_col, y_col), pair in stats["pairs"].items():
+            key = frozenset((x_col, y_col))
+            if key not in best or pair["strength"] > best[key]["strength"]:
+                best[key] = {"x": x_col, "y": y_col, **pair}
+        ranked = sorted(best.values(), key=lambda item: item["strength"], reverse=True)
+        ranked = [item for item in ranked if (item["x"], item["y"]) not in exclude]
+        return ranked[:limit]
+
+
+_INDEX = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_stats_index(catalogs=STATS_CATALOGS):
+    # 서버가 켜질 때 한 번 만들어 두고 모든 세션이 나눠 씁니다. (불러올 수 없는 목록은 건너뜀)
+    global _INDEX
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            index = StatsIndex()
+            for module_name, attribute in catalogs:
+                try:
+                    datasets = getattr(importlib.import_module(module_name), attribute)
+                except (ImportError, AttributeError):
+                    continue
+                index.add_catalog(module_name, datasets)
+            _INDEX = index
+        return _INDEX
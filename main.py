@@ -1,5 +1,6 @@
 import streamlit as st
 import importlib
+import threading
 
 # 페이지 기본 설정
 st.set_page_config(page_title="F.U.T.U.R.E Studio", page_icon="💡", layout="centered")
@@ -72,6 +73,30 @@ selected_day = st.selectbox(
     key="current_day"  # key를 지정하면 자동으로 session_state에 저장 및 동기화됩니다.
 )
 
+# 서버가 켜질 때 한 번만 5DAY 모듈을 불러와 데이터 통계 색인을 만들고, 켜 둔 기능만 준비합니다. (모두 백그라운드)
+# TensorFlow 는 Keras 학습을 쓸 때, 학습 칸은 학습 칸을 켰을 때, 기본 모델은 저장소가 있을 때만 데웁니다.
+def _warm_up_data5():
+    try:
+        data5 = importlib.import_module("data5")
+        data5.start_tensorflow_warmup()
+        if data5.USE_TRAINING_POOL:
+            data5.training_pool()
+        if data5.MODEL_STORE is not None:
+            data5.preload_precomputed_models()
+        data5.get_stats_index()
+    except Exception:
+        pass
+
+
+@st.cache_resource(show_spinner=False)
+def start_background_warmup():
+    # 첫 화면이 data5 를 불러오느라 기다리지 않도록 불러오기부터 백그라운드 스레드에서 합니다.
+    threading.Thread(target=_warm_up_data5, name="data5-warmup", daemon=True).start()
+    return True
+
+
+start_background_warmup()
+
 # 선택된 모듈 동적 실행
 current_module_name = modules[st.session_state.current_day]
 
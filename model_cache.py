@@ -0,0 +1,99 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class ModelCache:
+    # 학습된 모델을 바이트 예산(max_bytes) 안에서만 보관하는 LRU 캐시입니다.
+    # 예산을 넘기면 가장 오래 쓰지 않은 모델부터 내보내고, 내보낼 때마다 on_evict(key, value) 를 부릅니다.
+    def __init__(self, max_bytes, sizeof, on_evict=None):
+        self.max_bytes = int(max_bytes)
+        self._sizeof = sizeof
+        self._on_evict = on_evict
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def contains(self, key):
+        # 통계와 LRU 순서를 건드리지 않고 들어 있는지만 봅니다.
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key, value):
+        size = int(self._sizeof(value))
+        evicted = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            # 방금 넣은 모델 하나는 예산보다 커도 남겨 두어 지금 요청에는 쓸 수 있게 합니다.
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                old_key, (old_value, old_size) = self._entries.popitem(last=False)
+                self._bytes -= old_size
+                self._stats["evictions"] += 1
+                evicted.append((old_key, old_value))
+        if self._on_evict is not None:
+            for old_key, old_value in evicted:
+                try:
+                    self._on_evict(old_key, old_value)
+                except Exception:
+                    pass
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class SingleFlight:
+    # 같은 key 로 동시에 들어온 계산을 한 번만 실행합니다.
+    # 처음 부른 쪽이 fn() 을 실행하고, 그동안 들어온 쪽은 같은 Future 의 결과(또는 예외)를 기다립니다.
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {"runs": 0, "shared": 0}
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self._stats["runs"] += 1
+            else:
+                self._stats["shared"] += 1
+        if not leader:
+            return future.result()
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            # 끝난 계산은 바로 지워서, 다음 요청은 (캐시에서 밀려났다면) 새로 계산하게 합니다.
+            with self._lock:
+                del self._calls[key]
+        return future.result()
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._calls)}
+
@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+
+# 저장 형식이 바뀌면 올려서 예전 파일을 쓰지 않도록 합니다.
+STORE_VERSION = 1
+
+
+class ModelStore:
+    # 학습 입력과 하이퍼파라미터의 해시를 파일 이름으로 쓰는 디스크 저장소입니다.
+    # 한 모델은 .npz 파일 하나(가중치, 정규화 최솟값/최댓값, 손실 기록 등)로 저장됩니다.
+    def __init__(self, root):
+        self.root = root
+
+    @staticmethod
+    def key_for(**params):
+        payload = json.dumps({"version": STORE_VERSION, **params}, sort_keys=True, default=float)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.npz")
+
+    def contains(self, key):
+        return os.path.exists(self._path(key))
+
+    def load(self, key):
+        # 없거나 깨진 파일이면 None 을 돌려주어 새로 학습하게 합니다.
+        # 깨진 파일은 지워서 contains() 가 더 이상 준비된 모델로 알리지 않게 합니다.
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                return {name: data[name] for name in data.files}
+        except (OSError, ValueError, EOFError, KeyError, zipfile.BadZipFile):
+            self._discard(path)
+            return None
+
+    @staticmethod
+    def _discard(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def save(self, key, arrays):
+        # 임시 파일에 다 쓴 뒤 이름을 바꿔서, 동시에 읽는 쪽이 반쯤 쓴 파일을 보지 않게 합니다.
+        path = self._path(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(suffix=".npz", dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as fh:
+                np.savez(fh, **arrays)
+            os.replace(tmp_path, path)
+            return True
+        except OSError:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
@@ -0,0 +1,330 @@
+import time
+
+import numpy as np
+
+
+# ==========================================
+# 0. 학습 설정 (Keras 기본값과 같게 맞춤)
+# ==========================================
+ADAM_BETA1 = 0.9
+ADAM_BETA2 = 0.999
+ADAM_EPSILON = 1e-7
+
+
+class EarlyStopper:
+    # 손실이 patience 번 연속으로 직전 최저값보다 tolerance(비율) 이상 줄지 않거나,
+    # 학습을 시작한 지 time_budget 초가 지나면 멈추라고 알려 줍니다. (처음 min_epochs 번은 항상 학습)
+    def __init__(self, patience=5, tolerance=0.01, time_budget=None, min_epochs=10):
+        self.patience = int(patience)
+        self.tolerance = float(tolerance)
+        self.time_budget = time_budget
+        self.min_epochs = int(min_epochs)
+        self.reason = None
+        self._best = np.inf
+        self._wait = 0
+        self._started = None
+
+    def should_stop(self, epoch, loss):
+        if self._started is None:
+            self._started = time.perf_counter()
+        if loss < self._best * (1.0 - self.tolerance):
+            self._wait = 0
+        else:
+            self._wait += 1
+        self._best = min(self._best, loss)
+        if epoch + 1 < self.min_epochs:
+            return False
+        if self._wait >= self.patience:
+            self.reason = "plateau"
+        elif self.time_budget is not None and time.perf_counter() - self._started > self.time_budget:
+            self.reason = "time"
+        return self.reason is not None
+
+
+class NumpyMLP:
+    # 1-h1-h2-1 구조(ReLU, ReLU, 선형)의 작은 신경망입니다.
+    # Keras 모델처럼 predict(x, verbose=0) 와 get_weights() 로 쓸 수 있습니다.
+    def __init__(self, weights):
+        self.weights = [np.asarray(w, dtype=float) for w in weights]
+
+    @property
+    def architecture(self):
+        w1, _, w2, _, _, _ = self.weights
+        return f"1-{w1.shape[1]}-{w2.shape[1]}-1"
+
+    def get_weights(self):
+        return [w.copy() for w in self.weights]
+
+    def predict(self, x, verbose=0):
+        return forward(self.weights, np.asarray(x, dtype=float).reshape(-1, 1))[-1]
+
+
+def glorot_uniform(rng, fan_in, fan_out):
+    limit = np.sqrt(6.0 / (fan_in + fan_out))
+    return rng.uniform(-limit, limit, size=(fan_in, fan_out))
+
+
+def init_weights(hidden1, hidden2, seed=42):
+    rng = np.random.default_rng(seed)
+    return [
+        glorot_uniform(rng, 1, hidden1), np.zeros(hidden1),
+        glorot_uniform(rng, hidden1, hidden2), np.zeros(hidden2),
+        glorot_uniform(rng, hidden2, 1), np.zeros(1),
+    ]
+
+
+def forward(weights, x):
+    # 역전파에 필요한 중간값(은닉층 출력)을 함께 돌려줍니다.
+    w1, b1, w2, b2, w3, b3 = weights
+    a1 = np.maximum(x @ w1 + b1, 0.0)
+    a2 = np.maximum(a1 @ w2 + b2, 0.0)
+    return a1, a2, a2 @ w3 + b3
+
+
+def infer(weights, x):
+    # 예측 전용 순전파: 중간값을 남기지 않고 (n,) 모양의 예측값만 돌려줍니다.
+    w1, b1, w2, b2, w3, b3 = weights
+    a1 = np.maximum(np.multiply.outer(x, w1[0]) + b1, 0.0)
+    a2 = np.maximum(a1 @ w2 + b2, 0.0)
+    return a2 @ w3[:, 0] + b3[0]
+
+
+def backward(weights, x, y, a1, a2, y_hat):
+    # 평균 제곱 오차(MSE)를 각 가중치로 미분한 값을 한 번에 계산합니다.
+    _, _, w2, _, w3, _ = weights
+    d3 = 2.0 * (y_hat - y) / len(x)
+    d2 = (d3 @ w3.T) * (a2 > 0)
+    d1 = (d2 @ w2.T) * (a1 > 0)
+    return [x.T @ d1, d1.sum(axis=0), a1.T @ d2, d2.sum(axis=0), a2.T @ d3, d3.sum(axis=0)]
+
+
+def train_mlp(x_train, y_train, hidden1=8, hidden2=4, epochs=30, learning_rate=0.01, batch_size=8, seed=42, on_epoch=None, stopper=None):
+    # Keras 의 fit(shuffle=True) 처럼 매 학습 횟수마다 순서를 섞어 미니배치로 Adam 학습을 합니다.
+    # 돌려주는 손실은 한 번의 학습 동안 본 미니배치 손실의 (표본 수 가중) 평균입니다.
+    # on_epoch(epoch, loss) 를 주면 학습 한 번이 끝날 때마다 그 손실을 알려 줍니다.
+    # stopper(EarlyStopper) 를 주면 손실이 더 줄지 않을 때 일찍 멈추고, 실제로 학습한 횟수만큼의 손실만 돌려줍니다.
+    x = np.asarray(x_train, dtype=float).reshape(-1, 1)
+    y = np.asarray(y_train, dtype=float).reshape(-1, 1)
+    n = len(x)
+    batch_size = max(1, min(int(batch_size), n))
+    rng = np.random.default_rng(seed)
+    weights = init_weights(int(hidden1), int(hidden2), seed)
+    m = [np.zeros_like(w) for w in weights]
+    v = [np.zeros_like(w) for w in weights]
+    step = 0
+    losses = np.empty(int(epochs), dtype=float)
+
+    for epoch in range(int(epochs)):
+        order = rng.permutation(n)
+        epoch_loss = 0.0
+        for start in range(0, n, batch_size):
+            batch = order[start:start + batch_size]
+            xb = x[batch]
+            yb = y[batch]
+            a1, a2, y_hat = forward(weights, xb)
+            epoch_loss += float(np.sum((y_hat - yb) ** 2))
+            grads = backward(weights, xb, yb, a1, a2, y_hat)
+
+            step += 1
+            lr_t = learning_rate * np.sqrt(1.0 - ADAM_BETA2 ** step) / (1.0 - ADAM_BETA1 ** step)
+            for w, g, m_i, v_i in zip(weights, grads, m, v):
+                m_i *= ADAM_BETA1
+                m_i += (1.0 - ADAM_BETA1) * g
+                v_i *= ADAM_BETA2
+                v_i += (1.0 - ADAM_BETA2) * g * g
+                w -= lr_t * m_i / (np.sqrt(v_i) + ADAM_EPSILON)
+        losses[epoch] = epoch_loss / n
+        if on_epoch is not None:
+            on_epoch(epoch, float(losses[epoch]))
+        if stopper is not None and stopper.should_stop(epoch, float(losses[epoch])):
+            return NumpyMLP(weights), losses[:epoch + 1].copy()
+
+    return NumpyMLP(weights), losses
+
+
+def stack_weights(architectures, seeds):
+    # (h1, h2) 구조 x seed 마다 신경망 하나씩을 가장 큰 구조 크기로 0 을 채워 한 텐서로 쌓습니다.
+    # 채운 뉴런은 가중치와 기울기를 mask 로 0 에 묶어 두므로 계산 결과에 끼어들지 않습니다.
+    nets = [(int(h1), int(h2), int(seed)) for h1, h2 in architectures for seed in seeds]
+    n = len(nets)
+    h1_max = max(h1 for h1, _, _ in nets)
+    h2_max = max(h2 for _, h2, _ in nets)
+    stacked = [
+        np.zeros((n, 1, h1_max)), np.zeros((n, h1_max)),
+        np.zeros((n, h1_max, h2_max)), np.zeros((n, h2_max)),
+        np.zeros((n, h2_max, 1)), np.zeros((n, 1)),
+    ]
+    masks = [np.zeros_like(w) for w in stacked]
+    for index, (h1, h2, seed) in enumerate(nets):
+        for w, mask, part in zip(stacked, masks, init_weights(h1, h2, seed)):
+            region = (index,) + tuple(slice(0, size) for size in part.shape)
+            w[region] = part
+            mask[region] = 1.0
+    return nets, stacked, masks
+
+
+def train_stacked(x, y, weights, masks, epochs, learning_rate, batch_size, seeds, sample_masks=None, on_epoch=None, stoppers=None):
+    # 쌓아 둔 신경망(weights 의 첫 축)을 함께 Adam 학습합니다.
+    # seeds: 신경망마다 미니배치 순서를 섞는 seed — 각 신경망은 train_mlp(seed=...) 와 같은 순서로 자료를 봅니다.
+    # x, y: (1 또는 신경망 수, n, 1) — 신경망마다 입력이 다르면 첫 축으로 나눠 줍니다.
+    # sample_masks: (신경망 수, n) 0/1 — 신경망마다 학습에 쓸 점만 1 (None 이면 모두 사용)
+    #   각 신경망은 자기 점만 섞어 미니배치를 나누고, 미니배치가 있을 때만 Adam 한 걸음을 셉니다.
+    #   (자기 점만 넣은 train_mlp 한 번과 같은 학습)
+    # stoppers: 신경망마다 EarlyStopper 또는 None — 멈춘 신경망은 그 뒤로 가중치가 바뀌지 않습니다.
+    # on_epoch(epoch, losses) 는 학습 한 번이 끝날 때마다 신경망별 평균 손실과 함께 불립니다.
+    count = len(weights[0])
+    n = x.shape[1]
+    x = np.broadcast_to(x, (count, n, 1))
+    y = np.broadcast_to(y, (count, n, 1))
+    if sample_masks is None:
+        sample_masks = np.ones((count, n), dtype=bool)
+    own_rows = [np.flatnonzero(mask) for mask in np.asarray(sample_masks, dtype=bool)]
+    counts = np.array([len(rows) for rows in own_rows])
+    width = max(int(counts.max()), 1)
+    batch_size = max(1, min(int(batch_size), width))
+    stoppers = list(stoppers) if stoppers is not None else [None] * count
+    rngs = [np.random.default_rng(seed) for seed in seeds]
+    m = [np.zeros_like(w) for w in weights]
+    v = [np.zeros_like(w) for w in weights]
+    steps = np.zeros(count, dtype=int)
+    running = np.ones(count, dtype=bool)
+
+    for epoch in range(int(epochs)):
+        orders = np.zeros((count, width), dtype=int)
+        valid = np.zeros((count, width), dtype=bool)
+        for index, (rng, rows) in enumerate(zip(rngs, own_rows)):
+            orders[index, :len(rows)] = rows[rng.permutation(len(rows))]
+            valid[index, :len(rows)] = True
+        epoch_loss = np.zeros(count)
+        for start in range(0, width, batch_size):
+            batch = orders[:, start:start + batch_size]
+            keep = valid[:, start:start + batch_size] & running[:, None]
+            active = keep.any(axis=1)
+            if not active.any():
+                break
+            xb = np.take_along_axis(x, batch[:, :, None], axis=1)
+            yb = np.take_along_axis(y, batch[:, :, None], axis=1)
+            w1, b1, w2, b2, w3, b3 = weights
+            a1 = np.maximum(xb @ w1 + b1[:, None, :], 0.0)
+            a2 = np.maximum(a1 @ w2 + b2[:, None, :], 0.0)
+            y_hat = a2 @ w3 + b3[:, None, :]
+            error = (y_hat - yb) * keep[:, :, None]
+            d3 = 2.0 * error / np.maximum(keep.sum(axis=1), 1)[:, None, None]
+            epoch_loss += np.sum(error ** 2, axis=(1, 2))
+
+            d2 = (d3 @ w3.transpose(0, 2, 1)) * (a2 > 0)
+            d1 = (d2 @ w2.transpose(0, 2, 1)) * (a1 > 0)
+            grads = [
+                xb.transpose(0, 2, 1) @ d1, d1.sum(axis=1),
+                a1.transpose(0, 2, 1) @ d2, d2.sum(axis=1),
+                a2.transpose(0, 2, 1) @ d3, d3.sum(axis=1),
+            ]
+
+            steps += active
+            # 걸음 수마다 train_mlp 와 같은 스칼라 계산으로 보정한 학습률 (배열 거듭제곱은 끝자리가 달라질 수 있음)
+            lr_t = np.array([
+                learning_rate * np.sqrt(1.0 - ADAM_BETA2 ** step) / (1.0 - ADAM_BETA1 ** step)
+                for step in np.maximum(steps, 1).tolist()
+            ])
+            for w, g, m_i, v_i, mask in zip(weights, grads, m, v, masks):
+                shape = (count,) + (1,) * (w.ndim - 1)
+                on = active.reshape(shape)
+                g *= mask
+                m_i[...] = np.where(on, ADAM_BETA1 * m_i + (1.0 - ADAM_BETA1) * g, m_i)
+                v_i[...] = np.where(on, ADAM_BETA2 * v_i + (1.0 - ADAM_BETA2) * g * g, v_i)
+                w -= np.where(on, lr_t.reshape(shape) * m_i / (np.sqrt(v_i) + ADAM_EPSILON), 0.0)
+        losses = epoch_loss / np.maximum(counts, 1)
+        if on_epoch is not None:
+            on_epoch(epoch, losses)
+        for index, stopper in enumerate(stoppers):
+            if running[index] and stopper is not None and stopper.should_stop(epoch, float(losses[index])):
+                running[index] = False
+        if not running.any():
+            break
+    return weights
+
+
+def unstack_model(weights, index, hidden1, hidden2):
+    # 쌓인 가중치에서 신경망 하나를 실제 크기만큼 잘라 복사합니다. (학습이 이어져도 바뀌지 않음)
+    w1, b1, w2, b2, w3, b3 = weights
+    return NumpyMLP([
+        w1[index, :, :hidden1].copy(), b1[index, :hidden1].copy(),
+        w2[index, :hidden1, :hidden2].copy(), b2[index, :hidden2].copy(),
+        w3[index, :hidden2, :].copy(), b3[index].copy(),
+    ])
+
+
+def train_mlp_sweep(
+    x_train,
+    y_train,
+    architectures,
+    epochs=30,
+    learning_rate=0.01,
+    batch_size=8,
+    seeds=(42,),
+    checkpoints=None,
+    new_stopper=None,
+):
+    # 여러 구조와 seed 의 신경망을 한 번의 반복문에서 함께 학습합니다.
+    # seed 는 시작 가중치와 미니배치 순서를 모두 정하므로 각 신경망은 train_mlp(seed=seed) 한 번과 같은 결과입니다.
+    # checkpoints 에 적은 학습 횟수마다 가중치를 떼어 두므로, 가장 긴 학습 한 번으로 더 짧은 학습 결과도 얻습니다.
+    # new_stopper: 신경망마다 부를 EarlyStopper 생성 함수 — 본 학습과 같은 조기 종료 기준으로 신경망마다 따로 멈춥니다.
+    #   멈춘 뒤의 checkpoint 에는 멈춘 때의 가중치가 들어가므로, train_mlp(epochs=checkpoint, stopper=...) 와 같은 결과입니다.
+    # 돌려주는 값: {"hidden1", "hidden2", "seed", "epochs", "model", "losses"} 목록
+    x = np.asarray(x_train, dtype=float).reshape(1, -1, 1)
+    y = np.asarray(y_train, dtype=float).reshape(1, -1, 1)
+    checkpoints = sorted({int(epoch) for epoch in (checkpoints or (epochs,))})
+    epochs = max(checkpoints)
+    nets, weights, masks = stack_weights(architectures, seeds)
+    stoppers = [new_stopper() for _ in nets] if new_stopper is not None else [None] * len(nets)
+    losses = np.empty((len(nets), epochs), dtype=float)
+    trained = np.zeros(len(nets), dtype=int)
+    results = []
+
+    def record(checkpoint):
+        for index, (h1, h2, seed) in enumerate(nets):
+            results.append({
+                "hidden1": h1,
+                "hidden2": h2,
+                "seed": seed,
+                "epochs": checkpoint,
+                "model": unstack_model(weights, index, h1, h2),
+                "losses": losses[index, :min(trained[index], checkpoint)].copy(),
+            })
+
+    def snapshot(epoch, epoch_losses):
+        # 이미 멈춘 신경망은 손실 기록을 늘리지 않습니다.
+        for index, stopper in enumerate(stoppers):
+            if stopper is None or stopper.reason is None:
+                losses[index, epoch] = epoch_losses[index]
+                trained[index] = epoch + 1
+        if epoch + 1 in checkpoints:
+            record(epoch + 1)
+
+    train_stacked(
+        x, y, weights, masks, epochs, learning_rate, batch_size, [seed for _, _, seed in nets],
+        on_epoch=snapshot, stoppers=stoppers,
+    )
+    # 모든 신경망이 일찍 멈춰 반복이 끝났으면 남은 checkpoint 는 멈춘 때의 가중치로 채웁니다.
+    reached = int(trained.max()) if len(nets) else 0
+    for checkpoint in checkpoints:
+        if checkpoint > reached:
+            record(checkpoint)
+    return results
+
+
+def train_mlp_folds(x_sets, y_sets, sample_masks, hidden1=8, hidden2=4, epochs=30, learning_rate=0.01, batch_size=8, seed=42, new_stopper=None):
+    # 검증용: 같은 구조·같은 시작값의 신경망을 폴드 수만큼 쌓아, 폴드마다 다른 학습 점(sample_masks)으로 한 번에 학습합니다.
+    # 각 신경망은 자기 학습 점만으로 train_mlp 를 부른 것과 같은 결과입니다. (뺀 점은 미니배치 자리도 Adam 걸음도 차지하지 않음)
+    # x_sets, y_sets: (폴드 수, n) — 폴드마다 따로 정규화한 값을 넣을 수 있습니다.
+    # new_stopper: 신경망마다 부를 EarlyStopper 생성 함수 — 본 학습과 같은 조기 종료 기준을 폴드마다 따로 적용합니다.
+    x = np.asarray(x_sets, dtype=float)[:, :, None]
+    y = np.asarray(y_sets, dtype=float)[:, :, None]
+    sample_masks = np.asarray(sample_masks, dtype=float)
+    _, weights, masks = stack_weights([(hidden1, hidden2)], [seed] * len(sample_masks))
+    stoppers = [new_stopper() for _ in sample_masks] if new_stopper is not None else None
+    train_stacked(
+        x, y, weights, masks, epochs, learning_rate, batch_size, [seed] * len(sample_masks),
+        sample_masks=sample_masks, stoppers=stoppers,
+    )
+    return [unstack_model(weights, index, int(hidden1), int(hidden2)) for index in range(len(sample_masks))]
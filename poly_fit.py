@@ -0,0 +1,153 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+# ==========================================
+# 0. 설정
+# ==========================================
+# 한 번 분해할 때 함께 준비해 두는 최고 차수 (이보다 낮은 차수는 모두 같은 분해를 나눠 씁니다)
+DEFAULT_MAX_DEGREE = 3
+# R 의 대각 성분이 가장 큰 값의 이 비율보다 작으면 (같은 x 가 너무 많아) 분해를 믿지 않습니다.
+RANK_TOLERANCE = 1e-10
+
+
+class PolynomialFit:
+    # 방데르몽드 행렬 V = [1, x, x², ..., x^N] 을 한 번만 QR 분해해 1..N 차 최소제곱 다항식을 모두 구합니다.
+    # V 의 앞 d+1 개 열의 QR 분해는 전체 분해의 Q[:, :d+1], R[:d+1, :d+1] 이므로 (nested QR)
+    # 차수마다 작은 위삼각 방정식 R_d c = (Qᵀy)[:d+1] 하나만 풀면 됩니다.
+    # x 를 평균만큼 옮기고 열마다 크기(노름)로 나누어, x 가 연도처럼 큰 자료에서도 R 이 나빠지지 않게 합니다.
+    def __init__(self, x_values, y_values, max_degree=DEFAULT_MAX_DEGREE):
+        self.x = np.asarray(x_values, dtype=float)
+        self.y = np.asarray(y_values, dtype=float)
+        self.max_degree = max(0, min(int(max_degree), len(self.x) - 1))
+        self._center = float(self.x.mean()) if len(self.x) else 0.0
+        vander = np.vander(self.x - self._center, self.max_degree + 1, increasing=True)
+        self._norms = np.linalg.norm(vander, axis=0)
+        self._norms[self._norms == 0.0] = 1.0
+        q, r = np.linalg.qr(vander / self._norms)
+        self._q = q
+        self._r = r
+        self._qty = q.T @ self.y
+        diag = np.abs(np.diag(r))
+        self._rank_ok = diag > RANK_TOLERANCE * max(diag.max(initial=0.0), 1e-300)
+        self._coeffs = {}
+
+    def coeffs(self, degree):
+        # np.polyval 순서(최고차항부터)의 계수를 돌려줍니다.
+        degree = int(degree)
+        if degree not in self._coeffs:
+            if degree <= self.max_degree and self._rank_ok[:degree + 1].all():
+                size = degree + 1
+                shifted = np.linalg.solve(self._r[:size, :size], self._qty[:size]) / self._norms[:size]
+                self._coeffs[degree] = unshift(shifted[::-1], self._center)
+            else:
+                self._coeffs[degree] = self._centered_lstsq(degree)
+        return self._coeffs[degree].copy()
+
+    def _centered_lstsq(self, degree):
+        # 점이 차수보다 적거나 같은 x 가 겹쳐 분해를 쓸 수 없을 때만 씁니다.
+        # 상수항을 따로 두고 평균을 뺀 뒤 최소 노름 해를 구해, 이런 자료에서도 sklearn LinearRegression 과 같은 답을 냅니다.
+        features = np.vander(self.x, degree + 1)[:, :-1]
+        feature_mean = features.mean(axis=0)
+        y_mean = self.y.mean()
+        slope = np.linalg.lstsq(features - feature_mean, self.y - y_mean, rcond=None)[0]
+        return np.append(slope, y_mean - feature_mean @ slope)
+
+    def predict(self, degree, x_values=None):
+        x = self.x if x_values is None else np.asarray(x_values, dtype=float)
+        return np.polyval(self.coeffs(degree), x)
+
+    def _factored(self, degree):
+        return int(degree) <= self.max_degree and self._rank_ok[:int(degree) + 1].all()
+
+    def loo_residuals(self, degree):
+        # 한 점씩 빼고 다시 맞췄을 때 그 점에서의 오차 (실제값 - 예측값)를 다시 맞추지 않고 구합니다.
+        # 영향 행렬 H = Q_d Q_dᵀ 의 대각 h_ii 로 e_i / (1 - h_ii) 입니다. (PRESS 잔차)
+        residuals = self.y - self.predict(degree)
+        if not self._factored(degree):
+            return self._refit_residuals(degree, np.arange(len(self.x)))
+        leverage = np.sum(self._q[:, :int(degree) + 1] ** 2, axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            loo = residuals / (1.0 - leverage)
+        if np.all(np.isfinite(loo)) and np.all(leverage < 1.0 - 1e-10):
+            return loo
+        return self._refit_residuals(degree, np.arange(len(self.x)))
+
+    def kfold_residuals(self, degree, fold_ids):
+        # 같은 폴드의 점 S 를 함께 뺐을 때의 오차: e_S(cv) = (I - H_SS)⁻¹ e_S
+        fold_ids = np.asarray(fold_ids)
+        residuals = self.y - self.predict(degree)
+        if not self._factored(degree):
+            return self._refit_residuals(degree, fold_ids)
+        q = self._q[:, :int(degree) + 1]
+        result = np.empty_like(residuals)
+        for fold in np.unique(fold_ids):
+            rows = fold_ids == fold
+            q_rows = q[rows]
+            system = np.eye(int(rows.sum())) - q_rows @ q_rows.T
+            try:
+                result[rows] = np.linalg.solve(system, residuals[rows])
+            except np.linalg.LinAlgError:
+                return self._refit_residuals(degree, fold_ids)
+        if not np.all(np.isfinite(result)):
+            return self._refit_residuals(degree, fold_ids)
+        return result
+
+    def _refit_residuals(self, degree, fold_ids):
+        # 공식을 쓸 수 없는 자료(남는 점이 너무 적거나 겹침)에서는 폴드마다 직접 다시 맞춥니다.
+        result = np.empty_like(self.y)
+        for fold in np.unique(fold_ids):
+            rows = fold_ids == fold
+            if rows.all():
+                result[rows] = self.y[rows] - self.y.mean()
+                continue
+            fit = PolynomialFit(self.x[~rows], self.y[~rows], degree)
+            result[rows] = self.y[rows] - fit.predict(degree, self.x[rows])
+        return result
+
+
+def unshift(coeffs, center):
+    # (x - center) 의 다항식 계수(최고차항부터)를 x 의 다항식 계수로 바꿉니다. (호너 방식)
+    result = np.array(coeffs[:1], dtype=float)
+    for coef in coeffs[1:]:
+        result = np.convolve(result, [1.0, -center])
+        result[-1] += coef
+    return result
+
+
+@lru_cache(maxsize=256)
+def _cached_fit(x_values, y_values, max_degree):
+    return PolynomialFit(x_values, y_values, max_degree)
+
+
+def polynomial_fit(x_values, y_values, max_degree=DEFAULT_MAX_DEGREE):
+    # 같은 자료라면 차수가 달라도 같은 분해 객체를 돌려줍니다.
+    return _cached_fit(tuple(float(v) for v in x_values), tuple(float(v) for v in y_values), max(int(max_degree), DEFAULT_MAX_DEGREE))
+
+
+def polynomial_coeffs(x_values, y_values, degree):
+    return polynomial_fit(x_values, y_values, degree).coeffs(degree)
+
+
+def polynomial_latex(coeffs, precision=2):
+    # 최고차항부터의 계수로 y = ... 식을 만듭니다. (0 인 항은 빼고, 계수가 ±1 이면 1 을 생략)
+    coeffs = np.asarray(coeffs, dtype=float)
+    degree = len(coeffs) - 1
+    latex_terms = []
+    for power, coef in zip(range(degree, 0, -1), coeffs[:-1]):
+        if abs(coef) <= 1e-9:
+            continue
+        if abs(coef) == 1.0:
+            sign = "-" if coef < 0 else ""
+            body = f"{sign}x^{{{power}}}" if power > 1 else f"{sign}x"
+        else:
+            body = f"{coef:.{precision}f}x^{{{power}}}" if power > 1 else f"{coef:.{precision}f}x"
+        latex_terms.append(body)
+    intercept = float(coeffs[-1]) if len(coeffs) else 0.0
+    if abs(intercept) > 1e-9:
+        sign = "-" if intercept < 0 else "+"
+        latex_terms.append(f"{sign}{abs(intercept):.{precision}f}")
+    expr = " + ".join(latex_terms).replace("+ -", "- ")
+    expr = expr[2:] if expr.startswith("+ ") else expr
+    return f"y = {expr}" if expr else "y = 0"
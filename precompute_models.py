@@ -0,0 +1,93 @@
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+os.environ.setdefault("SANDBOX_LOG_LEVEL", "WARNING")
+os.environ.setdefault("DATA5_LOG_LEVEL", "WARNING")
+# 이 스크립트가 프로세스 풀로 나눠 학습하므로 data5 의 학습 실행기는 쓰지 않습니다.
+os.environ.setdefault("DATA5_TRAINING_SLOTS", "0")
+
+import data5
+
+
+# ==========================================
+# 0. 미리 계산할 범위 (5DAY 화면의 슬라이더와 같게 맞춤)
+# ==========================================
+SCALE_OPTIONS = (True, False)
+HIDDEN1_RANGE = range(4, 13)          # 1층 뉴런 수 4~12
+HIDDEN2_RANGE = range(2, 9)           # 2층 뉴런 수 2~8
+EPOCH_RANGE = range(10, 31, 5)        # 학습 횟수 10~30 (5씩)
+
+
+# ==========================================
+# 1. 작업 목록 (데이터 x 변수 쌍 x 정규화 하나가 작업 하나)
+# ==========================================
+def column_pairs(table):
+    # 화면에서 고를 수 있는 (x, y) 조합: 서로 다른 두 열의 순서쌍
+    return list(itertools.permutations(table.columns, 2))
+
+
+def build_tasks(dataset_names=None):
+    tasks = []
+    for name, info in data5.DATASETS.items():
+        if dataset_names and name not in dataset_names:
+            continue
+        for x_col, y_col in column_pairs(info["table"]):
+            for use_scale in SCALE_OPTIONS:
+                tasks.append((name, x_col, y_col, use_scale))
+    return tasks
+
+
+def precompute_task(task):
+    # 워커 프로세스에서 실행됩니다. 화면과 똑같은 자료(마지막 점 제외, 이상치 제거)로
+    # 모든 하이퍼파라미터 조합을 학습해 모델 저장소에 씁니다. 이미 있는 조합은 건너뜁니다.
+    name, x_col, y_col, use_scale = task
+    split = data5.dataset_split(data5.current_dataset(name, x_col, y_col))
+    x_dl, y_dl = tuple(split["x_dl"]), tuple(split["y_dl"])
+    trained = 0
+    skipped = 0
+    for hidden1, hidden2, epochs in itertools.product(HIDDEN1_RANGE, HIDDEN2_RANGE, EPOCH_RANGE):
+        if data5.MODEL_STORE.contains(data5.model_store_key(x_dl, y_dl, use_scale, hidden1, hidden2, epochs)):
+            skipped += 1
+            continue
+        data5.load_or_train_deep_learning(x_dl, y_dl, use_scale, hidden1, hidden2, epochs)
+        trained += 1
+    return trained, skipped
+
+
+# ==========================================
+# 2. 실행 (python precompute_models.py --workers 8)
+# ==========================================
+def main():
+    parser = argparse.ArgumentParser(description="5DAY 내장 데이터의 딥러닝 결과를 미리 학습해 모델 저장소에 채웁니다.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="동시에 학습할 프로세스 수")
+    parser.add_argument("--dataset", action="append", help="이 데이터만 계산 (여러 번 지정 가능)")
+    args = parser.parse_args()
+
+    if data5.MODEL_STORE is None:
+        parser.error("DATA5_MODEL_STORE 가 비어 있어 저장할 곳이 없습니다.")
+    tasks = build_tasks(args.dataset)
+    per_task = len(HIDDEN1_RANGE) * len(HIDDEN2_RANGE) * len(EPOCH_RANGE)
+    print(f"작업 {len(tasks)}개 x 조합 {per_task}개 = 모델 {len(tasks) * per_task}개 ({data5.DL_BACKEND}, {data5.MODEL_STORE_DIR})")
+
+    started = time.perf_counter()
+    total_trained = 0
+    total_skipped = 0
+    with ProcessPoolExecutor(max_workers=max(args.workers, 1)) as executor:
+        futures = {executor.submit(precompute_task, task): task for task in tasks}
+        for done, future in enumerate(as_completed(futures), start=1):
+            name, x_col, y_col, use_scale = futures[future]
+            trained, skipped = future.result()
+            total_trained += trained
+            total_skipped += skipped
+            scale_text = "정규화" if use_scale else "원자료"
+            print(f"[{done}/{len(tasks)}] {name} | {x_col} -> {y_col} | {scale_text}: 학습 {trained}, 건너뜀 {skipped}")
+
+    elapsed = time.perf_counter() - started
+    print(f"완료: 학습 {total_trained}개, 이미 있음 {total_skipped}개, {elapsed:.1f}초")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import atexit
+import contextlib
+import logging
+import multiprocessing as mp
+import os
+import sys
+import threading
+import types
+
+
+# ==========================================
+# 0. 설정
+# ==========================================
+# forkserver 가 워커를 포크하기 전에 한 번만 읽어 두는 무거운 모듈 (워커가 따뜻한 상태로 시작)
+FORKSERVER_PRELOAD = ["code_sandbox", "numpy", "matplotlib.figure", "sympy", "sympy.abc"]
+
+
+# ==========================================
+# 1. 워커 프로세스를 띄울 때 쓰는 도구 (코드 실행 풀, 학습 실행기가 함께 사용)
+# ==========================================
+def mp_context():
+    methods = mp.get_all_start_methods()
+    if "forkserver" in methods:
+        ctx = mp.get_context("forkserver")
+        ctx.set_forkserver_preload(FORKSERVER_PRELOAD)
+        return ctx
+    return mp.get_context("spawn")
+
+
+@contextlib.contextmanager
+def detached_main():
+    # Streamlit은 실행 중인 페이지 스크립트(main.py)를 __main__ 으로 등록합니다.
+    # 워커가 그 스크립트를 다시 실행하지 않도록 프로세스를 띄우는 동안만 빈 __main__ 을 보여 줍니다.
+    original = sys.modules.get("__main__")
+    placeholder = types.ModuleType("__main__")
+    sys.modules["__main__"] = placeholder
+    try:
+        yield
+    finally:
+        if sys.modules.get("__main__") is placeholder:
+            sys.modules["__main__"] = original
+
+
+def stop_process(process, conn, force=False):
+    # 워커에 끝내라는 신호(None)를 보내고 기다립니다. force 이거나 1초 안에 끝나지 않으면 강제로 끝냅니다.
+    try:
+        if force:
+            process.kill()
+        else:
+            conn.send(None)
+    except (BrokenPipeError, OSError, AttributeError):
+        pass
+    conn.close()
+    process.join(timeout=1)
+    if process.is_alive():
+        process.kill()
+        process.join(timeout=1)
+
+
+class SharedPool:
+    # 서버에 하나만 두는 실행기를 처음 쓸 때 factory() 로 만들고, 서버가 꺼질 때 shutdown() 합니다.
+    # 만들지 못하면 경고를 남기고 None 을 돌려주어 부르는 쪽이 현재 프로세스에서 처리하게 합니다.
+    def __init__(self, factory, logger, failure_message):
+        self._factory = factory
+        self._logger = logger
+        self._failure_message = failure_message
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._pool is None:
+                try:
+                    self._pool = self._factory()
+                except (OSError, ValueError) as exc:
+                    self._logger.warning(self._failure_message, exc)
+                    return None
+                atexit.register(self._pool.shutdown)
+            return self._pool
+
+
+# ==========================================
+# 2. 서버 로그
+# ==========================================
+def get_logger(name, level_env):
+    # "[이름] 메시지" 형식으로 서버 stderr 에 남깁니다. 로그 수준은 환경 변수 level_env 로 정합니다. (기본 INFO)
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.__stderr__)
+        handler.setFormatter(logging.Formatter("%(asctime)s [%(name)s] %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(os.environ.get(level_env, "INFO"))
+        logger.propagate = False
+    return logger
@@ -0,0 +1,36 @@
+import ast
+
+import pytest
+
+from code_validator import is_deterministic
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "from numpy.random import default_rng\nprint(default_rng().random())",
+        "import numpy.random as npr\nprint(npr.default_rng().integers(10))",
+        "from numpy import random as r\nprint(r.default_rng().integers(10))",
+        "from . import helper",
+    ],
+)
+def test_random_imports_are_not_deterministic(source):
+    assert not is_deterministic(ast.parse(source))
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "import pandas as pd\nprint(pd.Timestamp.now())",
+        "import pandas as pd\nprint(pd.Timestamp.today())",
+        "import numpy as np\nprint(np.datetime64(\"now\"))",
+        "import pandas as pd\nprint(pd.to_datetime(\"today\"))",
+        "import pandas as pd\nprint(pd.Timestamp(ts_input=\"now\"))",
+    ],
+)
+def test_current_time_reads_are_not_deterministic(source):
+    assert not is_deterministic(ast.parse(source))
+
+
+def test_plain_code_is_deterministic():
+    assert is_deterministic(ast.parse("import numpy as np\nprint(np.arange(5).sum())"))
@@ -0,0 +1,236 @@
+import importlib
+import os
+import queue
+import threading
+import time
+
+from process_utils import SharedPool, detached_main, get_logger, mp_context, stop_process
+
+
+# ==========================================
+# 0. 학습 실행기 설정
+# ==========================================
+# 학습 칸(slot) 하나 = 학습 전용 프로세스 하나. 칸마다 THREADS_PER_SLOT 개의 계산 스레드만 쓰게 해서
+# 칸 수 x 칸당 스레드 수가 CPU 코어 수를 넘지 않도록 맞춥니다. (0 칸이면 현재 프로세스에서 학습)
+# 칸마다 학습 도구를 미리 불러 두어 메모리를 꽤 쓰므로(칸당 약 250MB) 기본은 많아야 2칸입니다.
+THREADS_PER_SLOT = max(1, int(os.environ.get("DATA5_THREADS_PER_SLOT", "1")))
+TRAINING_SLOTS = int(os.environ.get("DATA5_TRAINING_SLOTS", max(1, min(2, (os.cpu_count() or 1) // THREADS_PER_SLOT))))
+TRAINING_QUEUE_TIMEOUT = float(os.environ.get("DATA5_TRAINING_QUEUE_TIMEOUT", "120"))   # 빈 칸을 기다리는 최대 시간(초)
+TRAINING_RUN_TIMEOUT = float(os.environ.get("DATA5_TRAINING_RUN_TIMEOUT", "120"))       # 학습 하나를 기다리는 최대 시간(초)
+# 학습 칸이 시작할 때 미리 불러오거나 실행할 것 ("모듈" 또는 "모듈:함수", 쉼표로 구분)
+TRAINING_PRELOAD = tuple(
+    entry.strip() for entry in os.environ.get("DATA5_TRAINING_PRELOAD", "data5:warm_training_slot").split(",") if entry.strip()
+)
+
+logger = get_logger("training_pool", "DATA5_LOG_LEVEL")
+
+
+class TrainingPoolBusy(RuntimeError):
+    pass
+
+
+class TrainingFailed(RuntimeError):
+    pass
+
+
+# ==========================================
+# 1. 학습 프로세스 (칸 하나)
+# ==========================================
+def limit_threads(threads):
+    # 이 프로세스의 계산 스레드 수를 정합니다. TensorFlow 는 처음 불러올 때 DATA5_TF_THREADS 를 읽습니다.
+    os.environ["DATA5_TF_THREADS"] = str(threads)
+    try:
+        from threadpoolctl import threadpool_limits
+
+        threadpool_limits(threads)
+    except ImportError:
+        pass
+
+
+def preload_slot(entries):
+    # 첫 학습 요청이 모듈 불러오기나 TensorFlow 준비를 기다리지 않도록 칸이 뜨자마자 해 둡니다.
+    for entry in entries:
+        module_name, _, function_name = entry.partition(":")
+        try:
+            module = importlib.import_module(module_name)
+            if function_name:
+                getattr(module, function_name)()
+        except Exception as exc:
+            logger.warning("학습 칸 준비 중 %s 실패: %s", entry, exc)
+
+
+def _worker_main(conn, threads, preload):
+    limit_threads(threads)
+    preload_slot(preload)
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            break
+        if task is None:
+            break
+        on_epoch = None
+        if task["stream"]:
+            def on_epoch(epoch, loss):
+                conn.send(("epoch", epoch, loss))
+        try:
+            result = task["fn"](*task["args"], on_epoch=on_epoch)
+            message = ("done", result)
+        except Exception as e:
+            message = ("error", f"{type(e).__name__}: {e}")
+        try:
+            conn.send(message)
+        except (BrokenPipeError, OSError):
+            break
+    conn.close()
+
+
+class _Slot:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+
+    def stop(self, force=False):
+        stop_process(self.process, self.conn, force)
+
+
+# ==========================================
+# 2. 메인 프로세스: 칸을 빌려 학습을 맡기는 실행기
+# ==========================================
+class TrainingPool:
+    def __init__(self, slots=TRAINING_SLOTS, threads_per_slot=THREADS_PER_SLOT, queue_timeout=TRAINING_QUEUE_TIMEOUT, preload=TRAINING_PRELOAD, run_timeout=TRAINING_RUN_TIMEOUT):
+        self.size = max(int(slots), 1)
+        self.threads_per_slot = max(int(threads_per_slot), 1)
+        self.queue_timeout = float(queue_timeout)
+        self.run_timeout = float(run_timeout)
+        self.preload = tuple(preload)
+        self._ctx = mp_context()
+        self._idle = queue.Queue()
+        self._slots = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {"runs": 0, "errors": 0, "waiting": 0, "max_waiting": 0, "wait_ms": 0.0, "max_wait_ms": 0.0, "train_ms": 0.0}
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(target=_worker_main, args=(child_conn, self.threads_per_slot, self.preload), daemon=True)
+        with detached_main():
+            process.start()
+        child_conn.close()
+        slot = _Slot(process, parent_conn)
+        with self._lock:
+            self._slots.add(slot)
+        return slot
+
+    def _retire(self, slot):
+        with self._lock:
+            self._slots.discard(slot)
+        slot.stop(force=True)
+        if not self._closed:
+            self._idle.put(self._spawn())
+
+    def run(self, fn, args, on_epoch=None):
+        # 빈 칸이 날 때까지 기다렸다가 fn(*args, on_epoch=...) 를 그 칸에서 실행하고 결과를 돌려줍니다.
+        # fn 과 결과는 프로세스 사이로 옮겨지므로 모듈 최상위 함수와 pickle 가능한 값이어야 합니다.
+        queued_at = time.monotonic()
+        slot = self._acquire()
+        started_at = time.monotonic()
+        wait_ms = (started_at - queued_at) * 1000
+        deadline = started_at + self.run_timeout
+
+        try:
+            slot.conn.send({"fn": fn, "args": tuple(args), "stream": on_epoch is not None})
+            while True:
+                if not slot.conn.poll(max(deadline - time.monotonic(), 0.0)):
+                    message = None
+                    break
+                message = slot.conn.recv()
+                if message[0] == "epoch":
+                    on_epoch(message[1], message[2])
+                    continue
+                break
+        except (EOFError, BrokenPipeError, OSError):
+            self._retire(slot)
+            self._record(wait_ms, started_at, failed=True)
+            raise TrainingFailed("학습 프로세스가 비정상 종료되었습니다.") from None
+        except BaseException:
+            # on_epoch 에서 난 예외 등으로 응답을 끝까지 읽지 못한 칸은 다시 쓰지 않습니다.
+            self._retire(slot)
+            raise
+
+        if message is None:
+            # 죽지 않고 멈춰 버린 칸은 더 기다리지 않고 없앤 뒤 새 칸으로 바꿉니다.
+            self._retire(slot)
+            self._record(wait_ms, started_at, failed=True)
+            raise TrainingFailed(f"학습이 {self.run_timeout:.0f}초 안에 끝나지 않아 중단했습니다.")
+        self._idle.put(slot)
+        self._record(wait_ms, started_at, failed=message[0] != "done")
+        if message[0] != "done":
+            raise TrainingFailed(message[1])
+        return message[1]
+
+    def _acquire(self):
+        # 빈 칸이 바로 있으면 기다리지 않고, 없을 때만 대기 수(queued)에 넣고 기다립니다.
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            self._stats["waiting"] += 1
+            self._stats["max_waiting"] = max(self._stats["max_waiting"], self._stats["waiting"])
+        try:
+            return self._idle.get(timeout=self.queue_timeout)
+        except queue.Empty:
+            raise TrainingPoolBusy(f"{self.queue_timeout:.0f}초 동안 빈 학습 칸이 없었습니다.") from None
+        finally:
+            with self._lock:
+                self._stats["waiting"] -= 1
+
+    def _record(self, wait_ms, started_at, failed=False):
+        train_ms = (time.monotonic() - started_at) * 1000
+        with self._lock:
+            self._stats["runs"] += 1
+            self._stats["errors"] += int(failed)
+            self._stats["wait_ms"] += wait_ms
+            self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], wait_ms)
+            self._stats["train_ms"] += train_ms
+            waiting = self._stats["waiting"]
+        logger.info("train wait_ms=%.1f train_ms=%.1f queued=%d failed=%s", wait_ms, train_ms, waiting, failed)
+
+    def stats(self):
+        # 칸 수를 정할 때 보는 값: 지금 기다리는 요청 수(queued)와 평균/최대 대기 시간
+        with self._lock:
+            stats = dict(self._stats)
+        runs = stats.pop("runs")
+        return {
+            "slots": self.size,
+            "threads_per_slot": self.threads_per_slot,
+            "busy": self.size - self._idle.qsize(),
+            "queued": stats.pop("waiting"),
+            "max_queued": stats.pop("max_waiting"),
+            "runs": runs,
+            "errors": stats["errors"],
+            "avg_wait_ms": stats["wait_ms"] / runs if runs else 0.0,
+            "max_wait_ms": stats["max_wait_ms"],
+            "avg_train_ms": stats["train_ms"] / runs if runs else 0.0,
+        }
+
+    def shutdown(self):
+        self._closed = True
+        with self._lock:
+            slots = list(self._slots)
+            self._slots.clear()
+        for slot in slots:
+            slot.stop()
+
+
+_POOL = SharedPool(TrainingPool, logger, "학습 실행기를 시작하지 못해 현재 프로세스에서 학습합니다: %s")
+
+
+def get_training_pool():
+    if TRAINING_SLOTS <= 0:
+        return None
+    return _POOL.get()
+